@@ -0,0 +1,305 @@
+# backend/benchmarks/bench_api.py - Suite de carga de la API vía ASGI (sin red), con resultados en JSON
+#
+# Uso (desde backend/): python benchmarks/bench_api.py [--backends memory,mongomock] [--sizes 1000,100000,1000000]
+#                       [--seconds 2] [--concurrency 1] [--output bench_api.json] [--compare anterior.json]
+#
+# Cada combinación backend/tamaño corre en un proceso propio (estado del servidor limpio y memoria
+# liberada al terminar). Backends:
+#   memory     store en memoria
+#   mongomock  MongoDB simulado en proceso (pip install mongomock-motor); lento con muchos documentos
+#   mongodb    un MongoDB real de prueba en --mongo-url (la base --mongo-db se vacía y se llena)
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_persistence import make_estimate
+
+BACKENDS = ("memory", "mongomock", "mongodb")
+CASES = ("create", "list_shallow", "list_deep_skip", "list_deep_cursor", "detail", "summary", "detailed_stats", "delete")
+PAGE_SIZE = 20
+DEEP_FRACTION = 0.9
+SEED_BATCH = 10_000
+WARMUP_REQUESTS = 20
+
+# Fecha fija para que el mismo seed genere exactamente los mismos datos en cada corrida
+REFERENCE_TIME = datetime(2025, 1, 1)
+
+CREATE_PAYLOAD = {
+    "project_name": "Bench Shop",
+    "project_type": "e-commerce",
+    "complexity": "medium",
+    "features": {"authentication": True, "payments": True, "maps": False},
+    "team": {"frontend": 1, "backend": 1, "designer": 0, "qa": 0},
+    "hourly_rate": 50,
+    "estimated_hours": 300,
+    "estimated_weeks": 4,
+    "estimated_cost": 15000.0,
+    "breakdown": {"frontend": 120, "backend": 120, "design": 30, "qa": 30}
+}
+
+
+# ========================================
+# PROCESO DE UNA COMBINACIÓN
+# ========================================
+def generate(size: int, seed: int):
+    """Estimaciones del dataset, de a una (no se retiene la lista completa)"""
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield make_estimate(rng, REFERENCE_TIME)
+
+
+def summarize(case: str, samples: list, wall: float, statuses: dict) -> dict:
+    if not samples:
+        return {"case": case, "ops": 0, "throughput": None, "statuses": statuses}
+    ordered = sorted(samples)
+    return {
+        "case": case,
+        "ops": len(samples),
+        "throughput": round(len(samples) / wall, 2) if wall else None,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "statuses": statuses
+    }
+
+
+async def run_case(case: str, request, seconds: float, concurrency: int, max_ops: int = None) -> dict:
+    """Ejecutar `request(i)` con `concurrency` workers durante `seconds` (o hasta `max_ops`)"""
+    warmup_deadline = time.perf_counter() + seconds * 0.1
+    for i in range(WARMUP_REQUESTS if max_ops is None else 0):
+        await request(-1 - i)
+        if time.perf_counter() > warmup_deadline:
+            break
+
+    samples = []
+    statuses = {}
+    counter = iter(range(max_ops if max_ops is not None else 10**12))
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        # Al menos una request por worker, aunque una sola tarde más que `seconds`
+        for i in counter:
+            start = time.perf_counter()
+            status = await request(i)
+            samples.append(time.perf_counter() - start)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if time.perf_counter() >= deadline:
+                break
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(case, samples, time.perf_counter() - start, statuses)
+
+
+async def seed_mongo(server, size: int, seed: int):
+    collection = server.db.project_estimates
+    await collection.delete_many({})
+    batch = []
+    for estimate in generate(size, seed):
+        batch.append(estimate)
+        if len(batch) == SEED_BATCH:
+            await collection.insert_many(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch)
+
+
+async def run_combination(backend: str, size: int, seconds: float, concurrency: int, seed: int) -> dict:
+    import httpx
+    import server
+    from memory_store import order_key
+    from pagination import encode_cursor
+
+    seed_start = time.perf_counter()
+    if backend == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[server.DB_NAME]
+    if backend == "memory":
+        server.estimates_memory_db.bulk_load(generate(size, seed))
+    else:
+        await seed_mongo(server, size, seed)
+    await server.startup_db_client()
+    seed_seconds = time.perf_counter() - seed_start
+
+    # Ids y posición profunda del listado, regenerados con el mismo seed
+    keys = sorted((order_key(estimate) for estimate in generate(size, seed)), reverse=True)
+    ids = [estimate_id for _, estimate_id in keys]
+    deep_index = int(len(keys) * DEEP_FRACTION)
+    deep_timestamp, deep_id = keys[max(deep_index - 1, 0)]
+    deep_cursor = encode_cursor({"timestamp": deep_timestamp, "id": deep_id})
+    del keys
+    rng = random.Random(seed + 1)
+
+    results = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        login = await client.post("/api/v1/auth/login", json={"username": "admin", "password": "admin123"})
+        login.raise_for_status()
+        admin = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        created = []
+
+        async def create(i):
+            response = await client.post("/api/v1/estimates", json={**CREATE_PAYLOAD, "project_name": f"Bench Shop {i}"})
+            if i >= 0 and response.status_code == 200:
+                created.append(response.json()["id"])
+            return response.status_code
+
+        async def get(path, headers=None):
+            return (await client.get(path, headers=headers)).status_code
+
+        async def delete(i):
+            return (await client.delete(f"/api/v1/estimates/{created[i]}", headers=admin)).status_code
+
+        requests = {
+            "create": create,
+            "list_shallow": lambda i: get(f"/api/v1/estimates?limit={PAGE_SIZE}"),
+            "list_deep_skip": lambda i: get(f"/api/v1/estimates?limit={PAGE_SIZE}&skip={deep_index}"),
+            "list_deep_cursor": lambda i: get(f"/api/v1/estimates?limit={PAGE_SIZE}&after={deep_cursor}"),
+            "detail": lambda i: get(f"/api/v1/estimates/{rng.choice(ids)}"),
+            "summary": lambda i: get("/api/v1/estimates-stats/summary"),
+            "detailed_stats": lambda i: get("/api/v1/admin/stats/detailed", admin),
+        }
+        for case in CASES:
+            if case == "delete":
+                # Borra lo creado en `create`: el dataset vuelve a su tamaño original
+                result = await run_case(case, delete, seconds, concurrency, max_ops=len(created))
+            else:
+                result = await run_case(case, requests[case], seconds, concurrency)
+            results.append(result)
+            if result["ops"]:
+                print(f"  {backend:<10} {size:>9,} {case:<18} {result['throughput']:>9.1f}/s "
+                      f"p50 {result['p50_ms']:>9.3f} ms p99 {result['p99_ms']:>9.3f} ms", file=sys.stderr)
+
+    await server.shutdown_db_client()
+    return {"backend": backend, "size": size, "seed_seconds": round(seed_seconds, 2), "cases": results}
+
+
+def worker_main(args):
+    if args.backend == "mongodb":
+        os.environ["MONGO_URL"] = args.mongo_url
+        os.environ["DB_NAME"] = args.mongo_db
+    else:
+        os.environ.pop("MONGO_URL", None)
+    os.environ.pop("MEMORY_DB_PATH", None)
+    # Los logs de cada request (incluido el WARNING de las lentas) no son parte de lo que se mide
+    os.environ["SLOW_REQUEST_MS"] = "1e12"
+    logging.disable(logging.INFO)
+    result = asyncio.run(run_combination(args.backend, args.size, args.seconds, args.concurrency, args.seed))
+    print(json.dumps(result))
+
+
+# ========================================
+# ORQUESTACIÓN Y COMPARACIÓN
+# ========================================
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_worker(args, backend: str, size: int) -> dict:
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker",
+        "--backend", backend, "--size", str(size),
+        "--seconds", str(args.seconds), "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+        "--mongo-url", args.mongo_url, "--mongo-db", args.mongo_db
+    ]
+    completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        return {"backend": backend, "size": size, "error": f"worker exited with status {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(previous: dict, current: dict):
+    """Variación de throughput y p99 respecto de una corrida anterior"""
+    def index(report):
+        return {
+            (run["backend"], run["size"], case["case"]): case
+            for run in report["runs"] if "cases" in run for case in run["cases"]
+        }
+    before, after = index(previous), index(current)
+    print(f"\n{'backend':<10} {'size':>9} {'case':<18} {'throughput':>12} {'p99':>12}")
+    for key in sorted(after.keys() & before.keys()):
+        old, new = before[key], after[key]
+        if not old["ops"] or not new["ops"]:
+            continue
+        throughput = (new["throughput"] / old["throughput"] - 1) * 100 if old["throughput"] else 0
+        p99 = (new["p99_ms"] / old["p99_ms"] - 1) * 100 if old["p99_ms"] else 0
+        print(f"{key[0]:<10} {key[1]:>9,} {key[2]:<18} {throughput:>+11.1f}% {p99:>+11.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API in-process through ASGI")
+    parser.add_argument("--backends", default="memory,mongomock")
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--seconds", type=float, default=2.0, help="measuring time per case")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent clients per case")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mongomock-max-size", type=int, default=10_000,
+                        help="skip larger datasets on mongomock (every query scans in Python)")
+    parser.add_argument("--mongo-url", default="mongodb://127.0.0.1:27018")
+    parser.add_argument("--mongo-db", default="bench_api")
+    parser.add_argument("--output", default="bench_api.json")
+    parser.add_argument("--compare", help="previous JSON output to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_main(args)
+        return
+
+    backends = [backend for backend in args.backends.split(",") if backend]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seconds_per_case": args.seconds,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "page_size": PAGE_SIZE
+        },
+        "runs": []
+    }
+    for backend in backends:
+        for size in sizes:
+            if backend == "mongomock" and size > args.mongomock_max_size:
+                report["runs"].append({"backend": backend, "size": size, "skipped": f"larger than --mongomock-max-size {args.mongomock_max_size}"})
+                continue
+            print(f"{backend} with {size:,} estimates...", file=sys.stderr)
+            report["runs"].append(run_worker(args, backend, size))
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as previous:
+            compare(json.load(previous), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_estimates_response.py - Throughput de las lecturas de estimaciones vía ASGI (sin red)
+#
+# Uso (desde backend/): python benchmarks/bench_estimates_response.py [cantidad] [segundos por caso]
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from bench_persistence import make_estimate
+
+CASES = {
+    "list limit=100": "/api/v1/estimates?limit=100",
+    "list limit=100 skip=5000": "/api/v1/estimates?limit=100&skip=5000",
+    "filtered limit=100": "/api/v1/estimates?limit=100&project_type=e-commerce",
+    "detail": None,
+}
+
+
+async def run_case(client: httpx.AsyncClient, path: str, seconds: float) -> tuple:
+    # Calentar (rellena caches y carga imports perezosos)
+    for _ in range(20):
+        (await client.get(path)).raise_for_status()
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(path)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return len(samples) / sum(samples), statistics.median(samples), len(response.content)
+
+
+async def bench(count: int, seconds: float):
+    import server
+
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    estimates = [make_estimate(rng, now) for _ in range(count)]
+    server.estimates_memory_db.bulk_load(estimates)
+    await server.startup_db_client()
+    CASES["detail"] = f"/api/v1/estimates/{estimates[count // 2]['id']}"
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{count:,} estimates in memory, {seconds:.0f} s per case")
+        print(f"{'case':<28} {'req/s':>8} {'p50 ms':>8} {'bytes':>8}")
+        for label, path in CASES.items():
+            throughput, median, size = await run_case(client, path, seconds)
+            print(f"{label:<28} {throughput:8.0f} {median * 1000:8.2f} {size:>8,}")
+    await server.shutdown_db_client()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    os.environ.pop("MONGO_URL", None)
+    os.environ.pop("MEMORY_DB_PATH", None)
+    asyncio.run(bench(count, seconds))
+
+
+if __name__ == "__main__":
+    # El middleware registra cada request en INFO; no medir el logging
+    logging.disable(logging.INFO)
+    main()
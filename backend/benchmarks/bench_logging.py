@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_logging.py - Costo de un logger.info para quien lo llama (el event loop)
+#
+# Uso (desde backend/): python benchmarks/bench_logging.py [cantidad de registros]
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from structured_logging import TEXT_FORMAT, DroppingQueueHandler, JSONFormatter, RequestLogContext, RouteSampler, request_log_context
+
+FIELDS = {
+    "method": "GET",
+    "path": "/api/v1/estimates/2b1f6a52-5c0e-4a55-9d84-0c3b7a1e7d11",
+    "route": "/api/v1/estimates/{estimate_id}",
+    "status": 200,
+    "duration_ms": 0.42
+}
+
+
+def measure(label: str, logger: logging.Logger, count: int):
+    start = time.perf_counter()
+    for i in range(count):
+        logger.info(f"GET {FIELDS['path']} - Status: 200 - Time: 0.000s", extra=FIELDS)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed / count * 1e6:7.2f} us/record")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes: StreamHandler síncrono con formato de texto (como logging.basicConfig)
+        blocking = logging.getLogger("bench.blocking")
+        blocking.propagate = False
+        blocking.setLevel(logging.INFO)
+        stream = open(os.path.join(tmp, "blocking.log"), "w")
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        blocking.addHandler(handler)
+        measure("blocking stream handler (text)", blocking, count)
+
+        # Después: solo se encola; el formateo JSON y la escritura los hace otro hilo
+        queued = logging.getLogger("bench.queued")
+        queued.propagate = False
+        queued.setLevel(logging.INFO)
+        queue_handler = DroppingQueueHandler(queue.Queue(maxsize=count + 1))
+        queued.addHandler(queue_handler)
+        measure("queue handler", queued, count)
+        print(f"  ({queue_handler.queue.qsize():,} records left for the writer thread)")
+
+        # Con muestreo, como en el middleware: lo descartado ni siquiera crea el LogRecord
+        sampler = RouteSampler(lambda scope: "/api/v1/estimates/{estimate_id}", {"/api/v1/estimates/{estimate_id}": 0.01})
+        sampled = logging.getLogger("bench.sampled")
+        sampled.propagate = False
+        sampled.setLevel(logging.INFO)
+        sampled_handler = DroppingQueueHandler(queue.Queue(maxsize=count + 1))
+        sampled_handler.addFilter(sampler)
+        sampled.addHandler(sampled_handler)
+        start = time.perf_counter()
+        for _ in range(count):
+            # Un contexto por request
+            context = RequestLogContext({})
+            token = request_log_context.set(context)
+            if sampler.admit(context):
+                sampled.info(f"GET {FIELDS['path']} - Status: 200 - Time: 0.000s", extra=FIELDS)
+            request_log_context.reset(token)
+        elapsed = time.perf_counter() - start
+        print(f"{'queue handler, 1% sampled':<36} {elapsed / count * 1e6:7.2f} us/record")
+
+        formatter = JSONFormatter()
+        records = [queue_handler.queue.get_nowait() for _ in range(min(count, 10_000))]
+        start = time.perf_counter()
+        for record in records:
+            formatter.format(record)
+        elapsed = time.perf_counter() - start
+        print(f"{'JSON formatting (writer thread)':<36} {elapsed / len(records) * 1e6:7.2f} us/record")
+        stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_memory_store.py - Memoria y latencia del store en memoria: dicts vs columnar
+#
+# Uso (desde backend/): python benchmarks/bench_memory_store.py [cantidad]
+#
+# La memoria crece linealmente con la cantidad y se informa escalada a 1M; con
+# 1M reales el store de dicts más tracemalloc no entra en máquinas de pocos GB.
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar_store import ColumnarEstimateStore
+from estimation_engine import BASE_HOURS, COMPLEXITY_MULTIPLIERS, FEATURE_HOURS
+from memory_store import EstimateMemoryStore
+
+PAGES = 2_000
+
+
+def make_estimate(rng: random.Random, now: datetime) -> dict:
+    estimate = {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "project_name": f"Project {rng.randint(1, 10**6)}",
+        "project_type": rng.choice(list(BASE_HOURS)),
+        "complexity": rng.choice(list(COMPLEXITY_MULTIPLIERS)),
+        # El frontend manda siempre las 12 features
+        "features": {name: rng.random() < 0.5 for name in FEATURE_HOURS},
+        "team": {"frontend": rng.randint(0, 3), "backend": rng.randint(0, 3), "designer": rng.randint(0, 1), "qa": rng.randint(0, 1)},
+        "hourly_rate": float(rng.choice([35, 50, 65, 80])),
+        "estimated_hours": rng.randint(40, 2000),
+        "estimated_weeks": rng.randint(1, 40),
+        "estimated_cost": float(rng.randint(2000, 100000)),
+        "breakdown": {"frontend": rng.randint(0, 800), "backend": rng.randint(0, 800), "design": rng.randint(0, 200), "qa": rng.randint(0, 200)}
+    }
+    # Como llega por la API: strings propios de cada estimación, no literales compartidos
+    estimate = json.loads(json.dumps(estimate))
+    estimate["timestamp"] = now - timedelta(seconds=rng.randint(0, 3 * 365 * 86400))
+    return estimate
+
+
+def measure(store_class, count: int) -> dict:
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = store_class()
+    start = time.perf_counter()
+    for _ in range(count):
+        estimate = make_estimate(rng, now)
+        store[estimate["id"]] = estimate
+    del estimate
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(PAGES):
+        store.page(i * 10, 100)
+    page_seconds = (time.perf_counter() - start) / PAGES
+
+    start = time.perf_counter()
+    for _ in store.values():
+        pass
+    scan_seconds = time.perf_counter() - start
+
+    return {"store": store, "retained": retained, "load": load_seconds, "page": page_seconds, "scan": scan_seconds}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    scale = 1_000_000 / count
+    print(f"Estimates: {count:,} (memory scaled to 1M)")
+    for name, store_class in (("dict", EstimateMemoryStore), ("columnar", ColumnarEstimateStore)):
+        result = measure(store_class, count)
+        extra = ""
+        if store_class is ColumnarEstimateStore:
+            extra = f" - {len(result['store']._overflow)} in overflow"
+        print(f"{name:<9} {result['retained'] * scale / 1024 / 1024:8.1f} MiB per 1M "
+              f"({result['retained'] / count:.0f} B/estimate){extra}")
+        print(f"{'':<9} page(100): {result['page'] * 1e6:.0f} µs, full scan: {result['scan']:.2f} s, "
+              f"load (incl. generation): {result['load']:.1f} s")
+        del result
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
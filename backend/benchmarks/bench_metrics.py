@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_metrics.py - Costo de las métricas en el camino de cada request
+#
+# Uso (desde backend/): python benchmarks/bench_metrics.py [segundos por caso]
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from bench_persistence import make_estimate
+from metrics import MetricsRegistry
+
+ROUTES = [f"/api/v1/route_{i}/{{item_id}}" for i in range(30)]
+STATUSES = ["200", "200", "200", "304", "404"]
+
+
+def bench_observe(iterations: int = 1_000_000):
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "bench", ("route", "method", "status"))
+    rng = random.Random(5)
+    labels = [(rng.choice(ROUTES), "GET", rng.choice(STATUSES)) for _ in range(1024)]
+    values = [rng.lognormvariate(-7, 1.5) for _ in range(1024)]
+    start = time.perf_counter()
+    for i in range(iterations):
+        j = i & 1023
+        histogram.observe(values[j], *labels[j])
+    elapsed = time.perf_counter() - start
+    print(f"Histogram.observe: {elapsed / iterations * 1e9:.0f} ns/op ({len(histogram._series)} series)")
+    start = time.perf_counter()
+    body = registry.render()
+    print(f"render: {(time.perf_counter() - start) * 1000:.2f} ms, {len(body):,} bytes")
+
+
+async def latency(client: httpx.AsyncClient, path: str, seconds: float) -> float:
+    for _ in range(50):
+        (await client.get(path)).raise_for_status()
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(path)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return statistics.median(samples)
+
+
+async def bench_requests(seconds: float):
+    import server
+
+    rng = random.Random(11)
+    estimates = [make_estimate(rng, datetime.utcnow()) for _ in range(1000)]
+    server.estimates_memory_db.bulk_load(estimates)
+    await server.startup_db_client()
+    path = f"/api/v1/estimates/{estimates[500]['id']}"
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Alternar para que el ruido de la máquina afecte a los dos casos por igual
+        results = {True: [], False: []}
+        for _ in range(3):
+            for enabled in (False, True):
+                server.METRICS_ENABLED = enabled
+                results[enabled].append(await latency(client, path, seconds))
+        off, on = min(results[False]), min(results[True])
+        print(f"GET detail p50: metrics off {off * 1e6:.0f} us, on {on * 1e6:.0f} us ({(on - off) * 1e6:+.1f} us)")
+    await server.shutdown_db_client()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    os.environ.pop("MONGO_URL", None)
+    os.environ.pop("MEMORY_DB_PATH", None)
+    bench_observe()
+    asyncio.run(bench_requests(seconds))
+
+
+if __name__ == "__main__":
+    # El middleware registra cada request en INFO; no medir el logging
+    logging.disable(logging.INFO)
+    main()
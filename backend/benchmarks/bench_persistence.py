@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_persistence.py - Benchmark de la persistencia del store en memoria
+#
+# Uso (desde backend/): python benchmarks/bench_persistence.py [cantidad]
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar_store import ColumnarEstimateStore
+from persistence import MemoryPersistence
+
+WRITE_SAMPLES = 20_000
+FSYNC_SAMPLES = 500
+
+
+def make_estimate(rng: random.Random, now: datetime) -> dict:
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "project_name": f"Project {rng.randint(1, 10**6)}",
+        "project_type": rng.choice(["landing", "web-app", "location-app", "e-commerce", "enterprise", "mobile-app"]),
+        "complexity": rng.choice(["simple", "medium", "complex", "enterprise"]),
+        "features": {"authentication": True, "database": True, "api": rng.random() < 0.5, "maps": rng.random() < 0.3},
+        "team": {"frontend": 1, "backend": 1, "designer": rng.randint(0, 1), "qa": rng.randint(0, 1)},
+        "hourly_rate": 50.0,
+        "estimated_hours": rng.randint(40, 2000),
+        "estimated_weeks": rng.randint(1, 40),
+        "estimated_cost": float(rng.randint(2000, 100000)),
+        "breakdown": {"frontend": 100, "backend": 100, "design": 25, "qa": 25},
+        "timestamp": now - timedelta(seconds=rng.randint(0, 3 * 365 * 86400))
+    }
+
+
+def bench_writes(directory: str, fsync: bool, count: int, estimates: list) -> float:
+    persistence = MemoryPersistence(directory, fsync=fsync, snapshot_every=10**9)
+    persistence.recover(ColumnarEstimateStore())
+    start = time.perf_counter()
+    for estimate in estimates[:count]:
+        persistence.log_create(estimate)
+    elapsed = time.perf_counter() - start
+    persistence.close()
+    return elapsed / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    estimates = [make_estimate(rng, now) for _ in range(count)]
+    # El servidor escribe los snapshots en orden de timestamp (iter_oldest)
+    estimates.sort(key=lambda estimate: (estimate["timestamp"], estimate["id"]))
+    directory = tempfile.mkdtemp(prefix="cv-persistence-")
+    try:
+        persistence = MemoryPersistence(directory)
+        persistence.recover(ColumnarEstimateStore())
+        start = time.perf_counter()
+        persistence.snapshot(estimates)
+        snapshot_seconds = time.perf_counter() - start
+        persistence.close()
+        snapshot_size = os.path.getsize(os.path.join(directory, "snapshot.bin"))
+
+        # Añadir un tramo de log para medir también la reaplicación
+        log_ops = min(WRITE_SAMPLES, count)
+        write_seconds = bench_writes(directory, False, log_ops, estimates)
+
+        start = time.perf_counter()
+        persistence = MemoryPersistence(directory)
+        store = ColumnarEstimateStore()
+        persistence.recover(store)
+        recovery_seconds = time.perf_counter() - start
+        persistence.close()
+
+        fsync_dir = tempfile.mkdtemp(prefix="cv-persistence-fsync-")
+        try:
+            fsync_seconds = bench_writes(fsync_dir, True, FSYNC_SAMPLES, estimates)
+        finally:
+            shutil.rmtree(fsync_dir, ignore_errors=True)
+
+        print(f"Estimates:                 {count:,}")
+        print(f"Snapshot write:            {snapshot_seconds:.2f} s ({snapshot_size / 1024 / 1024:.1f} MiB)")
+        print(f"Recovery (snapshot + {log_ops:,} log ops + index): {recovery_seconds:.2f} s ({len(store):,} estimates)")
+        print(f"Log append per create:     {write_seconds * 1e6:.1f} µs (flush only)")
+        print(f"Log append per create:     {fsync_seconds * 1e6:.1f} µs (fsync)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
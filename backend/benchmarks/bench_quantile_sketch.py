@@ -0,0 +1,57 @@
+# backend/benchmarks/bench_quantile_sketch.py - Precisión, memoria y costo de los sketches KLL
+#
+# Uso (desde backend/): python benchmarks/bench_quantile_sketch.py
+import os
+import random
+import sys
+import time
+from bisect import bisect_left
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantile_sketch import DEFAULT_QUANTILES, KLLSketch, rank_error
+
+VALUES = 1_000_000
+SHARDS = 8
+
+
+def main():
+    rng = random.Random(42)
+    # Costos con cola larga, parecidos a los de las estimaciones reales
+    values = [round(rng.lognormvariate(9.5, 0.8), 2) for _ in range(VALUES)]
+    exact = sorted(values)
+
+    start = time.perf_counter()
+    sketch = KLLSketch(seed=0)
+    for value in values:
+        sketch.update(value)
+    update_seconds = time.perf_counter() - start
+
+    shard_size = VALUES // SHARDS
+    shards = []
+    for i in range(SHARDS):
+        shard = KLLSketch(seed=i)
+        for value in values[i * shard_size:(i + 1) * shard_size]:
+            shard.update(value)
+        shards.append(shard)
+    merged = KLLSketch.merged(shards)
+
+    start = time.perf_counter()
+    sketch.quantiles(DEFAULT_QUANTILES)
+    sketch.histogram(10)
+    query_seconds = time.perf_counter() - start
+
+    print(f"Values:              {VALUES:,}")
+    print(f"Update:              {update_seconds / VALUES * 1e6:.2f} µs/value")
+    print(f"Query (pcts + hist): {query_seconds * 1000:.2f} ms")
+    print(f"Retained values:     {sketch.retained} (merged: {merged.retained})")
+    print(f"Documented bound:    {rank_error():.4f} normalized rank error")
+    for fraction in DEFAULT_QUANTILES:
+        for name, source in (("single", sketch), ("merged", merged)):
+            estimate = source.quantile(fraction)
+            observed = abs(bisect_left(exact, estimate) / VALUES - fraction)
+            print(f"p{fraction * 100:g} {name:<7} {estimate:>12,.2f}  rank error {observed:.4f}")
+
+
+if __name__ == "__main__":
+    main()
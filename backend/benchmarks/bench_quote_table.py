@@ -0,0 +1,55 @@
+# backend/benchmarks/bench_quote_table.py - Benchmark de la tabla de cotizaciones
+#
+# Uso (desde backend/): python benchmarks/bench_quote_table.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from estimation_engine import BASE_HOURS, COMPLEXITY_MULTIPLIERS, FEATURE_HOURS, QuoteTable, estimate_project
+
+QUOTES = 200_000
+
+
+def random_inputs(count: int):
+    rng = random.Random(42)
+    inputs = []
+    for _ in range(count):
+        inputs.append((
+            rng.choice(list(BASE_HOURS)),
+            rng.choice(list(COMPLEXITY_MULTIPLIERS)),
+            {name: bool(rng.getrandbits(1)) for name in FEATURE_HOURS},
+            {"frontend": rng.randint(0, 3), "backend": rng.randint(0, 3), "designer": rng.randint(0, 2), "qa": rng.randint(0, 2)},
+            float(rng.choice([35, 50, 65, 80]))
+        ))
+    return inputs
+
+
+def main():
+    start = time.perf_counter()
+    table = QuoteTable()
+    build_seconds = time.perf_counter() - start
+
+    inputs = random_inputs(QUOTES)
+
+    start = time.perf_counter()
+    for args in inputs:
+        table.quote(*args)
+    table_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for args in inputs:
+        estimate_project(*args)
+    direct_seconds = time.perf_counter() - start
+
+    print(f"Build time:          {build_seconds * 1000:.1f} ms")
+    print(f"Table memory:        {table.nbytes / 1024:.0f} KiB "
+          f"(dev_hours {table.dev_hours.nbytes / 1024:.0f} KiB, breakdown {table.breakdown.nbytes / 1024:.0f} KiB)")
+    print(f"Quote (table):       {table_seconds / QUOTES * 1e6:.2f} µs/quote")
+    print(f"Quote (formula):     {direct_seconds / QUOTES * 1e6:.2f} µs/quote")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# backend/benchmarks/bench_search.py - Latencia de la búsqueda ?q= por trigramas según el tamaño del dataset
+#
+# Uso (desde backend/): python benchmarks/bench_search.py [cantidad máxima]
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_persistence import make_estimate
+from columnar_store import ColumnarEstimateStore
+from datetime import datetime
+from search_index import normalize, search_terms
+
+SIZES = (10_000, 100_000, 1_000_000)
+RUNS = 30
+
+CLIENTS = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Soylent", "Tyrell"]
+PRODUCTS = ["Tienda", "Portal", "App Móvil", "Landing", "Dashboard", "Marketplace", "CRM", "Intranet"]
+SUFFIXES = ["2024", "v2", "Beta", "Relanzamiento", "Interno", "Clientes", ""]
+
+QUERIES = {
+    "rare (client + id)": None,
+    "common word": "tienda",
+    "two terms": "acme portal",
+    "accented": "movil",
+}
+
+
+def make_name(rng: random.Random) -> str:
+    parts = [rng.choice(CLIENTS), rng.choice(PRODUCTS), rng.choice(SUFFIXES), f"#{rng.randint(1, 10**6)}"]
+    return " ".join(part for part in parts if part)
+
+
+def timed(function, runs: int = RUNS) -> list:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    rng = random.Random(3)
+    now = datetime.utcnow()
+    print(f"{'estimates':>10}  {'query':<20} {'p50 ms':>8} {'p99 ms':>8} {'hits':>7} {'scan ms':>8}")
+    for size in (size for size in SIZES if size <= largest):
+        estimates = []
+        for _ in range(size):
+            estimate = make_estimate(rng, now)
+            estimate["project_name"] = make_name(rng)
+            estimates.append(estimate)
+        store = ColumnarEstimateStore()
+        gc.disable()
+        start = time.perf_counter()
+        store.bulk_load(estimates)
+        # El índice de nombres se arma en la primera búsqueda
+        store.search(search_terms(CLIENTS[0]), {}, 0, 1)
+        build_seconds = time.perf_counter() - start
+        gc.enable()
+        names = [estimate["project_name"] for estimate in estimates]
+        QUERIES["rare (client + id)"] = names[size // 2].split("#")[1]
+        print(f"{size:>10,}  load + index build {build_seconds:.1f} s, postings "
+              f"{store._names_index.nbytes / 1024 / 1024:.1f} MiB")
+
+        for label, query in QUERIES.items():
+            terms = search_terms(query)
+            hits = len(store.search(terms, {}, 0, size))
+            samples = timed(lambda: store.search(terms, {}, 0, 20))
+            # Referencia: recorrer todos los nombres sin índice
+            scan = timed(lambda: [name for name in names if all(t in normalize(name) for t in terms)], runs=3)
+            print(f"{'':>10}  {label:<20} {statistics.median(samples) * 1000:8.2f} "
+                  f"{sorted(samples)[int(len(samples) * 0.99) - 1] * 1000:8.2f} {hits:>7,} "
+                  f"{statistics.median(scan) * 1000:8.1f}")
+        del store, estimates, names
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# backend/change_feed.py - Feed de cambios (altas/bajas) para el panel de administración vía SSE
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Optional, Set
+
+from pymongo.errors import OperationFailure
+
+from pagination import SORT_ORDER
+from memory_store import order_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER = 256
+HEARTBEAT_SECONDS = 15.0
+
+# MongoDB standalone (sin replica set) no soporta change streams
+CHANGE_STREAM_UNSUPPORTED = {40573, 303}
+
+
+def sse_frame(event: str, data: bytes, event_id: Optional[int] = None) -> bytes:
+    """Un evento server-sent con `data` ya codificado como JSON (una sola línea)"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode() + data + b"\n\n"
+
+
+class Subscription:
+    """Buffer acotado de un cliente del feed.
+
+    Si el cliente no consume a tiempo y el buffer se llena, se descarta lo
+    pendiente y queda un evento `resync`: la memoria por cliente no pasa de
+    `max_buffer` frames y el cliente sabe que debe recargar.
+    """
+
+    def __init__(self, max_buffer: int, resync_frame: Callable[[], bytes]):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer)
+        self._resync_frame = resync_frame
+        self.dropped = 0
+        self.closed = False
+        self.waiting = False
+        self.last_active = time.monotonic()
+
+    def push(self, frame: bytes):
+        try:
+            self._queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += self._queue.qsize()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(self._resync_frame())
+
+    async def next_frame(self, timeout: float) -> Optional[bytes]:
+        """Siguiente frame, o None si pasó `timeout` sin eventos"""
+        self.waiting = True
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.waiting = False
+            self.last_active = time.monotonic()
+
+
+class ChangeFeedHub:
+    """Pub/sub en proceso: cada publicación se codifica una vez y se copia a los buffers.
+
+    `version_of` da el número de versión de los datos, que va como id de cada
+    evento. Un cliente que lleva más de `idle_timeout` segundos sin pedir
+    frames (desconectado sin que se cerrara su stream, o bloqueado en la red)
+    se da de baja en la siguiente publicación o suscripción.
+    """
+
+    def __init__(self, version_of: Callable[[], int], max_buffer: int = DEFAULT_BUFFER,
+                 max_clients: int = 100, heartbeat: float = HEARTBEAT_SECONDS):
+        self.version_of = version_of
+        self.max_buffer = max_buffer
+        self.max_clients = max_clients
+        self.heartbeat = heartbeat
+        self.idle_timeout = 2 * heartbeat
+        self.subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.subscribers)
+
+    @property
+    def full(self) -> bool:
+        self.prune()
+        return len(self.subscribers) >= self.max_clients
+
+    def subscribe(self) -> Subscription:
+        """Registrar un cliente; ValueError si se alcanzó `max_clients`"""
+        if self.full:
+            raise ValueError(f"Too many change feed clients ({self.max_clients})")
+        subscription = Subscription(self.max_buffer, self.resync_frame)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.closed = True
+        self.subscribers.discard(subscription)
+
+    def prune(self, now: Optional[float] = None):
+        """Dar de baja a los clientes que dejaron de consumir"""
+        now = time.monotonic() if now is None else now
+        idle = [
+            subscription for subscription in self.subscribers
+            if not subscription.waiting and now - subscription.last_active > self.idle_timeout
+        ]
+        for subscription in idle:
+            self.unsubscribe(subscription)
+        self.evicted += len(idle)
+
+    def publish(self, event: str, data: bytes):
+        """Enviar un evento a todos los clientes sin esperar a ninguno"""
+        if not self.subscribers:
+            return
+        self._broadcast(sse_frame(event, data, self.version_of()))
+
+    def resync_frame(self) -> bytes:
+        version = self.version_of()
+        return sse_frame("resync", json.dumps({"version": version}).encode(), version)
+
+    def resync(self):
+        """Pedir a todos los clientes que recarguen (cambios que no se pueden expresar como delta)"""
+        if not self.subscribers:
+            return
+        self._broadcast(self.resync_frame())
+
+    def _broadcast(self, frame: bytes):
+        self.prune()
+        for subscription in self.subscribers:
+            subscription.push(frame)
+        self.published += 1
+
+    async def stream(self, first_frame: Callable[[], bytes]) -> AsyncIterator[bytes]:
+        """Frames de un cliente hasta que se desconecta; un comentario cada `heartbeat` segundos.
+
+        La suscripción se abre al empezar a emitir, y `first_frame` se arma
+        después de suscribirse para no perder eventos.
+        """
+        subscription = self.subscribe()
+        try:
+            yield first_frame()
+            while not subscription.closed:
+                frame = await subscription.next_frame(self.heartbeat)
+                if subscription.closed:
+                    break
+                yield frame if frame is not None else b": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+class RecentKeys:
+    """Conjunto acotado (FIFO) de claves vistas hace poco"""
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self._keys: "OrderedDict" = OrderedDict()
+
+    def add(self, key, value=True):
+        self._keys[key] = value
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._keys.pop(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+
+class MongoChangeWatcher:
+    """Cambios hechos en MongoDB por otras instancias.
+
+    Las escrituras de este proceso se publican desde sus hooks y se anotan con
+    `note_local_*` para no repetirlas. Con replica set se leen del change
+    stream; en un MongoDB standalone se sondea cada `poll_interval` segundos:
+    las altas salen de los documentos posteriores a la última clave vista y
+    las bajas ajenas se detectan porque el conteo no cierra (se pide `resync`).
+    """
+
+    def __init__(self, collection, on_created: Callable[[dict], None], on_deleted: Callable[[str], None],
+                 on_resync: Callable[[], None], poll_interval: float = 5.0):
+        self.collection = collection
+        self.on_created = on_created
+        self.on_deleted = on_deleted
+        self.on_resync = on_resync
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None
+        self._local_ids = RecentKeys()
+        self._local_object_ids = RecentKeys()
+        self._ids_by_object_id = RecentKeys(100_000)
+        self._local_deleted_written = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def note_local_create(self, estimate: dict):
+        self._local_ids.add(estimate["id"])
+
+    def note_local_delete(self, estimate: dict):
+        self._local_ids.add(estimate["id"])
+        if "_id" in estimate:
+            # Solo los documentos que llegaron a escribirse cuentan para el conteo del sondeo
+            self._local_object_ids.add(estimate["_id"])
+            self._local_deleted_written += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                if self.mode == "polling":
+                    await self._poll()
+                else:
+                    await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.mode != "polling" and _change_streams_unsupported(e):
+                    logger.info("Change streams not available, polling MongoDB for the change feed")
+                    self.mode = "polling"
+                    continue
+                logger.warning(f"Change feed watcher failed, retrying: {str(e)[:100]}...")
+                # Lo ocurrido mientras tanto no se puede reconstruir como deltas
+                self.on_resync()
+                await asyncio.sleep(self.poll_interval)
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "delete"]}}}]
+        try:
+            change_stream = self.collection.watch(pipeline)
+        except (AttributeError, TypeError) as e:
+            # Clientes de prueba (mongomock) sin change streams
+            raise NotImplementedError("Change streams not supported by this client") from e
+        async with change_stream as stream:
+            self.mode = "change_stream"
+            async for change in stream:
+                object_id = change["documentKey"]["_id"]
+                if change["operationType"] == "insert":
+                    document = change["fullDocument"]
+                    self._ids_by_object_id.add(object_id, document["id"])
+                    if document["id"] not in self._local_ids:
+                        document.pop("_id", None)
+                        self.on_created(document)
+                elif self._local_object_ids.pop(object_id) is None:
+                    estimate_id = self._ids_by_object_id.pop(object_id)
+                    if estimate_id is None:
+                        # Borrado de un documento anterior al watcher: sin su id no hay delta
+                        self.on_resync()
+                    else:
+                        self.on_deleted(estimate_id)
+
+    async def _poll(self):
+        newest = await self.collection.find({}, {"_id": 0, "id": 1, "timestamp": 1}).sort(SORT_ORDER).limit(1).to_list(length=1)
+        position = order_key(newest[0]) if newest else None
+        count = await self._count_up_to(position)
+        self._local_deleted_written = 0
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                documents = await self.collection.find(_newer_than(position), {"_id": 0}).sort(
+                    [(field, -direction) for field, direction in SORT_ORDER]
+                ).to_list(length=None)
+                newest_position = order_key(documents[-1]) if documents else position
+                # Solo se cuenta hasta la última clave vista: lo que llegue después entra en la próxima vuelta
+                current = await self._count_up_to(newest_position)
+            except Exception as e:
+                logger.warning(f"Change feed poll failed: {str(e)[:100]}...")
+                continue
+            deleted_written, self._local_deleted_written = self._local_deleted_written, 0
+            position = newest_position
+            for document in documents:
+                if document["id"] not in self._local_ids:
+                    self.on_created(document)
+            if current != count + len(documents) - deleted_written:
+                self.on_resync()
+            count = current
+
+    async def _count_up_to(self, position) -> int:
+        if position is None:
+            return 0
+        timestamp, estimate_id = position
+        return await self.collection.count_documents(
+            {"$or": [{"timestamp": {"$lt": timestamp}}, {"timestamp": timestamp, "id": {"$lte": estimate_id}}]}
+        )
+
+
+def _change_streams_unsupported(error: Exception) -> bool:
+    if isinstance(error, NotImplementedError):
+        return True
+    return isinstance(error, OperationFailure) and error.code in CHANGE_STREAM_UNSUPPORTED
+
+
+def _newer_than(position) -> dict:
+    if position is None:
+        return {}
+    timestamp, estimate_id = position
+    return {"$or": [{"timestamp": {"$gt": timestamp}}, {"timestamp": timestamp, "id": {"$gt": estimate_id}}]}
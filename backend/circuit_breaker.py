@@ -0,0 +1,118 @@
+# backend/circuit_breaker.py - Circuit breaker para las operaciones contra MongoDB
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker clásico closed/open/half-open.
+
+    - closed: las operaciones van a MongoDB; `failure_threshold` fallos seguidos abren el circuito.
+    - open: se usa memoria directamente, sin esperar timeouts. Un probe en segundo
+      plano (o la primera request tras `reset_timeout`) prueba la conexión.
+    - half_open: se deja pasar una única operación de prueba; si funciona se
+      cierra el circuito y si falla vuelve a abrirse.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 15.0,
+                 probe: Optional[Callable[[], Awaitable[None]]] = None, probe_interval: float = 5.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.total_failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def allow_request(self) -> bool:
+        """Indicar si una operación puede intentarse contra el backend"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        self._trial_in_flight = False
+        if error is not None:
+            self.last_error = str(error)[:200]
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self):
+        """Abrir el circuito de inmediato"""
+        self.opened_at = time.monotonic()
+        if self.state != OPEN:
+            self.times_opened += 1
+            self._transition(OPEN)
+
+    def _transition(self, state: str):
+        logger.warning(f"Circuit breaker '{self.name}': {self.state} -> {state}")
+        self.state = state
+
+    def start(self):
+        if self.probe is not None and self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            if self.state == CLOSED:
+                continue
+            try:
+                await self.probe()
+                self.record_success()
+            except Exception as e:
+                # El probe no cuenta como trial: reabrir y reiniciar la espera
+                self.last_error = str(e)[:200]
+                self.trip()
+
+    def snapshot(self) -> dict:
+        """Estado actual para exponer por la API"""
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_seconds": self.reset_timeout,
+            "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED and self.opened_at else 0,
+            "total_failures": self.total_failures,
+            "times_opened": self.times_opened,
+            "rejected_requests": self.rejected,
+            "last_error": self.last_error
+        }
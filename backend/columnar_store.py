@@ -0,0 +1,620 @@
+# backend/columnar_store.py - Store en memoria columnar (un registro numpy de ancho fijo por estimación)
+import heapq
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from estimation_engine import BREAKDOWN_SHARES, FEATURE_BITS
+from filters import active_criteria, matches
+from memory_store import SortedKeyList
+from search_index import TrigramIndex, match_score, normalize, rank_key
+from secondary_index import SortedColumnIndex
+from timeutils import parse_timestamp
+
+EPOCH = datetime(1970, 1, 1)
+
+TEAM_ROLES = tuple(role for _, role, _ in BREAKDOWN_SHARES)
+BREAKDOWN_KEYS = tuple(key for key, _, _ in BREAKDOWN_SHARES)
+
+FIELDS = frozenset((
+    'id', 'project_name', 'project_type', 'complexity', 'features', 'team', 'hourly_rate',
+    'estimated_hours', 'estimated_weeks', 'estimated_cost', 'breakdown', 'timestamp'
+))
+
+# 72 bytes por estimación; team y breakdown llevan una máscara de qué claves estaban presentes
+ROW_DTYPE = np.dtype(
+    [
+        ('timestamp', '<i8'),
+        ('hourly_rate', '<f8'),
+        ('estimated_cost', '<f8'),
+        ('estimated_hours', '<i4'),
+        ('estimated_weeks', '<i4')
+    ]
+    + [(f'team_{role}', '<i4') for role in TEAM_ROLES]
+    + [(f'breakdown_{key}', '<i4') for key in BREAKDOWN_KEYS]
+    + [
+        ('team_mask', 'u1'),
+        ('breakdown_mask', 'u1'),
+        ('features_present', '<u2'),
+        ('features', '<u2'),
+        ('project_type', 'u1'),
+        ('complexity', 'u1')
+    ]
+)
+
+ALL_COUNTS_MASK = (1 << len(BREAKDOWN_SHARES)) - 1
+
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+MAX_CODES = 256
+INITIAL_CAPACITY = 1024
+MATERIALIZE_BATCH = 1024
+
+# Columnas numéricas con índice ordenado: columna -> (criterio mínimo, criterio máximo)
+RANGE_COLUMNS = {
+    'estimated_cost': ('min_cost', 'max_cost'),
+    'estimated_hours': ('min_hours', 'max_hours')
+}
+
+
+def to_micros(value: datetime) -> int:
+    """Microsegundos desde epoch de un timestamp UTC sin tzinfo"""
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(micros: int) -> datetime:
+    seconds, micros = divmod(micros, 1_000_000)
+    return EPOCH + timedelta(0, seconds, micros)
+
+
+class ColumnarEstimateStore(MutableMapping):
+    """Mapa id -> estimación guardado en un array numpy de registros de ancho fijo.
+
+    Features como bitmask, tipo y complejidad como códigos de un byte, team,
+    breakdown, horas y costo como columnas numéricas y el timestamp como
+    microsegundos int64. Solo id y project_name quedan como objetos Python.
+    Los dicts se arman al leer, así que cada lectura devuelve un dict nuevo.
+
+    Las estimaciones que no entran en ese formato (claves desconocidas o en
+    otro orden, tipos inesperados, enteros fuera de int32) se guardan tal cual
+    en `_overflow` para no perder fidelidad. El índice (timestamp, id) y la
+    API de paginación son los mismos que los de EstimateMemoryStore.
+
+    Índices secundarios para los filtros: un bitmap por valor de tipo y
+    complejidad, un bitmap por feature activada y un índice ordenado por
+    costo y por horas. Para `search`, un índice de trigramas de project_name.
+    Todos se mantienen en cada alta/baja.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._data = np.zeros(capacity, dtype=ROW_DTYPE)
+        self._ids: List[Optional[str]] = []
+        self._names: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._overflow: Dict[str, dict] = {}
+        self._codes: Dict[str, Dict[str, int]] = {'project_type': {}, 'complexity': {}}
+        self._vocab: Dict[str, List[str]] = {'project_type': [], 'complexity': []}
+        # Dicts de features ya armados por combinación de máscaras (se devuelven copias)
+        self._feature_dicts: Dict[int, Dict[str, bool]] = {}
+        self._index = SortedKeyList()
+        self._live = np.zeros(capacity, dtype=bool)
+        self._value_bitmaps: Dict[str, Dict[int, np.ndarray]] = {'project_type': {}, 'complexity': {}}
+        self._feature_bitmaps = {feature: np.zeros(capacity, dtype=bool) for feature in FEATURE_BITS}
+        self._numeric = {column: SortedColumnIndex(ROW_DTYPE[column]) for column in RANGE_COLUMNS}
+        self._names_index = TrigramIndex()
+        # Tras un bulk_load el índice de nombres se arma recién en la primera búsqueda
+        self._names_index_ready = True
+        self._defer_numeric = False
+
+    # ----------------------------------------
+    # Codificación
+    # ----------------------------------------
+    def _code(self, column: str, value) -> Optional[int]:
+        codes = self._codes[column]
+        code = codes.get(value)
+        if code is None:
+            if type(value) is not str or len(codes) >= MAX_CODES:
+                return None
+            code = codes[value] = len(codes)
+            self._vocab[column].append(value)
+        return code
+
+    def _encode(self, estimate: dict) -> Optional[tuple]:
+        """Registro para ROW_DTYPE, o None si la estimación no entra en el formato fijo"""
+        if estimate.keys() != FIELDS or type(estimate['project_name']) is not str:
+            return None
+        if type(estimate['hourly_rate']) is not float or type(estimate['estimated_cost']) is not float:
+            return None
+
+        # Las claves pueden venir en cualquier orden: al leer salen en el de FEATURE_BITS
+        present = values = 0
+        for name, enabled in estimate['features'].items():
+            bit = FEATURE_BITS.get(name)
+            if bit is None or type(enabled) is not bool:
+                return None
+            present |= bit
+            if enabled:
+                values |= bit
+
+        team = _encode_counts(estimate['team'], TEAM_ROLES)
+        breakdown = _encode_counts(estimate['breakdown'], BREAKDOWN_KEYS)
+        hours, weeks = estimate['estimated_hours'], estimate['estimated_weeks']
+        if team is None or breakdown is None or not (_is_int32(hours) and _is_int32(weeks)):
+            return None
+
+        project_type = self._code('project_type', estimate['project_type'])
+        complexity = self._code('complexity', estimate['complexity'])
+        if project_type is None or complexity is None:
+            return None
+
+        return (
+            to_micros(parse_timestamp(estimate['timestamp'])),
+            estimate['hourly_rate'],
+            estimate['estimated_cost'],
+            hours,
+            weeks,
+            *team[0],
+            *breakdown[0],
+            team[1],
+            breakdown[1],
+            present,
+            values,
+            project_type,
+            complexity
+        )
+
+    def _decode(self, estimate_id: str, name: str, record: tuple) -> dict:
+        (timestamp, hourly_rate, estimated_cost, hours, weeks,
+         tf, tb, td, tq, bf, bb, bd, bq,
+         team_mask, breakdown_mask, present, values, project_type, complexity) = record
+        features = self._feature_dicts.get(present << 16 | values)
+        if features is None:
+            features = self._feature_dicts[present << 16 | values] = {
+                feature: bool(values & bit)
+                for feature, bit in FEATURE_BITS.items() if present & bit
+            }
+        if team_mask == ALL_COUNTS_MASK:
+            team = {'frontend': tf, 'backend': tb, 'designer': td, 'qa': tq}
+        else:
+            team = _decode_counts(TEAM_ROLES, (tf, tb, td, tq), team_mask)
+        if breakdown_mask == ALL_COUNTS_MASK:
+            breakdown = {'frontend': bf, 'backend': bb, 'design': bd, 'qa': bq}
+        else:
+            breakdown = _decode_counts(BREAKDOWN_KEYS, (bf, bb, bd, bq), breakdown_mask)
+        return {
+            'id': estimate_id,
+            'project_name': name,
+            'project_type': self._vocab['project_type'][project_type],
+            'complexity': self._vocab['complexity'][complexity],
+            'features': features.copy(),
+            'team': team,
+            'hourly_rate': hourly_rate,
+            'estimated_hours': hours,
+            'estimated_weeks': weeks,
+            'estimated_cost': estimated_cost,
+            'breakdown': breakdown,
+            'timestamp': from_micros(timestamp)
+        }
+
+    # ----------------------------------------
+    # Filas
+    # ----------------------------------------
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        row = len(self._ids)
+        if row == len(self._data):
+            self._grow(max(INITIAL_CAPACITY, 2 * len(self._data)))
+        self._ids.append(None)
+        self._names.append(None)
+        return row
+
+    def _grow(self, capacity: int):
+        self._data = np.resize(self._data, capacity)
+        self._live = _resized(self._live, capacity)
+        for bitmaps in self._value_bitmaps.values():
+            for code in bitmaps:
+                bitmaps[code] = _resized(bitmaps[code], capacity)
+        for feature in self._feature_bitmaps:
+            self._feature_bitmaps[feature] = _resized(self._feature_bitmaps[feature], capacity)
+
+    def _value_bitmap(self, column: str, code: int) -> np.ndarray:
+        bitmap = self._value_bitmaps[column].get(code)
+        if bitmap is None:
+            bitmap = self._value_bitmaps[column][code] = np.zeros(len(self._data), dtype=bool)
+        return bitmap
+
+    def _index_row(self, row: int, record: tuple, name: str):
+        *_, present, values, project_type, complexity = record
+        self._live[row] = True
+        if self._names_index_ready:
+            self._names_index.add(row, name)
+        self._value_bitmap('project_type', project_type)[row] = True
+        self._value_bitmap('complexity', complexity)[row] = True
+        for feature, bit in FEATURE_BITS.items():
+            if values & bit:
+                self._feature_bitmaps[feature][row] = True
+        if not self._defer_numeric:
+            for column, index in self._numeric.items():
+                index.add(row, record[ROW_DTYPE.names.index(column)])
+
+    def _unindex_row(self, row: int):
+        record = self._data[row]
+        self._live[row] = False
+        self._value_bitmaps['project_type'][int(record['project_type'])][row] = False
+        self._value_bitmaps['complexity'][int(record['complexity'])][row] = False
+        for bitmap in self._feature_bitmaps.values():
+            bitmap[row] = False
+        for column, index in self._numeric.items():
+            index.discard()
+            if index.needs_rebuild:
+                self._rebuild_numeric(column)
+        if self._names_index_ready:
+            self._names_index.discard(self._names[row])
+            if self._names_index.needs_rebuild:
+                self._rebuild_names_index()
+
+    def _rebuild_numeric(self, column: str):
+        rows = np.flatnonzero(self._live[:len(self._ids)])
+        self._numeric[column].rebuild(rows, self._data[column][rows])
+
+    def _rebuild_names_index(self):
+        live = np.flatnonzero(self._live[:len(self._ids)]).tolist()
+        self._names_index.rebuild((row, self._names[row]) for row in live)
+        self._names_index_ready = True
+
+    def _store(self, estimate_id: str, estimate: dict) -> int:
+        """Guardar sin tocar el índice; devuelve el timestamp en microsegundos"""
+        record = self._encode(estimate)
+        if record is None:
+            self._overflow[estimate_id] = estimate
+            return to_micros(parse_timestamp(estimate['timestamp']))
+        row = self._allocate()
+        self._data[row] = record
+        self._ids[row] = estimate_id
+        self._names[row] = estimate['project_name']
+        self._rows[estimate_id] = row
+        self._index_row(row, record, estimate['project_name'])
+        return record[0]
+
+    def _forget(self, estimate_id: str):
+        """Liberar la fila (o la entrada de overflow) sin tocar el índice"""
+        row = self._rows.pop(estimate_id, None)
+        if row is None:
+            del self._overflow[estimate_id]
+        else:
+            self._unindex_row(row)
+            self._ids[row] = None
+            self._names[row] = None
+            self._free.append(row)
+
+    def _micros_of(self, estimate_id: str) -> int:
+        row = self._rows.get(estimate_id)
+        if row is None:
+            return to_micros(parse_timestamp(self._overflow[estimate_id]['timestamp']))
+        return int(self._data['timestamp'][row])
+
+    def _materialize(self, estimate_ids: List[str]) -> List[dict]:
+        """Armar los dicts de varias estimaciones con un solo acceso al array"""
+        rows = [self._rows.get(estimate_id) for estimate_id in estimate_ids]
+        records = iter(self._data[[row for row in rows if row is not None]].tolist())
+        result = []
+        for estimate_id, row in zip(estimate_ids, rows):
+            if row is None:
+                result.append(self._overflow[estimate_id])
+            else:
+                result.append(self._decode(estimate_id, self._names[row], next(records)))
+        return result
+
+    # ----------------------------------------
+    # Interfaz de mapping
+    # ----------------------------------------
+    def __getitem__(self, estimate_id: str) -> dict:
+        row = self._rows.get(estimate_id)
+        if row is None:
+            return self._overflow[estimate_id]
+        return self._decode(estimate_id, self._names[row], self._data[row].item())
+
+    def __setitem__(self, estimate_id: str, estimate: dict):
+        if estimate_id in self:
+            del self[estimate_id]
+        self._index.add((self._store(estimate_id, estimate), estimate_id))
+
+    def __delitem__(self, estimate_id: str):
+        key = (self._micros_of(estimate_id), estimate_id)
+        self._forget(estimate_id)
+        self._index.remove(key)
+
+    def __contains__(self, estimate_id) -> bool:
+        return estimate_id in self._rows or estimate_id in self._overflow
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._rows
+        yield from self._overflow
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._overflow)
+
+    def values(self) -> Iterator[dict]:
+        """Todas las estimaciones en orden de almacenamiento, armadas por lotes"""
+        ids = list(self)
+        for start in range(0, len(ids), MATERIALIZE_BATCH):
+            yield from self._materialize(ids[start:start + MATERIALIZE_BATCH])
+
+    def bulk_load(self, estimates: Iterable[dict]):
+        """Cargar muchas estimaciones de una vez ordenando el índice una sola vez"""
+        keys = [(micros, estimate_id) for micros, estimate_id in self._index]
+        # Los índices numéricos se arman de una vez al final en lugar de fila por fila,
+        # y el de nombres cuando llegue la primera búsqueda (no demora el arranque)
+        self._defer_numeric = True
+        self._names_index_ready = False
+        try:
+            for estimate in estimates:
+                estimate_id = estimate['id']
+                if estimate_id in self:
+                    keys.remove((self._micros_of(estimate_id), estimate_id))
+                    self._forget(estimate_id)
+                keys.append((self._store(estimate_id, estimate), estimate_id))
+        finally:
+            self._defer_numeric = False
+            for column in self._numeric:
+                self._rebuild_numeric(column)
+        keys.sort()
+        self._index = SortedKeyList.from_sorted(keys)
+
+    # ----------------------------------------
+    # Recorridos ordenados y páginas
+    # ----------------------------------------
+    def _iter_keys(self, keys: Iterator[Tuple[int, str]]) -> Iterator[dict]:
+        batch = []
+        for _, estimate_id in keys:
+            batch.append(estimate_id)
+            if len(batch) == MATERIALIZE_BATCH:
+                yield from self._materialize(batch)
+                batch = []
+        if batch:
+            yield from self._materialize(batch)
+
+    def iter_oldest(self) -> Iterator[dict]:
+        """Estimaciones de la más antigua a la más reciente"""
+        return self._iter_keys(iter(self._index))
+
+    def detached_oldest(self) -> Iterator[dict]:
+        """Copia del contenido actual y un iterador perezoso de sus estimaciones (de la más antigua a la más reciente).
+
+        La copia es de arrays, listas y dicts, sin armar ninguna estimación,
+        así que es barata; el iterador arma las estimaciones por lotes sin leer
+        el store vivo y puede consumirse en otro hilo mientras este sigue cambiando.
+        """
+        frozen = object.__new__(ColumnarEstimateStore)
+        frozen._data = self._data[:len(self._ids)].copy()
+        frozen._names = list(self._names)
+        frozen._rows = dict(self._rows)
+        frozen._overflow = dict(self._overflow)
+        frozen._vocab = {column: list(values) for column, values in self._vocab.items()}
+        frozen._feature_dicts = dict(self._feature_dicts)
+        keys = list(self._index)
+        return frozen._iter_keys(iter(keys))
+
+    def iter_newest(self, skip: int = 0) -> Iterator[dict]:
+        """Estimaciones de la más reciente a la más antigua"""
+        return self._iter_keys(self._index.iter_desc(skip))
+
+    def page(self, skip: int = 0, limit: int = 100) -> List[dict]:
+        """Página de estimaciones ordenadas por timestamp descendente"""
+        return self._materialize(self.page_ids(skip, limit))
+
+    def page_after(self, key: Tuple[datetime, str], limit: int = 100) -> List[dict]:
+        """Página de estimaciones estrictamente anteriores a la clave (timestamp, id)"""
+        return self._materialize(self.page_ids_after(key, limit))
+
+    def page_ids(self, skip: int = 0, limit: int = 100) -> List[str]:
+        """Ids de `page`, sin armar los dicts"""
+        return self._page_ids(self._index.iter_desc(skip), limit)
+
+    def page_ids_after(self, key: Tuple[datetime, str], limit: int = 100) -> List[str]:
+        """Ids de `page_after`, sin armar los dicts"""
+        timestamp, estimate_id = key
+        return self._page_ids(self._index.iter_desc_before((to_micros(timestamp), estimate_id)), limit)
+
+    def _page_ids(self, keys: Iterator[Tuple[int, str]], limit: int) -> List[str]:
+        ids = []
+        if limit <= 0:
+            return ids
+        for _, estimate_id in keys:
+            ids.append(estimate_id)
+            if len(ids) >= limit:
+                break
+        return ids
+
+    def get_many(self, estimate_ids: List[str]) -> List[dict]:
+        """Estimaciones de varios ids existentes, en el mismo orden"""
+        return self._materialize(estimate_ids)
+
+    def key_of(self, estimate_id: str) -> Tuple[datetime, str]:
+        """Clave (timestamp, id) de una estimación, la misma que usa `order_key`"""
+        return from_micros(self._micros_of(estimate_id)), estimate_id
+
+    # ----------------------------------------
+    # Filtros servidos por índices secundarios
+    # ----------------------------------------
+    def _matching_rows(self, criteria: dict) -> np.ndarray:
+        """Filas que cumplen el filtro: intersección de bitmaps y rangos de los índices ordenados"""
+        count = len(self._ids)
+        empty = np.empty(0, dtype=np.int64)
+        mask = None
+
+        bitmaps = []
+        for column in ('project_type', 'complexity'):
+            if column in criteria:
+                code = self._codes[column].get(criteria[column])
+                if code is None or code not in self._value_bitmaps[column]:
+                    return empty
+                bitmaps.append(self._value_bitmaps[column][code])
+        for feature in criteria.get('features', []):
+            if feature not in self._feature_bitmaps:
+                return empty
+            bitmaps.append(self._feature_bitmaps[feature])
+        for bitmap in bitmaps:
+            if mask is None:
+                mask = bitmap[:count].copy()
+            else:
+                np.logical_and(mask, bitmap[:count], out=mask)
+
+        rows = None
+        for column, (low_name, high_name) in RANGE_COLUMNS.items():
+            low, high = criteria.get(low_name), criteria.get(high_name)
+            if low is None and high is None:
+                continue
+            candidates = np.unique(self._numeric[column].range(low, high))
+            candidates = candidates[self._live[candidates]]
+            # Descartar entradas obsoletas: la fila pudo reutilizarse con otro valor
+            current = self._data[column][candidates]
+            keep = np.ones(len(candidates), dtype=bool)
+            if low is not None:
+                keep &= current >= low
+            if high is not None:
+                keep &= current <= high
+            candidates = candidates[keep]
+            rows = candidates if rows is None else np.intersect1d(rows, candidates, assume_unique=True)
+
+        if rows is None:
+            rows = np.flatnonzero(mask if mask is not None else self._live[:count])
+        elif mask is not None:
+            rows = rows[mask[rows]]
+
+        created_after, created_before = criteria.get('created_after'), criteria.get('created_before')
+        if created_after is not None or created_before is not None:
+            timestamps = self._data['timestamp'][rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if created_after is not None:
+                keep &= timestamps >= to_micros(parse_timestamp(created_after))
+            if created_before is not None:
+                keep &= timestamps < to_micros(parse_timestamp(created_before))
+            rows = rows[keep]
+        return rows
+
+    def _matching_overflow(self, criteria: dict) -> List[str]:
+        return [
+            estimate_id for estimate_id, estimate in self._overflow.items()
+            if matches(estimate, **criteria)
+        ]
+
+    def filtered_ids(self, criteria: dict) -> List[str]:
+        """Ids de todas las estimaciones que cumplen el filtro (sin orden)"""
+        criteria = active_criteria(criteria)
+        rows = self._matching_rows(criteria)
+        return [self._ids[row] for row in rows.tolist()] + self._matching_overflow(criteria)
+
+    def filtered_page(self, criteria: dict, skip: int = 0, limit: int = 100,
+                      after: Optional[Tuple[datetime, str]] = None) -> List[dict]:
+        """Página filtrada en el orden (timestamp, id) descendente de `page`/`page_after`"""
+        return self._materialize(self.filtered_page_ids(criteria, skip, limit, after))
+
+    def filtered_page_ids(self, criteria: dict, skip: int = 0, limit: int = 100,
+                          after: Optional[Tuple[datetime, str]] = None) -> List[str]:
+        """Ids de `filtered_page`, sin armar los dicts
+
+        Solo se ordenan las filas que pueden caer en la página: con una
+        partición se descartan las que están por debajo del timestamp número
+        skip + limit. Como en `page_ids_after`, con `after` no se acepta `skip`.
+        """
+        if after is not None and skip:
+            raise ValueError("skip cannot be combined with an after cursor")
+        criteria = active_criteria(criteria)
+        if limit <= 0:
+            return []
+        rows = self._matching_rows(criteria)
+        timestamps = self._data['timestamp'][rows]
+        keys = []
+        after_key = None if after is None else (to_micros(after[0]), after[1])
+
+        if after_key is not None:
+            keep = timestamps < after_key[0]
+            for i in np.flatnonzero(timestamps == after_key[0]).tolist():
+                keep[i] = self._ids[rows[i]] < after_key[1]
+            rows, timestamps = rows[keep], timestamps[keep]
+
+        needed = skip + limit
+        if len(rows) > needed:
+            threshold = np.partition(timestamps, len(timestamps) - needed)[len(timestamps) - needed]
+            keep = timestamps >= threshold
+            rows, timestamps = rows[keep], timestamps[keep]
+        keys.extend(zip(timestamps.tolist(), [self._ids[row] for row in rows.tolist()]))
+
+        for estimate_id in self._matching_overflow(criteria):
+            key = (to_micros(parse_timestamp(self._overflow[estimate_id]['timestamp'])), estimate_id)
+            if after_key is None or key < after_key:
+                keys.append(key)
+
+        keys.sort(reverse=True)
+        return [estimate_id for _, estimate_id in keys[skip:needed]]
+
+    def search(self, terms: List[str], criteria: dict, skip: int = 0, limit: int = 100) -> List[dict]:
+        """Estimaciones cuyo project_name contiene todos los términos, ordenadas por relevancia
+
+        Los candidatos salen del índice de trigramas (y de los filtros, si hay) y
+        se verifican contra el nombre normalizado antes de puntuarlos.
+        """
+        criteria = active_criteria(criteria)
+        if limit <= 0:
+            return []
+        if not self._names_index_ready:
+            self._rebuild_names_index()
+        rows = self._names_index.candidates(terms).astype(np.int64)
+        rows = rows[self._live[rows]]
+        if criteria:
+            rows = np.intersect1d(rows, self._matching_rows(criteria), assume_unique=True)
+
+        query = " ".join(terms)
+        names = self._names_index.names
+        ranked = []
+        for row, timestamp in zip(rows.tolist(), self._data['timestamp'][rows].tolist()):
+            name = names[row]
+            score = match_score(terms, query, name)
+            if score is not None:
+                ranked.append((rank_key(query, name, score, timestamp), self._ids[row]))
+        for estimate_id in self._matching_overflow(criteria):
+            estimate = self._overflow[estimate_id]
+            name = normalize(str(estimate['project_name']))
+            score = match_score(terms, query, name)
+            if score is not None:
+                timestamp = to_micros(parse_timestamp(estimate['timestamp']))
+                ranked.append((rank_key(query, name, score, timestamp), estimate_id))
+
+        # Solo hace falta ordenar la página pedida, no todas las coincidencias
+        top = heapq.nlargest(skip + limit, ranked)
+        return self._materialize([estimate_id for _, estimate_id in top[skip:]])
+
+
+def _resized(bitmap: np.ndarray, capacity: int) -> np.ndarray:
+    resized = np.zeros(capacity, dtype=bitmap.dtype)
+    resized[:len(bitmap)] = bitmap
+    return resized
+
+
+def _is_int32(value) -> bool:
+    return type(value) is int and INT32_MIN <= value <= INT32_MAX
+
+
+def _encode_counts(counts: dict, keys: Tuple[str, ...]) -> Optional[Tuple[list, int]]:
+    """Valores en el orden de `keys` y máscara de presencia; None si no respeta ese orden"""
+    values = [0] * len(keys)
+    mask = 0
+    position = 0
+    for key, value in counts.items():
+        while position < len(keys) and keys[position] != key:
+            position += 1
+        if position == len(keys) or not _is_int32(value):
+            return None
+        values[position] = value
+        mask |= 1 << position
+        position += 1
+    return values, mask
+
+
+def _decode_counts(keys: Tuple[str, ...], values: tuple, mask: int) -> Dict[str, int]:
+    return {key: value for i, (key, value) in enumerate(zip(keys, values)) if mask & (1 << i)}
@@ -0,0 +1,42 @@
+# backend/data_version.py - Contador de versión de los datos para ETags y GET condicionales
+import time
+import uuid
+from typing import Optional
+
+
+class DataVersion:
+    """Número monotónico que sube con cada alta o baja de estimaciones.
+
+    Las ETags llevan además un id de esta instancia del proceso (el contador
+    arranca de cero en cada arranque y cada instancia tiene el suyo) y el
+    alcance de la lectura, así que dos respuestas distintas nunca comparten
+    ETag. Con `max_age` la ETag incluye también la ventana de tiempo actual:
+    sirve para lo que otras instancias escriben sin pasar por este contador.
+    """
+
+    def __init__(self):
+        self.instance = uuid.uuid4().hex[:8]
+        self.value = 0
+
+    def bump(self):
+        self.value += 1
+
+    def etag(self, *scope: str, version: Optional[int] = None, max_age: Optional[float] = None) -> str:
+        """ETag de la versión actual (o de `version`, leída antes de consultar los datos)"""
+        parts = [self.instance, str(self.value if version is None else version), *scope]
+        if max_age:
+            parts.append(str(int(time.time() // max_age)))
+        return '"' + "-".join(parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Indicar si la cabecera If-None-Match incluye la ETag (comparación débil)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
@@ -0,0 +1,105 @@
+# backend/detail_cache.py - Cache read-through con TTL para GET /estimates/{id} sobre MongoDB
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Costo aproximado de una entrada además de los bytes del JSON (clave, tupla, nodo del dict)
+ENTRY_OVERHEAD = 200
+
+# Resultado de `get` cuando hay que ir a MongoDB
+MISS = object()
+
+
+class DetailCache:
+    """LRU acotado en bytes de id -> JSON de la estimación (o "no existe").
+
+    Las estimaciones no cambian, pero otra instancia puede borrarlas: cada
+    entrada vence a los `ttl` segundos de haberse leído o escrito, así que
+    una respuesta nunca está desactualizada más que eso. Los ids inexistentes
+    se recuerdan `negative_ttl` segundos para no repetir la consulta.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float = 5.0, negative_ttl: float = 1.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[bytes], float]]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, estimate_id: str, now: Optional[float] = None):
+        """JSON en cache, None si se sabe que no existe, o MISS"""
+        entry = self._entries.get(estimate_id)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        fragment, expires_at = entry
+        if (time.monotonic() if now is None else now) >= expires_at:
+            self._remove(estimate_id)
+            self.expirations += 1
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(estimate_id)
+        if fragment is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return fragment
+
+    def put(self, estimate_id: str, fragment: bytes, now: Optional[float] = None):
+        self._set(estimate_id, fragment, (time.monotonic() if now is None else now) + self.ttl)
+
+    def put_missing(self, estimate_id: str, now: Optional[float] = None):
+        """Recordar que el id no existe en MongoDB"""
+        self._set(estimate_id, None, (time.monotonic() if now is None else now) + self.negative_ttl)
+
+    def discard(self, estimate_id: str):
+        if estimate_id in self._entries:
+            self._remove(estimate_id)
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else None
+        }
+
+    def _set(self, estimate_id: str, fragment: Optional[bytes], expires_at: float):
+        self.discard(estimate_id)
+        size = _entry_size(fragment)
+        if size > self.max_bytes:
+            return
+        self._entries[estimate_id] = (fragment, expires_at)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            evicted_id, _ = next(iter(self._entries.items()))
+            self._remove(evicted_id)
+            self.evictions += 1
+
+    def _remove(self, estimate_id: str):
+        fragment, _ = self._entries.pop(estimate_id)
+        self.nbytes -= _entry_size(fragment)
+
+
+def _entry_size(fragment: Optional[bytes]) -> int:
+    return ENTRY_OVERHEAD + (len(fragment) if fragment is not None else 0)
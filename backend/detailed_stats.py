@@ -0,0 +1,142 @@
+# backend/detailed_stats.py - Estadísticas detalladas: pipeline $facet de MongoDB y cálculo en memoria
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from rollups import TimeBucketRollups
+
+TEAM_ROLES = ('frontend', 'backend', 'designer', 'qa')
+
+_ONE_DAY = timedelta(days=1)
+
+MONTHS_WINDOW = 6
+TOP_FEATURES = 10
+
+
+def recent_months(now: Optional[datetime] = None, months: int = MONTHS_WINDOW) -> List[datetime]:
+    """Inicio de los últimos `months` meses de calendario, del actual hacia atrás"""
+    current = (now or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    starts = []
+    for _ in range(months):
+        starts.append(current)
+        current = (current - _ONE_DAY).replace(day=1)
+    return starts
+
+
+def empty_detailed_stats() -> dict:
+    return {
+        "basic_stats": {
+            "total_estimates": 0,
+            "total_cost": 0,
+            "total_hours": 0
+        },
+        "project_types": {},
+        "complexity_distribution": {},
+        "monthly_stats": {},
+        "team_composition": {},
+        "most_used_features": {}
+    }
+
+
+def monthly_stats(rollups: TimeBucketRollups, now: Optional[datetime] = None) -> Dict[str, dict]:
+    """Últimos meses de calendario (del actual hacia atrás) leídos de los rollups"""
+    months = recent_months(now)
+    series = rollups.series(months[-1], months[0], "month")
+    return {
+        row["bucket"][:7]: {"count": row["count"], "total_cost": row["total_cost"], "total_hours": row["total_hours"]}
+        for row in reversed(series)
+    }
+
+
+def build_detailed_stats(count: int, total_cost: float, total_hours: int, project_types: Dict[str, int],
+                         complexity: Dict[str, int], team: Dict[str, int], features: Dict[str, int],
+                         monthly: Dict[str, dict]) -> dict:
+    """Dar el formato de respuesta común a ambos backends (orden de claves determinista)"""
+    if count == 0:
+        return empty_detailed_stats()
+
+    return {
+        "basic_stats": {
+            "total_estimates": count,
+            "total_cost": round(total_cost, 2),
+            "total_hours": total_hours,
+            "avg_cost": round(total_cost / count, 2),
+            "avg_hours": round(total_hours / count, 1)
+        },
+        "project_types": dict(sorted(project_types.items())),
+        "complexity_distribution": dict(sorted(complexity.items())),
+        "monthly_stats": monthly,
+        "team_composition": {role: team.get(role, 0) for role in TEAM_ROLES},
+        "most_used_features": dict(sorted(features.items(), key=lambda x: (-x[1], x[0]))[:TOP_FEATURES])
+    }
+
+
+def compute_detailed_stats(estimates: Iterable[dict], monthly: Dict[str, dict]) -> dict:
+    """Cálculo en una sola pasada sobre las estimaciones en memoria"""
+    count = 0
+    total_cost = 0.0
+    total_hours = 0
+    project_types: Dict[str, int] = {}
+    complexity: Dict[str, int] = {}
+    team = {role: 0 for role in TEAM_ROLES}
+    features: Dict[str, int] = {}
+
+    for est in estimates:
+        count += 1
+        total_cost += est['estimated_cost']
+        total_hours += est['estimated_hours']
+        project_types[est['project_type']] = project_types.get(est['project_type'], 0) + 1
+        complexity[est['complexity']] = complexity.get(est['complexity'], 0) + 1
+
+        for role, members in est.get('team', {}).items():
+            if role in team:
+                team[role] += members
+
+        for feature, enabled in est.get('features', {}).items():
+            if enabled:
+                features[feature] = features.get(feature, 0) + 1
+
+    return build_detailed_stats(count, total_cost, total_hours, project_types, complexity, team, features, monthly)
+
+
+def detailed_stats_pipeline() -> List[dict]:
+    """Pipeline de agregación que calcula todas las secciones en una sola consulta"""
+    return [{
+        "$facet": {
+            "basic": [
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "total_cost": {"$sum": "$estimated_cost"},
+                    "total_hours": {"$sum": "$estimated_hours"},
+                    **{role: {"$sum": f"$team.{role}"} for role in TEAM_ROLES}
+                }}
+            ],
+            "project_types": [
+                {"$group": {"_id": "$project_type", "count": {"$sum": 1}}}
+            ],
+            "complexity": [
+                {"$group": {"_id": "$complexity", "count": {"$sum": 1}}}
+            ],
+            "features": [
+                {"$project": {"feature": {"$objectToArray": "$features"}}},
+                {"$unwind": "$feature"},
+                {"$match": {"feature.v": True}},
+                {"$group": {"_id": "$feature.k", "count": {"$sum": 1}}}
+            ]
+        }
+    }]
+
+
+def finalize_facet(result: dict, monthly: Dict[str, dict]) -> dict:
+    """Convertir el documento devuelto por el $facet al formato de respuesta"""
+    basic = result["basic"][0] if result.get("basic") else {}
+    return build_detailed_stats(
+        basic.get("count", 0),
+        basic.get("total_cost", 0),
+        basic.get("total_hours", 0),
+        {row["_id"]: row["count"] for row in result.get("project_types", [])},
+        {row["_id"]: row["count"] for row in result.get("complexity", [])},
+        {role: basic.get(role, 0) for role in TEAM_ROLES},
+        {row["_id"]: row["count"] for row in result.get("features", [])},
+        monthly
+    )
@@ -0,0 +1,228 @@
+# backend/estimation_engine.py - Motor de estimación (port de calculateEstimates del frontend)
+import math
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Mismos valores que frontend/src/components/ProjectEstimator.js
+BASE_HOURS = {
+    'landing': 40,
+    'web-app': 180,
+    'location-app': 220,
+    'e-commerce': 300,
+    'enterprise': 500,
+    'mobile-app': 350
+}
+
+COMPLEXITY_MULTIPLIERS = {
+    'simple': 0.7,
+    'medium': 1.0,
+    'complex': 1.5,
+    'enterprise': 2.0
+}
+
+# El orden define el bit de cada feature en las máscaras
+FEATURE_HOURS = {
+    'authentication': 32,
+    'database': 28,
+    'api': 36,
+    'responsive': 16,
+    'realtime': 48,
+    'payments': 64,
+    'maps': 32,
+    'cms': 80,
+    'search': 16,
+    'deployment': 24,
+    'cors': 8,
+    'docker': 16
+}
+
+FEATURE_BITS = {name: 1 << i for i, name in enumerate(FEATURE_HOURS)}
+
+# (clave del breakdown, rol del equipo, proporción de las horas de desarrollo)
+BREAKDOWN_SHARES = (
+    ('frontend', 'frontend', 0.4),
+    ('backend', 'backend', 0.4),
+    ('design', 'designer', 0.1),
+    ('qa', 'qa', 0.1)
+)
+
+HOURS_PER_WEEK = 40
+
+MAX_SWEEP_SCENARIOS = 250_000
+
+
+def js_round(value: float) -> int:
+    """Math.round de JavaScript (los empates redondean hacia +infinito)"""
+    floor = math.floor(value)
+    return int(floor + (value - floor >= 0.5))
+
+
+def _js_round_array(values: np.ndarray) -> np.ndarray:
+    floor = np.floor(values)
+    return (floor + (values - floor >= 0.5)).astype(np.int64)
+
+
+def _check_known(values: Iterable[str], table: dict, label: str):
+    unknown = [value for value in values if value not in table]
+    if unknown:
+        raise ValueError(f"Unknown {label}: {', '.join(unknown)}")
+
+
+def _enabled(features: Dict[str, bool]) -> List[str]:
+    return [name for name, enabled in features.items() if enabled]
+
+
+def _validate(project_type: str, complexity: str, features: Dict[str, bool]):
+    _check_known([project_type], BASE_HOURS, "project type")
+    _check_known([complexity], COMPLEXITY_MULTIPLIERS, "complexity")
+    _check_known(_enabled(features), FEATURE_HOURS, "features")
+
+
+def features_hours(features: Dict[str, bool]) -> int:
+    """Horas adicionales de las features activas"""
+    return sum(FEATURE_HOURS[name] for name in _enabled(features))
+
+
+def dev_hours(project_type: str, complexity: str, features: Dict[str, bool]) -> float:
+    """Horas de desarrollo antes de aplicar el equipo"""
+    _validate(project_type, complexity, features)
+    return (BASE_HOURS[project_type] + features_hours(features)) * COMPLEXITY_MULTIPLIERS[complexity]
+
+
+def estimate_project(project_type: str, complexity: str, features: Dict[str, bool],
+                     team: Dict[str, int], hourly_rate: float) -> dict:
+    """Estimación de un proyecto, idéntica a calculateEstimates del frontend"""
+    total_dev_hours = dev_hours(project_type, complexity, features)
+    breakdown = {key: js_round(total_dev_hours * share) for key, _, share in BREAKDOWN_SHARES}
+    hours = sum(breakdown[key] * team.get(role, 0) for key, role, _ in BREAKDOWN_SHARES)
+    team_size = max(sum(team.values()), 1)
+    return {
+        "hours": hours,
+        "weeks": math.ceil(hours / (HOURS_PER_WEEK * team_size)),
+        "cost": hours * hourly_rate,
+        "breakdown": breakdown
+    }
+
+
+def estimate_sweep(project_types: List[str], complexities: List[str], feature_sets: List[Dict[str, bool]],
+                   teams: List[Dict[str, int]], hourly_rates: List[float]) -> dict:
+    """Evaluar la grilla completa tipos × complejidades × features × equipos × tarifas.
+
+    Cada eje es un vector y el cálculo se hace por broadcasting de NumPy, sin
+    bucles de Python por escenario. Los resultados se devuelven aplanados en
+    orden C sobre los ejes en el orden de los parámetros.
+    """
+    _check_known(project_types, BASE_HOURS, "project type")
+    _check_known(complexities, COMPLEXITY_MULTIPLIERS, "complexity")
+    for features in feature_sets:
+        _check_known(_enabled(features), FEATURE_HOURS, "features")
+
+    shape = (len(project_types), len(complexities), len(feature_sets), len(teams), len(hourly_rates))
+    count = math.prod(shape)
+    if count > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"Too many scenarios: {count} (max {MAX_SWEEP_SCENARIOS})")
+
+    base = np.array([BASE_HOURS[t] for t in project_types], dtype=np.float64)
+    multipliers = np.array([COMPLEXITY_MULTIPLIERS[c] for c in complexities], dtype=np.float64)
+    extra = np.array([features_hours(f) for f in feature_sets], dtype=np.float64)
+    team_matrix = np.array([[team.get(role, 0) for _, role, _ in BREAKDOWN_SHARES] for team in teams],
+                           dtype=np.int64).reshape(len(teams), len(BREAKDOWN_SHARES))
+    team_sizes = np.maximum(np.array([sum(team.values()) for team in teams], dtype=np.int64), 1)
+    rates = np.array(hourly_rates, dtype=np.float64)
+
+    # (T, C, F): mismo orden de operaciones que en JS para obtener los mismos floats
+    total_dev_hours = (base[:, None, None] + extra[None, None, :]) * multipliers[None, :, None]
+    # (T, C, F, 4)
+    breakdown = np.stack([_js_round_array(total_dev_hours * share) for _, _, share in BREAKDOWN_SHARES], axis=-1)
+    # (T, C, F, M)
+    hours = breakdown @ team_matrix.T
+    weeks = np.ceil(hours / (HOURS_PER_WEEK * team_sizes)).astype(np.int64)
+    # (T, C, F, M, R)
+    cost = hours[..., None] * rates
+    hours_full = np.broadcast_to(hours[..., None], shape)
+    weeks_full = np.broadcast_to(weeks[..., None], shape)
+
+    return {
+        "shape": list(shape),
+        "axes": ["project_types", "complexities", "feature_sets", "teams", "hourly_rates"],
+        "count": count,
+        "hours": hours_full.ravel().tolist(),
+        "weeks": weeks_full.ravel().tolist(),
+        "cost": cost.ravel().tolist(),
+        # El breakdown solo depende de (tipo, complejidad, features)
+        "breakdown": {key: breakdown[..., i].ravel().tolist() for i, (key, _, _) in enumerate(BREAKDOWN_SHARES)},
+        "summary": _summary(hours, cost) if count else {}
+    }
+
+
+def _summary(hours: np.ndarray, cost: np.ndarray) -> dict:
+    return {
+        "hours": {"min": int(hours.min()), "max": int(hours.max()), "mean": float(hours.mean())},
+        "cost": {"min": float(cost.min()), "max": float(cost.max()), "mean": float(cost.mean())}
+    }
+
+
+def feature_mask(features: Dict[str, bool]) -> int:
+    """Máscara de bits de las features activas (bit i = i-ésima de FEATURE_HOURS)"""
+    mask = 0
+    for name in _enabled(features):
+        mask |= FEATURE_BITS[name]
+    return mask
+
+
+class QuoteTable:
+    """Tabla precalculada de horas para todas las combinaciones (tipo, complejidad, features).
+
+    El espacio de entrada es fijo (6 × 4 × 2^12), así que se calculan una sola vez
+    las horas de desarrollo y su breakdown redondeado; una cotización queda en
+    una búsqueda en la tabla más la ponderación lineal por equipo y tarifa.
+    """
+
+    def __init__(self):
+        self.type_index = {name: i for i, name in enumerate(BASE_HOURS)}
+        self.complexity_index = {name: i for i, name in enumerate(COMPLEXITY_MULTIPLIERS)}
+
+        masks = np.arange(1 << len(FEATURE_HOURS), dtype=np.int64)
+        bits = (masks[:, None] >> np.arange(len(FEATURE_HOURS))) & 1
+        extra = (bits @ np.array(list(FEATURE_HOURS.values()), dtype=np.int64)).astype(np.float64)
+        base = np.array(list(BASE_HOURS.values()), dtype=np.float64)
+        multipliers = np.array(list(COMPLEXITY_MULTIPLIERS.values()), dtype=np.float64)
+
+        # (tipos, complejidades, máscaras)
+        self.dev_hours = (base[:, None, None] + extra[None, None, :]) * multipliers[None, :, None]
+        # (tipos, complejidades, máscaras, 4)
+        self.breakdown = np.stack(
+            [_js_round_array(self.dev_hours * share) for _, _, share in BREAKDOWN_SHARES], axis=-1
+        ).astype(np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dev_hours.nbytes + self.breakdown.nbytes
+
+    def quote(self, project_type: str, complexity: str, features: Dict[str, bool],
+              team: Dict[str, int], hourly_rate: float) -> dict:
+        """Cotización con el mismo resultado que estimate_project"""
+        type_index = self.type_index.get(project_type)
+        if type_index is None:
+            raise ValueError(f"Unknown project type: {project_type}")
+        complexity_index = self.complexity_index.get(complexity)
+        if complexity_index is None:
+            raise ValueError(f"Unknown complexity: {complexity}")
+        mask = 0
+        for name, enabled in features.items():
+            if enabled:
+                bit = FEATURE_BITS.get(name)
+                if bit is None:
+                    raise ValueError(f"Unknown features: {name}")
+                mask |= bit
+
+        frontend, backend, design, qa = self.breakdown[type_index, complexity_index, mask].tolist()
+        hours = (frontend * team.get('frontend', 0) + backend * team.get('backend', 0)
+                 + design * team.get('designer', 0) + qa * team.get('qa', 0))
+        return {
+            "hours": hours,
+            "weeks": math.ceil(hours / (HOURS_PER_WEEK * max(sum(team.values()), 1))),
+            "cost": hours * hourly_rate,
+            "breakdown": {"frontend": frontend, "backend": backend, "design": design, "qa": qa}
+        }
@@ -0,0 +1,114 @@
+# backend/export.py - Exportación en streaming (NDJSON/CSV) de estimaciones
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional
+
+from columnar_store import ColumnarEstimateStore
+from memory_store import order_key
+from pagination import SORT_ORDER
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _project(estimate: dict, fields: List[str]) -> dict:
+    return {field: estimate.get(field) for field in fields}
+
+
+async def iter_mongo_batches(collection, fields: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+    """Recorrer el cursor de Motor en lotes, trayendo solo los campos pedidos"""
+    projection = {"_id": 0, **{field: 1 for field in fields}}
+    cursor = collection.find({}, projection).sort(SORT_ORDER).batch_size(batch_size)
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def iter_memory_batches(store: ColumnarEstimateStore, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+    """Recorrer el store en memoria en lotes por keyset (tolera escrituras concurrentes)"""
+    batch = store.page(0, batch_size)
+    while batch:
+        yield batch
+        if len(batch) < batch_size:
+            break
+        batch = store.page_after(order_key(batch[-1]), batch_size)
+
+
+def _interrupted(error: Exception) -> str:
+    logger.error(f"Export interrupted: {error}")
+    return f"Export interrupted: {str(error)[:100]}"
+
+
+async def stream_ndjson(batches: AsyncIterator[List[dict]], fields: List[str]) -> AsyncIterator[bytes]:
+    """Una línea JSON por estimación, un chunk por lote.
+
+    Si la fuente falla a mitad de camino, la última línea es {"error": ...}:
+    la descarga queda marcada como incompleta en lugar de cortarse sin aviso.
+    """
+    try:
+        async for batch in batches:
+            lines = [json.dumps(_project(estimate, fields), default=_default) for estimate in batch]
+            yield ("\n".join(lines) + "\n").encode()
+    except Exception as e:
+        yield (json.dumps({"error": _interrupted(e)}) + "\n").encode()
+
+
+async def stream_csv(batches: AsyncIterator[List[dict]], fields: List[str]) -> AsyncIterator[bytes]:
+    """CSV con cabecera; los campos anidados se escriben como JSON.
+
+    Si la fuente falla a mitad de camino, la última línea es "# error: ...".
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    try:
+        async for batch in batches:
+            for estimate in batch:
+                writer.writerow([_csv_value(estimate.get(field)) for field in fields])
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate(0)
+    except Exception as e:
+        buffer.write(f"# error: {_interrupted(e)}\r\n")
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _csv_value(value):
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(',', ':'))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> List[str]:
+    """Lista de campos a exportar; ValueError si alguno no existe"""
+    allowed = list(allowed)
+    if not fields:
+        return allowed
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in allowed]
+    if unknown or not selected:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selected
@@ -0,0 +1,75 @@
+# backend/filters.py - Filtros de estimaciones compartidos por MongoDB y el store en memoria
+from datetime import datetime
+from typing import List, Optional
+
+from timeutils import parse_timestamp
+
+# Rangos numéricos inclusivos: criterio -> (campo, operador de MongoDB)
+RANGE_CRITERIA = {
+    "min_cost": ("estimated_cost", "$gte"),
+    "max_cost": ("estimated_cost", "$lte"),
+    "min_hours": ("estimated_hours", "$gte"),
+    "max_hours": ("estimated_hours", "$lte")
+}
+
+
+def active_criteria(criteria: dict) -> dict:
+    """Quitar los criterios vacíos (None o lista vacía)"""
+    return {key: value for key, value in criteria.items() if value is not None and value != []}
+
+
+def mongo_query(project_type: Optional[str] = None, complexity: Optional[str] = None,
+                created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                features: Optional[List[str]] = None,
+                min_cost: Optional[float] = None, max_cost: Optional[float] = None,
+                min_hours: Optional[int] = None, max_hours: Optional[int] = None) -> dict:
+    """Query de MongoDB equivalente a `matches`"""
+    query = {}
+    if project_type is not None:
+        query["project_type"] = project_type
+    if complexity is not None:
+        query["complexity"] = complexity
+    if created_after is not None or created_before is not None:
+        query["timestamp"] = {}
+        if created_after is not None:
+            query["timestamp"]["$gte"] = parse_timestamp(created_after)
+        if created_before is not None:
+            query["timestamp"]["$lt"] = parse_timestamp(created_before)
+    for feature in features or []:
+        query[f"features.{feature}"] = True
+    bounds = {"min_cost": min_cost, "max_cost": max_cost, "min_hours": min_hours, "max_hours": max_hours}
+    for name, value in bounds.items():
+        if value is not None:
+            field, operator = RANGE_CRITERIA[name]
+            query.setdefault(field, {})[operator] = value
+    return query
+
+
+def matches(estimate: dict, project_type: Optional[str] = None, complexity: Optional[str] = None,
+            created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+            features: Optional[List[str]] = None,
+            min_cost: Optional[float] = None, max_cost: Optional[float] = None,
+            min_hours: Optional[int] = None, max_hours: Optional[int] = None) -> bool:
+    """Indicar si una estimación cumple el filtro"""
+    if project_type is not None and estimate['project_type'] != project_type:
+        return False
+    if complexity is not None and estimate['complexity'] != complexity:
+        return False
+    if created_after is not None or created_before is not None:
+        timestamp = parse_timestamp(estimate['timestamp'])
+        if created_after is not None and timestamp < parse_timestamp(created_after):
+            return False
+        if created_before is not None and timestamp >= parse_timestamp(created_before):
+            return False
+    for feature in features or []:
+        if estimate['features'].get(feature) is not True:
+            return False
+    if min_cost is not None and estimate['estimated_cost'] < min_cost:
+        return False
+    if max_cost is not None and estimate['estimated_cost'] > max_cost:
+        return False
+    if min_hours is not None and estimate['estimated_hours'] < min_hours:
+        return False
+    if max_hours is not None and estimate['estimated_hours'] > max_hours:
+        return False
+    return True
@@ -0,0 +1,67 @@
+# backend/health_monitor.py - Estado de salud de la base de datos con probe en segundo plano
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Ejecuta el probe de la base de datos cada `interval` segundos y cachea el resultado.
+
+    Los endpoints de salud responden con el último resultado (más su antigüedad
+    y latencia) en lugar de hacer un ping por request.
+    """
+
+    def __init__(self, probe: Callable[[], Awaitable[bool]], interval: float = 10.0):
+        self.probe = probe
+        self.interval = interval
+        self.connected = False
+        self.checked_at: Optional[datetime] = None
+        self.latency_ms: Optional[float] = None
+        self.checks = 0
+        self._checked_monotonic: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> bool:
+        """Ejecutar el probe ahora y actualizar el resultado cacheado"""
+        async with self._lock:
+            start = time.perf_counter()
+            try:
+                connected = bool(await self.probe())
+            except Exception as e:
+                logger.warning(f"Health probe failed: {str(e)[:100]}...")
+                connected = False
+            self.latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            self.connected = connected
+            self.checked_at = datetime.utcnow()
+            self._checked_monotonic = time.monotonic()
+            self.checks += 1
+            return connected
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        if self._checked_monotonic is None:
+            return None
+        return round(time.monotonic() - self._checked_monotonic, 3)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
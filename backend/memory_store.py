@@ -0,0 +1,235 @@
+# backend/memory_store.py - Store en memoria con índice secundario ordenado por timestamp
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from timeutils import parse_timestamp
+
+
+class SortedKeyList:
+    """Lista ordenada dividida en bloques (al estilo de sortedcontainers).
+
+    Localizar una clave cuesta O(log n) y las inserciones/borrados solo mueven
+    elementos dentro de un bloque acotado por `load`, así que no hay que
+    reordenar toda la colección en cada cambio.
+
+    Un árbol de Fenwick con los largos de los bloques ubica la posición
+    número `skip` en O(log n). Se arma perezosamente y se invalida solo cuando
+    cambia la cantidad de bloques.
+    """
+
+    def __init__(self, load: int = 512):
+        self._load = load
+        self._lists: List[list] = []
+        self._maxes: list = []
+        self._len = 0
+        self._tree: Optional[List[int]] = None
+
+    @classmethod
+    def from_sorted(cls, keys: list, load: int = 512) -> 'SortedKeyList':
+        """Construir la lista a partir de claves ya ordenadas"""
+        instance = cls(load)
+        instance._lists = [keys[i:i + load] for i in range(0, len(keys), load)]
+        instance._maxes = [bucket[-1] for bucket in instance._lists]
+        instance._len = len(keys)
+        return instance
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key):
+        if not self._maxes:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._tree = None
+        else:
+            pos = bisect_left(self._maxes, key)
+            if pos == len(self._maxes):
+                # Caso habitual: la clave es la más reciente
+                pos -= 1
+                self._lists[pos].append(key)
+                self._maxes[pos] = key
+            else:
+                insort(self._lists[pos], key)
+            self._tree_add(pos, 1)
+            self._split(pos)
+        self._len += 1
+
+    def remove(self, key):
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            raise KeyError(key)
+        bucket = self._lists[pos]
+        idx = bisect_left(bucket, key)
+        if idx == len(bucket) or bucket[idx] != key:
+            raise KeyError(key)
+        del bucket[idx]
+        self._len -= 1
+        if bucket:
+            self._maxes[pos] = bucket[-1]
+            self._tree_add(pos, -1)
+        else:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._tree = None
+
+    def iter_desc(self, skip: int = 0) -> Iterator:
+        """Recorrer las claves de mayor a menor, saltando las primeras `skip`"""
+        skip = max(skip, 0)
+        if skip >= self._len:
+            return
+        pos, start = self._locate(self._len - 1 - skip)
+        bucket = self._lists[pos]
+        for idx in range(start, -1, -1):
+            yield bucket[idx]
+        for pos in range(pos - 1, -1, -1):
+            bucket = self._lists[pos]
+            for idx in range(len(bucket) - 1, -1, -1):
+                yield bucket[idx]
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._lists:
+            yield from bucket
+
+    def iter_desc_before(self, key) -> Iterator:
+        """Recorrer de mayor a menor las claves estrictamente menores que `key`"""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+        if pos < 0:
+            return
+        bucket = self._lists[pos]
+        for idx in range(bisect_left(bucket, key) - 1, -1, -1):
+            yield bucket[idx]
+        for pos in range(pos - 1, -1, -1):
+            bucket = self._lists[pos]
+            for idx in range(len(bucket) - 1, -1, -1):
+                yield bucket[idx]
+
+    def _split(self, pos: int):
+        bucket = self._lists[pos]
+        if len(bucket) > 2 * self._load:
+            half = bucket[self._load:]
+            del bucket[self._load:]
+            self._maxes[pos] = bucket[-1]
+            self._lists.insert(pos + 1, half)
+            self._maxes.insert(pos + 1, half[-1])
+            self._tree = None
+
+    def _build_tree(self) -> List[int]:
+        # Fenwick 1-indexado: tree[i] suma los largos de los bloques (i - lowbit(i), i]
+        tree = [0] + [len(bucket) for bucket in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_add(self, pos: int, delta: int):
+        tree = self._tree
+        if tree is None:
+            return
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(bloque, posición dentro del bloque) de la clave número `index` en orden ascendente"""
+        tree = self._tree if self._tree is not None else self._build_tree()
+        pos = 0
+        step = (1 << (len(tree) - 1).bit_length()) >> 1
+        while step:
+            following = pos + step
+            if following < len(tree) and tree[following] <= index:
+                pos = following
+                index -= tree[following]
+            step >>= 1
+        return pos, index
+
+
+def order_key(estimate: dict) -> Tuple[Any, str]:
+    """Clave de orden (timestamp, id) de una estimación"""
+    return parse_timestamp(estimate['timestamp']), estimate['id']
+
+
+class EstimateMemoryStore(MutableMapping):
+    """Mapa id -> estimación con un índice secundario ordenado por (timestamp, id).
+
+    Se comporta como el dict que se usaba antes, pero inserciones y borrados
+    mantienen el índice en O(log n) y las páginas salen en orden descendente
+    sin ordenar toda la colección.
+
+    El servidor usa ColumnarEstimateStore, que tiene la misma API. Esta clase
+    se conserva como referencia de dicts: benchmarks/bench_memory_store.py
+    compara contra ella memoria y latencia del store columnar.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, dict] = {}
+        self._keys: Dict[str, Tuple[Any, str]] = {}
+        self._index = SortedKeyList()
+
+    def __getitem__(self, estimate_id: str) -> dict:
+        return self._by_id[estimate_id]
+
+    def __setitem__(self, estimate_id: str, estimate: dict):
+        if estimate_id in self._by_id:
+            self._index.remove(self._keys[estimate_id])
+        key = (parse_timestamp(estimate['timestamp']), estimate_id)
+        self._by_id[estimate_id] = estimate
+        self._keys[estimate_id] = key
+        self._index.add(key)
+
+    def __delitem__(self, estimate_id: str):
+        del self._by_id[estimate_id]
+        self._index.remove(self._keys.pop(estimate_id))
+
+    def __contains__(self, estimate_id) -> bool:
+        return estimate_id in self._by_id
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def bulk_load(self, estimates: Iterable[dict]):
+        """Cargar muchas estimaciones de una vez ordenando el índice una sola vez"""
+        for estimate in estimates:
+            self._by_id[estimate['id']] = estimate
+        self._keys = {estimate_id: order_key(estimate) for estimate_id, estimate in self._by_id.items()}
+        self._index = SortedKeyList.from_sorted(sorted(self._keys.values()))
+
+    def iter_oldest(self) -> Iterator[dict]:
+        """Estimaciones de la más antigua a la más reciente"""
+        for _, estimate_id in self._index:
+            yield self._by_id[estimate_id]
+
+    def iter_newest(self, skip: int = 0) -> Iterator[dict]:
+        """Estimaciones de la más reciente a la más antigua"""
+        for _, estimate_id in self._index.iter_desc(skip):
+            yield self._by_id[estimate_id]
+
+    def page(self, skip: int = 0, limit: int = 100) -> List[dict]:
+        """Página de estimaciones ordenadas por timestamp descendente"""
+        page = []
+        if limit <= 0:
+            return page
+        for estimate in self.iter_newest(skip):
+            page.append(estimate)
+            if len(page) >= limit:
+                break
+        return page
+
+    def page_after(self, key: Tuple[Any, str], limit: int = 100) -> List[dict]:
+        """Página de estimaciones estrictamente anteriores a la clave (timestamp, id)"""
+        page = []
+        if limit <= 0:
+            return page
+        for _, estimate_id in self._index.iter_desc_before(key):
+            page.append(self._by_id[estimate_id])
+            if len(page) >= limit:
+                break
+        return page
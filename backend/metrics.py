@@ -0,0 +1,249 @@
+# backend/metrics.py - Métricas en proceso con exposición en formato de texto de Prometheus
+import asyncio
+import logging
+import math
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latencias de requests y de comandos: la mayoría de las lecturas quedan por debajo del milisegundo
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Comandos de MongoDB pendientes de volcar a los histogramas (se descartan los más viejos)
+MAX_PENDING_COMMANDS = 100_000
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram:
+    """Histograma con buckets fijos por combinación de labels.
+
+    `observe` es una búsqueda binaria y dos sumas sobre estructuras del propio
+    histograma, sin locks: se llama solo desde el event loop, así que no hay
+    escrituras concurrentes. Los conteos se guardan por bucket y se acumulan
+    al exponer.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series.counts) if series is not None else 0
+
+    def samples(self) -> Iterable[str]:
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series.counts):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series.sum)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Counter:
+    """Contador monotónico por combinación de labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class CallbackMetric:
+    """Valor que se lee al exponer (tamaños de stores, contadores que ya llevan otros objetos).
+
+    `read` devuelve un número o, si hay `labelnames`, un dict de tupla de labels -> número.
+    """
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], object],
+                 kind: str = "gauge", labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} could not be read: {str(e)[:100]}...")
+            return
+        if value is None:
+            return
+        if not self.labelnames:
+            yield f"{self.name} {_format_value(value)}"
+            return
+        for labels, labeled_value in value.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(labeled_value)}"
+
+
+class MetricsRegistry:
+    """Conjunto de métricas del proceso y su exposición en texto"""
+
+    def __init__(self):
+        self._metrics: List[object] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def callback(self, name: str, documentation: str, read: Callable[[], object],
+                 kind: str = "gauge", labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, read, kind, labelnames))
+
+    def on_collect(self, collector: Callable[[], None]):
+        """Función a ejecutar antes de cada exposición (p. ej. volcar datos de otros hilos)"""
+        self._collectors.append(collector)
+
+    def render(self) -> bytes:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return ("\n".join(lines) + "\n").encode()
+
+    def _register(self, metric):
+        if any(existing.name == metric.name for existing in self._metrics):
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics.append(metric)
+        return metric
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Duración de cada comando de MongoDB, por nombre de comando (find, insert, aggregate...).
+
+    PyMongo avisa desde los hilos del executor de Motor: los eventos se dejan
+    en un deque (append es atómico) y se vuelcan al histograma desde el event
+    loop con `drain`, así el histograma nunca se escribe desde dos hilos.
+    """
+
+    def __init__(self, histogram: Histogram, max_pending: int = MAX_PENDING_COMMANDS):
+        self.histogram = histogram
+        self._pending: deque = deque(maxlen=max_pending)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._pending.append((event.command_name, event.duration_micros / 1_000_000, "ok"))
+
+    def failed(self, event):
+        self._pending.append((event.command_name, event.duration_micros / 1_000_000, "error"))
+
+    def drain(self):
+        pending = self._pending
+        while pending:
+            try:
+                command, seconds, outcome = pending.popleft()
+            except IndexError:
+                break
+            self.histogram.observe(seconds, command, outcome)
+
+
+class EventLoopLagMonitor:
+    """Mide cuánto se atrasa el event loop respecto de un sleep de `interval` segundos.
+
+    Un atraso sostenido indica código síncrono bloqueando el loop (CPU, I/O
+    sin await). En cada vuelta ejecuta también `on_tick`.
+    """
+
+    def __init__(self, histogram: Histogram, interval: float = 0.5, on_tick: Optional[Callable[[], None]] = None):
+        self.histogram = histogram
+        self.interval = interval
+        self.on_tick = on_tick
+        self.last_lag: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.histogram.observe(lag)
+            self.last_lag = lag
+            if self.on_tick is not None:
+                self.on_tick()
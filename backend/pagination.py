@@ -0,0 +1,40 @@
+# backend/pagination.py - Cursores opacos para paginación por keyset (timestamp, id)
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from timeutils import parse_timestamp
+
+# Orden estable de los listados: más recientes primero, desempate por id
+SORT_ORDER = [("timestamp", -1), ("id", -1)]
+
+
+def encode_cursor(estimate: dict) -> str:
+    """Cursor opaco que apunta a la posición de una estimación"""
+    payload = {
+        "t": parse_timestamp(estimate['timestamp']).isoformat(),
+        "id": estimate['id']
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Devolver (timestamp, id) de un cursor; ValueError si no es válido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return parse_timestamp(payload['t']), str(payload['id'])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def mongo_after_filter(timestamp: datetime, estimate_id: str) -> dict:
+    """Filtro de MongoDB para los documentos posteriores al cursor en SORT_ORDER"""
+    return {
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "id": {"$lt": estimate_id}}
+        ]
+    }
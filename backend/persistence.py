@@ -0,0 +1,245 @@
+# backend/persistence.py - Persistencia local del store en memoria (log append-only + snapshots)
+import asyncio
+import gc
+import logging
+import os
+import pickle
+import struct
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.bin"
+LOG_FILE = "estimates.log"
+ROTATED_LOG_FILE = "estimates.log.1"
+
+OP_CREATE = 1
+OP_DELETE = 2
+
+# Cabecera de cada registro del log: operación, longitud del payload y CRC32
+RECORD_HEADER = struct.Struct("<BII")
+
+# v1: una sola lista pickle con todas las estimaciones (solo lectura)
+# v2: lotes pickle de hasta SNAPSHOT_BATCH estimaciones, uno tras otro hasta el fin del archivo
+SNAPSHOT_MAGIC_V1 = b"CVSNAP1\n"
+SNAPSHOT_MAGIC = b"CVSNAP2\n"
+SNAPSHOT_BATCH = 1024
+
+
+class MemoryPersistence:
+    """Log append-only de creates/deletes más snapshots compactos del store en memoria.
+
+    Al arrancar se carga el último snapshot y se reaplican los logs posteriores.
+    Las operaciones son idempotentes (set/delete por id), así que reaplicar un
+    log que ya estaba incluido en el snapshot no altera el resultado.
+
+    Los snapshots se escriben y se leen por lotes: ni al escribirlos ni al
+    recuperar existe a la vez una lista con todas las estimaciones como dicts.
+    """
+
+    def __init__(self, directory: str, fsync: bool = False, snapshot_every: int = 50_000):
+        self.directory = directory
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self.ops_since_snapshot = 0
+        self.snapshotting = False
+        os.makedirs(directory, exist_ok=True)
+        self._log = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # ---------- Recuperación ----------
+
+    def recover(self, store) -> int:
+        """Cargar en `store` (vacío, con `bulk_load`) el snapshot más los logs posteriores.
+
+        Los logs se leen primero a un dict id -> estimación (None si se borró),
+        acotado por el tamaño de los logs; el snapshot se recorre por lotes
+        saltando esos ids. Devuelve la cantidad de estimaciones cargadas.
+        """
+        changes: Dict[str, Optional[dict]] = {}
+        for name in (ROTATED_LOG_FILE, LOG_FILE):
+            path = self._path(name)
+            if os.path.exists(path):
+                self.ops_since_snapshot += self._replay(path, changes)
+
+        # Millones de dicts recién creados disparan el GC cíclico sin necesidad
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            store.bulk_load(self._recovered(changes))
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self._open_log()
+        return len(store)
+
+    def _recovered(self, changes: Dict[str, Optional[dict]]) -> Iterator[dict]:
+        for estimate in self._iter_snapshot():
+            if estimate["id"] not in changes:
+                yield estimate
+        for estimate in changes.values():
+            if estimate is not None:
+                yield estimate
+
+    def _iter_snapshot(self) -> Iterator[dict]:
+        snapshot_path = self._path(SNAPSHOT_FILE)
+        if not os.path.exists(snapshot_path):
+            return
+        with open(snapshot_path, "rb") as snapshot:
+            magic = snapshot.read(len(SNAPSHOT_MAGIC))
+            if magic == SNAPSHOT_MAGIC_V1:
+                yield from pickle.load(snapshot)
+                return
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"Invalid snapshot file: {snapshot_path}")
+            while True:
+                try:
+                    batch = pickle.load(snapshot)
+                except EOFError:
+                    return
+                yield from batch
+
+    def _replay(self, path: str, changes: Dict[str, Optional[dict]]) -> int:
+        applied = 0
+        valid_size = 0
+        with open(path, "rb") as log:
+            while True:
+                header = log.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                op, length, crc = RECORD_HEADER.unpack(header)
+                payload = log.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                if op == OP_CREATE:
+                    estimate = pickle.loads(payload)
+                    changes[estimate["id"]] = estimate
+                elif op == OP_DELETE:
+                    changes[payload.decode()] = None
+                applied += 1
+                valid_size = log.tell()
+            torn = os.path.getsize(path) - valid_size
+
+        if torn:
+            # Registro incompleto por una caída a mitad de escritura
+            logger.warning(f"Truncating {torn} bytes of torn log records in {path}")
+            with open(path, "r+b") as log:
+                log.truncate(valid_size)
+        return applied
+
+    # ---------- Escritura ----------
+
+    def _open_log(self):
+        self._log = open(self._path(LOG_FILE), "ab")
+
+    def _append(self, op: int, payload: bytes):
+        self._log.write(RECORD_HEADER.pack(op, len(payload), zlib.crc32(payload)) + payload)
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self.ops_since_snapshot += 1
+
+    def log_create(self, estimate: dict):
+        document = {key: value for key, value in estimate.items() if key != "_id"}
+        self._append(OP_CREATE, pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def log_delete(self, estimate_id: str):
+        self._append(OP_DELETE, estimate_id.encode())
+
+    @property
+    def snapshot_due(self) -> bool:
+        return not self.snapshotting and self.ops_since_snapshot >= self.snapshot_every
+
+    # ---------- Snapshots ----------
+
+    def _rotate_log(self):
+        """Cerrar el log actual y empezar uno nuevo para las escrituras siguientes"""
+        self._log.close()
+        rotated = self._path(ROTATED_LOG_FILE)
+        if os.path.exists(rotated):
+            # Un snapshot anterior no llegó a terminar: conservar ambos logs
+            with open(rotated, "ab") as target, open(self._path(LOG_FILE), "rb") as source:
+                target.write(source.read())
+            os.remove(self._path(LOG_FILE))
+        else:
+            os.replace(self._path(LOG_FILE), rotated)
+        self._open_log()
+        self.ops_since_snapshot = 0
+
+    def _write_snapshot(self, estimates: Iterable[dict]) -> int:
+        tmp_path = self._path(SNAPSHOT_FILE + ".tmp")
+        count = 0
+        with open(tmp_path, "wb") as snapshot:
+            snapshot.write(SNAPSHOT_MAGIC)
+            batch = []
+            for estimate in estimates:
+                batch.append(_strip_id(estimate))
+                if len(batch) == SNAPSHOT_BATCH:
+                    pickle.dump(batch, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                pickle.dump(batch, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+                count += len(batch)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(tmp_path, self._path(SNAPSHOT_FILE))
+        os.remove(self._path(ROTATED_LOG_FILE))
+        return count
+
+    def snapshot(self, estimates: Iterable[dict]) -> int:
+        """Snapshot síncrono (p. ej. al apagar)"""
+        self._rotate_log()
+        return self._write_snapshot(estimates)
+
+    def snapshot_async(self, estimates: Iterable[dict]) -> Optional[asyncio.Task]:
+        """Rotar el log ahora y escribir el snapshot en un hilo aparte.
+
+        `estimates` tiene que reflejar el estado del store en este mismo
+        momento (una copia desacoplada, p. ej. `detached_oldest()`): lo que se
+        escriba después de la rotación queda en el log nuevo, no en el
+        snapshot. Se consume en el hilo, lote a lote. Conviene que recorra las
+        estimaciones en orden de timestamp: al recuperar, el índice se ordena
+        en tiempo lineal.
+        """
+        if self.snapshotting:
+            return None
+        self.snapshotting = True
+        try:
+            self._rotate_log()
+        except Exception as e:
+            self.snapshotting = False
+            logger.error(f"Memory store snapshot failed: {e}")
+            return None
+        self._snapshot_task = asyncio.create_task(self._finish_snapshot(estimates))
+        return self._snapshot_task
+
+    async def _finish_snapshot(self, estimates: Iterable[dict]):
+        try:
+            count = await asyncio.to_thread(self._write_snapshot, estimates)
+            logger.info(f"Memory store snapshot written ({count} estimates)")
+        except Exception as e:
+            logger.error(f"Memory store snapshot failed: {e}")
+        finally:
+            self.snapshotting = False
+
+    async def wait_snapshot(self):
+        """Esperar el snapshot en segundo plano que esté en curso (p. ej. antes de apagar)"""
+        if self._snapshot_task is not None:
+            await asyncio.gather(self._snapshot_task, return_exceptions=True)
+            self._snapshot_task = None
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def _strip_id(estimate: dict) -> dict:
+    if "_id" in estimate:
+        return {key: value for key, value in estimate.items() if key != "_id"}
+    return estimate
@@ -0,0 +1,278 @@
+# backend/quantile_sketch.py - Sketches KLL para percentiles e histogramas de costo y horas
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from math import ceil
+from random import Random
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_K = 200
+
+# Factor con el que decrece la capacidad de cada nivel inferior (paper KLL)
+CAPACITY_DECAY = 2 / 3
+
+METRICS = {"cost": "estimated_cost", "hours": "estimated_hours"}
+DIMENSIONS = ("project_type", "complexity")
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def rank_error(k: int = DEFAULT_K) -> float:
+    """Error de rango normalizado (99% de confianza) para un percentil aislado.
+
+    Aproximación empírica publicada para KLL con decay 2/3: con k=200 un p90
+    reportado cae entre los percentiles reales ~88.7 y ~91.3.
+    """
+    return 2.296 / k ** 0.9723
+
+
+def histogram_error(k: int = DEFAULT_K) -> float:
+    """Error de rango normalizado que vale simultáneamente para todos los bins"""
+    return 2.446 / k ** 0.9433
+
+
+class KLLSketch:
+    """Sketch de cuantiles KLL: mergeable, solo inserciones, memoria acotada.
+
+    Los valores entran al nivel 0; cuando se supera la capacidad, un nivel se
+    ordena y se queda con uno de cada dos elementos (que pasan a pesar el
+    doble) en el nivel siguiente. Se retienen como mucho ~3k valores más dos
+    por nivel, es decir O(k + log n) floats independientemente de n.
+    """
+
+    __slots__ = ("k", "n", "min", "max", "_levels", "_size", "_max_size", "_rng")
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._levels: List[List[float]] = []
+        self._size = 0
+        self._max_size = 0
+        self._rng = Random(seed)
+        self._grow()
+
+    @property
+    def retained(self) -> int:
+        """Cantidad de valores guardados (lo que ocupa el sketch en memoria)"""
+        return self._size
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, int(ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _grow(self):
+        self._levels.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+
+    def update(self, value: float):
+        value = float(value)
+        if self.n == 0:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.n += 1
+        self._levels[0].append(value)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        for level in range(len(self._levels)):
+            items = self._levels[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self._levels):
+                self._grow()
+            items.sort()
+            # Con cantidad impar el último valor se queda en su nivel para no perder peso
+            leftover = [items.pop()] if len(items) % 2 else []
+            offset = self._rng.getrandbits(1)
+            self._levels[level + 1].extend(items[offset::2])
+            self._size -= len(items) // 2
+            self._levels[level] = leftover
+            if self._size < self._max_size:
+                break
+
+    def merge(self, other: "KLLSketch"):
+        """Incorporar otro sketch; el resultado conserva las mismas garantías de error"""
+        if other.n == 0:
+            return
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+        self._size += other._size
+        if self.n == 0:
+            self.min, self.max = other.min, other.max
+        else:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.n += other.n
+        while self._size >= self._max_size:
+            self._compress()
+
+    @classmethod
+    def merged(cls, sketches: Iterable["KLLSketch"], k: int = DEFAULT_K) -> "KLLSketch":
+        result = cls(k)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def _weighted(self) -> Tuple[List[float], List[int]]:
+        """Valores retenidos ordenados y su peso acumulado"""
+        pairs = sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self._levels)
+            for value in items
+        )
+        values = [value for value, _ in pairs]
+        cumulative = list(accumulate(weight for _, weight in pairs))
+        return values, cumulative
+
+    def quantiles(self, fractions: Sequence[float]) -> List[Optional[float]]:
+        if self.n == 0:
+            return [None for _ in fractions]
+        values, cumulative = self._weighted()
+        total = cumulative[-1]
+        result = []
+        for fraction in fractions:
+            if fraction <= 0:
+                result.append(self.min)
+            elif fraction >= 1:
+                result.append(self.max)
+            else:
+                index = bisect_left(cumulative, fraction * total)
+                result.append(values[min(index, len(values) - 1)])
+        return result
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        return self.quantiles([fraction])[0]
+
+    def rank(self, value: float) -> float:
+        """Fracción estimada de valores <= value"""
+        if self.n == 0:
+            return 0.0
+        values, cumulative = self._weighted()
+        index = bisect_right(values, value)
+        return cumulative[index - 1] / cumulative[-1] if index else 0.0
+
+    def histogram(self, bins: int) -> List[dict]:
+        """Histograma de `bins` intervalos de igual ancho entre min y max"""
+        if self.n == 0:
+            return []
+        values, cumulative = self._weighted()
+        width = (self.max - self.min) / bins
+        if width == 0:
+            return [{"lower": self.min, "upper": self.max, "count": self.n}]
+
+        result = []
+        previous = 0
+        for i in range(bins):
+            lower = self.min + i * width
+            upper = self.max if i == bins - 1 else lower + width
+            # Los bins son [lower, upper), salvo el último que incluye el máximo
+            index = bisect_right(values, upper) if i == bins - 1 else bisect_left(values, upper)
+            below = cumulative[index - 1] if index else 0
+            result.append({"lower": lower, "upper": upper, "count": below - previous})
+            previous = below
+        return result
+
+
+class EstimateDistributions:
+    """Sketches de costo y horas por tipo de proyecto y por complejidad.
+
+    Los sketches solo admiten inserciones: las eliminaciones se cuentan y,
+    cuando superan el error de rango del sketch, `drifted` indica que hay que
+    reconstruirlos desde el store. Por eso el `count` de cada resumen sale de
+    los contadores de estimaciones vivas y `sketch_count` es lo que el sketch
+    lleva insertado (incluye las eliminadas).
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.reset()
+
+    def reset(self):
+        self._sketches: Dict[str, Dict[str, Dict[str, KLLSketch]]] = {d: {} for d in DIMENSIONS}
+        self._live: Dict[str, Dict[str, int]] = {d: {} for d in DIMENSIONS}
+        self.count = 0
+        self.removed = 0
+
+    def add(self, estimate: dict):
+        self.count += 1
+        for dimension in DIMENSIONS:
+            live = self._live[dimension]
+            live[estimate[dimension]] = live.get(estimate[dimension], 0) + 1
+            group = self._sketches[dimension].get(estimate[dimension])
+            if group is None:
+                group = self._sketches[dimension][estimate[dimension]] = {
+                    metric: KLLSketch(self.k, seed=0) for metric in METRICS
+                }
+            for metric, field in METRICS.items():
+                group[metric].update(estimate[field])
+
+    def remove(self, estimate: dict):
+        self.removed += 1
+        for dimension in DIMENSIONS:
+            live = self._live[dimension]
+            live[estimate[dimension]] = live.get(estimate[dimension], 0) - 1
+
+    @property
+    def drifted(self) -> bool:
+        return self.removed > rank_error(self.k) * self.count
+
+    def groups(self, dimension: str, metric: str) -> Dict[str, KLLSketch]:
+        return {key: group[metric] for key, group in self._sketches[dimension].items()}
+
+    def overall(self, metric: str) -> KLLSketch:
+        """Distribución global, obtenida mergeando los sketches por tipo"""
+        return KLLSketch.merged(self.groups("project_type", metric).values(), self.k)
+
+    def describe(
+        self,
+        metric: str,
+        group_by: Optional[str] = None,
+        fractions: Sequence[float] = DEFAULT_QUANTILES,
+        bins: int = 10
+    ) -> dict:
+        digits = 2 if metric == "cost" else 1
+        result = {
+            "metric": metric,
+            "k": self.k,
+            "rank_error": round(rank_error(self.k), 4),
+            "histogram_rank_error": round(histogram_error(self.k), 4),
+            "overall": _summarize(self.overall(metric), self.count - self.removed, fractions, bins, digits)
+        }
+        if group_by is not None:
+            result["group_by"] = group_by
+            live = self._live[group_by]
+            result["groups"] = {
+                key: _summarize(sketch, live.get(key, 0), fractions, bins, digits)
+                for key, sketch in sorted(self.groups(group_by, metric).items())
+                if live.get(key, 0) > 0
+            }
+        return result
+
+
+def _summarize(sketch: KLLSketch, count: int, fractions: Sequence[float], bins: int, digits: int) -> dict:
+    summary = {
+        "count": count,
+        "sketch_count": sketch.n,
+        "min": _round(sketch.min, digits),
+        "max": _round(sketch.max, digits)
+    }
+    for fraction, value in zip(fractions, sketch.quantiles(fractions)):
+        summary[f"p{fraction * 100:g}"] = _round(value, digits)
+    summary["histogram"] = [
+        {"lower": _round(b["lower"], digits), "upper": _round(b["upper"], digits), "count": b["count"]}
+        for b in sketch.histogram(bins)
+    ]
+    return summary
+
+
+def _round(value: Optional[float], digits: int) -> Optional[float]:
+    return None if value is None else round(value, digits)
@@ -0,0 +1,166 @@
+# backend/request_profiler.py - Perfilado bajo demanda de requests con cProfile
+import cProfile
+import io
+import pstats
+import random
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from structured_logging import redact_query
+
+PROFILE_HEADER = b"x-profile-request"
+PROFILE_ID_HEADER = b"x-profile-id"
+SORT_KEYS = {"cumulative", "tottime", "ncalls"}
+
+
+class RequestProfiler:
+    """Ring acotado de perfiles cProfile de requests recientes.
+
+    cProfile mide el hilo completo: mientras una request se perfila entra
+    también lo que otras corrutinas ejecutan en el event loop. Por eso se
+    perfila una sola request a la vez y las demás pasan sin perfilar.
+    """
+
+    def __init__(self, ring_size: int = 20, sample_rate: float = 0.0):
+        self.sample_rate = sample_rate
+        self.profiles: deque = deque(maxlen=ring_size)
+        self.active = False
+        self.captured = 0
+        self.skipped_busy = 0
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def add(self, entry: dict):
+        self.profiles.append(entry)
+        self.captured += 1
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        for entry in self.profiles:
+            if entry["id"] == profile_id:
+                return entry
+        return None
+
+    def summaries(self) -> List[dict]:
+        """Perfiles guardados, del más reciente al más viejo, sin las estadísticas"""
+        return [{key: value for key, value in entry.items() if key != "stats"} for entry in reversed(self.profiles)]
+
+    def snapshot(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "ring_size": self.profiles.maxlen,
+            "stored": len(self.profiles),
+            "captured": self.captured,
+            "skipped_busy": self.skipped_busy
+        }
+
+
+def report_rows(entry: dict, sort: str = "cumulative", limit: int = 50) -> List[dict]:
+    """Funciones del perfil ordenadas por `sort`, con tiempos en milisegundos"""
+    rows = []
+    for (filename, line, function), (primitive_calls, calls, tottime, cumtime, _) in entry["stats"].items():
+        rows.append({
+            "function": function,
+            "file": filename,
+            "line": line,
+            "ncalls": calls,
+            "primitive_calls": primitive_calls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3)
+        })
+    key = {"cumulative": "cumtime_ms", "tottime": "tottime_ms", "ncalls": "ncalls"}[sort]
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:limit]
+
+
+def report_text(entry: dict, sort: str = "cumulative", limit: int = 50) -> str:
+    """Salida de pstats (la de `python -m cProfile`) del perfil"""
+    output = io.StringIO()
+    stats = pstats.Stats(_StatsSource(entry["stats"]), stream=output)
+    stats.sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+class _StatsSource:
+    """Lo mínimo que pstats.Stats necesita para cargar estadísticas ya tomadas"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila las requests marcadas o sorteadas.
+
+    Una request se perfila si trae la cabecera `X-Profile-Request` y
+    `authorize(authorization)` acepta su cabecera Authorization, o si sale
+    sorteada según `sample_rate`. La respuesta lleva `X-Profile-Id` para
+    pedir el perfil después. Solo se instala si el perfilado está habilitado.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, authorize: Callable[[Optional[str]], bool]):
+        self.app = app
+        self.profiler = profiler
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        if self.profiler.active:
+            self.profiler.skipped_busy += 1
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        response_status = {}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                response_status["status"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (PROFILE_ID_HEADER, profile_id.encode())]}
+            await send(message)
+
+        profile = cProfile.Profile()
+        captured_at = datetime.utcnow()
+        start = time.perf_counter()
+        self.profiler.active = True
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            self.profiler.active = False
+            duration = time.perf_counter() - start
+            profile.create_stats()
+            self.profiler.add({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": redact_query(scope.get("query_string", b"").decode("latin-1")),
+                "status": response_status.get("status"),
+                "trigger": trigger,
+                "captured_at": captured_at,
+                "duration_ms": round(duration * 1000, 3),
+                "functions": len(profile.stats),
+                "stats": profile.stats
+            })
+
+    def _trigger(self, scope) -> Optional[str]:
+        headers: Dict[bytes, bytes] = dict(scope["headers"])
+        if PROFILE_HEADER in headers:
+            authorization = headers.get(b"authorization")
+            if self.authorize(authorization.decode("latin-1") if authorization is not None else None):
+                return "header"
+        if self.profiler.should_sample():
+            return "sample"
+        return None
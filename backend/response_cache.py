@@ -0,0 +1,100 @@
+# backend/response_cache.py - Estimaciones ya serializadas a JSON y respuesta que las concatena
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional
+
+import pydantic_core
+from fastapi.responses import Response
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FastJSONResponse(Response):
+    """JSON codificado con el serializador de pydantic-core (Rust).
+
+    Acepta bytes ya codificados tal cual, así que los listados se arman
+    concatenando fragmentos del cache sin volver a validar ni codificar.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return pydantic_core.to_json(content)
+
+    @classmethod
+    def from_fragments(cls, fragments: Iterable[bytes], **kwargs) -> "FastJSONResponse":
+        """Array JSON a partir de objetos ya codificados"""
+        return cls(b"[" + b",".join(fragments) + b"]", **kwargs)
+
+
+class EncodedEstimateCache:
+    """Bytes JSON de cada estimación por id, con LRU acotado en bytes.
+
+    Las estimaciones no cambian después de creadas, así que un fragmento
+    solo se invalida al borrar. Se llena en cada alta y, para lo que no pasó
+    por el proceso (recuperación, otra instancia sobre MongoDB), en la
+    primera lectura.
+    """
+
+    def __init__(self, encoder: Callable[[dict], bytes], max_bytes: int = DEFAULT_MAX_BYTES):
+        self._encoder = encoder
+        self._max_bytes = max_bytes
+        self._fragments: "OrderedDict[str, bytes]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def __contains__(self, estimate_id: str) -> bool:
+        return estimate_id in self._fragments
+
+    def get(self, estimate_id: str) -> Optional[bytes]:
+        fragment = self._fragments.get(estimate_id)
+        if fragment is None:
+            self.misses += 1
+            return None
+        self._fragments.move_to_end(estimate_id)
+        self.hits += 1
+        return fragment
+
+    def put(self, estimate: dict) -> bytes:
+        """Codificar una estimación y guardarla (reemplaza la anterior con el mismo id)"""
+        fragment = self._encoder(estimate)
+        self.discard(estimate["id"])
+        if len(fragment) > self._max_bytes:
+            return fragment
+        self._fragments[estimate["id"]] = fragment
+        self.nbytes += len(fragment)
+        while self.nbytes > self._max_bytes:
+            _, evicted = self._fragments.popitem(last=False)
+            self.nbytes -= len(evicted)
+        return fragment
+
+    def discard(self, estimate_id: str):
+        fragment = self._fragments.pop(estimate_id, None)
+        if fragment is not None:
+            self.nbytes -= len(fragment)
+
+    def clear(self):
+        self._fragments.clear()
+        self.nbytes = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._fragments),
+            "bytes": self.nbytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def encode(self, estimate: dict) -> bytes:
+        """Fragmento de una estimación completa: del cache o codificándola"""
+        fragment = self.get(estimate["id"])
+        return fragment if fragment is not None else self.put(estimate)
+
+    def encode_many(self, estimates: Iterable[dict]) -> List[bytes]:
+        return [self.encode(estimate) for estimate in estimates]
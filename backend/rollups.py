@@ -0,0 +1,115 @@
+# backend/rollups.py - Rollups por día/semana/mes (count, costo, horas) mantenidos en cada escritura
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Union
+
+from timeutils import parse_timestamp
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def bucket_start(value: Union[date, datetime], granularity: str) -> date:
+    """Fecha de inicio del bucket al que pertenece un instante"""
+    day = value.date() if isinstance(value, datetime) else value
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        # Semanas ISO: empiezan el lunes
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+class _Bucket:
+    __slots__ = ("count", "total_cost", "total_hours")
+
+    def __init__(self):
+        self.count = 0
+        self.total_cost = Decimal(0)
+        self.total_hours = 0
+
+
+class TimeBucketRollups:
+    """Agregados pre-calculados por día, semana y mes.
+
+    Cada create/delete toca un bucket por granularidad, y las consultas de
+    rango recorren solo los buckets del intervalo pedido.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._buckets: Dict[str, Dict[date, _Bucket]] = {g: {} for g in GRANULARITIES}
+        self._keys: Dict[str, List[date]] = {g: [] for g in GRANULARITIES}
+
+    def add(self, estimate: dict):
+        self._apply(estimate, 1)
+
+    def remove(self, estimate: dict):
+        self._apply(estimate, -1)
+
+    def _apply(self, estimate: dict, sign: int):
+        timestamp = parse_timestamp(estimate['timestamp'])
+        cost = Decimal(str(estimate['estimated_cost'])) * sign
+        hours = estimate['estimated_hours'] * sign
+        for granularity in GRANULARITIES:
+            key = bucket_start(timestamp, granularity)
+            buckets = self._buckets[granularity]
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = _Bucket()
+                insort(self._keys[granularity], key)
+            bucket.count += sign
+            bucket.total_cost += cost
+            bucket.total_hours += hours
+            if bucket.count <= 0:
+                del buckets[key]
+                keys = self._keys[granularity]
+                del keys[bisect_left(keys, key)]
+
+    def count_in(self, value: Union[date, datetime], granularity: str) -> int:
+        """Cantidad de estimaciones del bucket que contiene `value`"""
+        bucket = self._buckets[granularity].get(bucket_start(value, granularity))
+        return bucket.count if bucket is not None else 0
+
+    def series(self, start: datetime, end: datetime, granularity: str, fill: bool = True) -> List[dict]:
+        """Serie temporal de los buckets que se solapan con [start, end]"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        first = bucket_start(start, granularity)
+        last = bucket_start(end, granularity)
+        buckets = self._buckets[granularity]
+
+        if fill:
+            keys = []
+            key = first
+            while key <= last:
+                keys.append(key)
+                key = next_bucket(key, granularity)
+        else:
+            sorted_keys = self._keys[granularity]
+            keys = sorted_keys[bisect_left(sorted_keys, first):bisect_right(sorted_keys, last)]
+
+        series = []
+        for key in keys:
+            bucket = buckets.get(key)
+            series.append({
+                "bucket": key.isoformat(),
+                "count": bucket.count if bucket else 0,
+                "total_cost": round(float(bucket.total_cost), 2) if bucket else 0,
+                "total_hours": bucket.total_hours if bucket else 0
+            })
+        return series
@@ -1,15 +1,17 @@
 # backend/routes/estimates.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from datetime import datetime
 import uuid
 import logging
 
+from columnar_store import ColumnarEstimateStore
+
 logger = logging.getLogger(__name__)
 
 # Base de datos en memoria para estimaciones (como fallback)
-estimates_memory_db: Dict[str, dict] = {}
+estimates_memory_db = ColumnarEstimateStore()
 
 router = APIRouter(prefix="/estimates", tags=["Project Estimates"])
 
@@ -56,15 +58,11 @@ async def create_estimate(estimate_data: ProjectEstimateCreate):
         raise HTTPException(status_code=500, detail=f"Error creating estimate: {str(e)}")
 
 @router.get("/", response_model=List[ProjectEstimate])
-async def get_estimates(limit: int = 50, skip: int = 0):
+async def get_estimates(limit: int = Query(50, ge=1, le=1000), skip: int = Query(0, ge=0)):
     """Obtener lista de estimaciones"""
     try:
-        # Obtener de memoria y ordenar por timestamp
-        estimates_list = list(estimates_memory_db.values())
-        estimates_list.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        # Aplicar paginación
-        paginated = estimates_list[skip:skip+limit]
+        # Obtener de memoria ya ordenadas por timestamp y paginadas
+        paginated = estimates_memory_db.page(skip, limit)
         
         return [ProjectEstimate(**estimate) for estimate in paginated]
             
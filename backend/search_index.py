@@ -0,0 +1,152 @@
+# backend/search_index.py - Índice invertido de trigramas para buscar estimaciones por project_name
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+NGRAM = 3
+
+# Se deja de intersecar cuando quedan pocas filas o la siguiente lista es mucho más
+# larga: verificar el substring de los candidatos sale más barato
+VERIFY_BELOW = 256
+MAX_GROWTH = 50
+
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# Tabla precalculada para los acentos latinos habituales (evita NFKD en el caso común)
+_ACCENTS = {
+    code: _strip_accents(chr(code)) for code in range(0xC0, 0x250)
+    if _strip_accents(chr(code)) != chr(code)
+}
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin acentos y con los espacios colapsados"""
+    if text.isascii():
+        return " ".join(text.lower().split())
+    folded = text.casefold().translate(_ACCENTS)
+    if not folded.isascii():
+        folded = _strip_accents(folded)
+    return " ".join(folded.split())
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def search_terms(query: str) -> List[str]:
+    """Términos normalizados de una búsqueda; ValueError si ninguno alcanza un trigrama"""
+    terms = normalize(query).split()
+    if not any(len(term) >= NGRAM for term in terms):
+        raise ValueError(f"Search needs at least one term of {NGRAM} or more characters")
+    return terms
+
+
+def mongo_text_search(terms: List[str]) -> str:
+    """Cadena `$search` de MongoDB con cada término entre comillas.
+
+    Sin comillas `$text` devuelve los documentos con cualquiera de las
+    palabras; como frases, todas son obligatorias, igual que en `match_score`.
+    """
+    phrases = (term.replace('"', " ").strip() for term in terms)
+    return " ".join(f'"{phrase}"' for phrase in phrases if phrase)
+
+
+def match_score(terms: List[str], query: str, name: str) -> Optional[int]:
+    """Relevancia de un nombre ya normalizado, o None si falta algún término.
+
+    `query` son los términos unidos por espacios. 3: nombre idéntico a la
+    búsqueda, 2: el nombre empieza con la búsqueda, 1: cada término empieza
+    una palabra del nombre, 0: solo substrings.
+    """
+    for term in terms:
+        if term not in name:
+            return None
+    if name == query:
+        return 3
+    if name.startswith(query):
+        return 2
+    for term in terms:
+        if not name.startswith(term) and f" {term}" not in name:
+            return 0
+    return 1
+
+
+def rank_key(query: str, name: str, score: int, timestamp) -> Tuple:
+    """Clave de orden (descendente): relevancia, parecido en longitud y recencia"""
+    return score, len(query) / max(len(name), 1), timestamp
+
+
+class TrigramIndex:
+    """Posting lists trigrama -> filas, mantenidas en cada alta y baja.
+
+    Las listas son arrays de uint32 (4 bytes por entrada) y solo crecen: una
+    baja cuenta sus entradas como obsoletas y las consultas verifican cada
+    candidato contra el nombre actual de la fila, así que una fila reutilizada
+    nunca da un falso positivo. Con demasiadas entradas obsoletas se
+    reconstruye con `rebuild`. `names` guarda el nombre normalizado de cada
+    fila indexada para puntuar sin volver a normalizar (vale mientras la
+    fila siga viva).
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, array] = {}
+        self.names: List[Optional[str]] = []
+        self.entries = 0
+        self.stale = 0
+
+    def add(self, row: int, text: str):
+        name = normalize(text)
+        if row >= len(self.names):
+            self.names.extend([None] * (row + 1 - len(self.names)))
+        self.names[row] = name
+        for gram in trigrams(name):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+            postings.append(row)
+            self.entries += 1
+
+    def discard(self, text: str):
+        self.stale += len(trigrams(normalize(text)))
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return self.stale > max(100_000, self.entries // 2)
+
+    def rebuild(self, items: Iterable[Tuple[int, str]]):
+        self._postings = {}
+        self.names = []
+        self.entries = 0
+        self.stale = 0
+        for row, text in items:
+            self.add(row, text)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(postings.itemsize * len(postings) for postings in self._postings.values())
+
+    def candidates(self, terms: List[str]) -> np.ndarray:
+        """Filas que contienen todos los trigramas de los términos (superconjunto de los resultados)"""
+        grams = set()
+        for term in terms:
+            grams |= trigrams(term)
+        lists = []
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                return np.empty(0, dtype=np.uint32)
+            lists.append(postings)
+        lists.sort(key=len)
+
+        rows = np.unique(np.frombuffer(lists[0], dtype=np.uint32))
+        for postings in lists[1:]:
+            if len(rows) <= VERIFY_BELOW or len(postings) > MAX_GROWTH * len(rows):
+                break
+            rows = rows[np.isin(rows, np.frombuffer(postings, dtype=np.uint32))]
+        return rows
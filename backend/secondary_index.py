@@ -0,0 +1,77 @@
+# backend/secondary_index.py - Índice ordenado de una columna numérica para filtros por rango
+from typing import List, Optional
+
+import numpy as np
+
+MERGE_EVERY = 1024
+
+
+class SortedColumnIndex:
+    """Pares (valor, fila) ordenados por valor para responder rangos con búsqueda binaria.
+
+    Las inserciones se acumulan en un buffer chico que se mezcla con el array
+    ordenado cada `merge_every` altas, así que cada alta cuesta O(1) amortizado
+    más una copia de memoria por lote. Los borrados no tocan el array: la fila
+    queda obsoleta y quien consulta verifica el valor actual de la columna.
+    Cuando las entradas obsoletas pesan demasiado se reconstruye con `rebuild`.
+    """
+
+    def __init__(self, dtype, merge_every: int = MERGE_EVERY):
+        self._dtype = np.dtype(dtype)
+        self._merge_every = merge_every
+        self._values = np.empty(0, dtype=self._dtype)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._pending_values: List = []
+        self._pending_rows: List[int] = []
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._pending_values)
+
+    def add(self, row: int, value):
+        self._pending_values.append(value)
+        self._pending_rows.append(row)
+        if len(self._pending_values) >= self._merge_every:
+            self._merge()
+
+    def discard(self):
+        """Registrar que una entrada quedó obsoleta"""
+        self.stale += 1
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return self.stale > max(self._merge_every, len(self) // 4)
+
+    def rebuild(self, rows: np.ndarray, values: np.ndarray):
+        """Reconstruir desde las filas vivas y sus valores actuales"""
+        order = np.argsort(values, kind="stable")
+        self._values = values[order].astype(self._dtype)
+        self._rows = rows[order].astype(np.int64)
+        self._pending_values = []
+        self._pending_rows = []
+        self.stale = 0
+
+    def _merge(self):
+        values = np.array(self._pending_values, dtype=self._dtype)
+        rows = np.array(self._pending_rows, dtype=np.int64)
+        order = np.argsort(values, kind="stable")
+        values, rows = values[order], rows[order]
+        positions = np.searchsorted(self._values, values, side="right")
+        self._values = np.insert(self._values, positions, values)
+        self._rows = np.insert(self._rows, positions, rows)
+        self._pending_values = []
+        self._pending_rows = []
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Filas candidatas con low <= valor <= high (pueden incluir filas obsoletas o repetidas)"""
+        start = 0 if low is None else np.searchsorted(self._values, low, side="left")
+        end = len(self._values) if high is None else np.searchsorted(self._values, high, side="right")
+        rows = self._rows[start:end]
+        if self._pending_values:
+            pending = [
+                row for row, value in zip(self._pending_rows, self._pending_values)
+                if (low is None or value >= low) and (high is None or value <= high)
+            ]
+            if pending:
+                rows = np.concatenate([rows, np.array(pending, dtype=np.int64)])
+        return rows
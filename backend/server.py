@@ -1,38 +1,83 @@
 # backend/server.py - Actualización con autenticación y endpoints adicionales
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.background import BackgroundTask
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, ValidationError
+from pymongo.errors import BulkWriteError
+from typing import Any, AsyncIterator, List, Optional, Dict
 from datetime import datetime, timedelta
+import asyncio
 import os
+import time
 import uuid
 import logging
 import jwt
+import pydantic_core
 import hashlib
 
+from estimation_engine import FEATURE_BITS, QuoteTable, estimate_sweep
+from filters import active_criteria, matches, mongo_query
+from change_feed import ChangeFeedHub, MongoChangeWatcher, sse_frame
+from circuit_breaker import CLOSED, CircuitBreaker
+from data_version import DataVersion, etag_matches
+from detail_cache import MISS, DetailCache
+from health_monitor import HealthMonitor
+from detailed_stats import compute_detailed_stats, detailed_stats_pipeline, finalize_facet, monthly_stats
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, LAG_BUCKETS, EventLoopLagMonitor, MetricsRegistry, MongoCommandMetrics
+from quantile_sketch import DIMENSIONS, METRICS
+from rollups import GRANULARITIES
+from search_index import mongo_text_search, search_terms
+from export import EXPORT_MEDIA_TYPES, iter_memory_batches, iter_mongo_batches, parse_fields, stream_csv, stream_ndjson
+from columnar_store import ColumnarEstimateStore
+from memory_store import order_key
+from persistence import MemoryPersistence
+from request_profiler import SORT_KEYS as PROFILE_SORT_KEYS, ProfilingMiddleware, RequestProfiler, report_rows, report_text
+from response_cache import EncodedEstimateCache, FastJSONResponse
+from timeutils import parse_timestamp, to_bson_precision
+from pagination import SORT_ORDER, decode_cursor, encode_cursor, mongo_after_filter
+from stats_aggregator import REMOVE_FIELDS, EstimatesStatsAggregator
+from structured_logging import RedactQueryFilter, RequestLogContext, RouteSampler, parse_sample_rates, request_log_context, setup_logging
+from write_behind import WriteBehindBuffer
+
 # Cargar variables de entorno
 load_dotenv()
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Configuración de logging: registros JSON (o texto con LOG_FORMAT=text) escritos desde un hilo aparte
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Muestreo de los logs INFO por ruta, p. ej. "/api/v1/health=0.01,/api/v1/estimates/{estimate_id}=0.1"
+LOG_SAMPLE_RATES = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+LOG_SAMPLE_DEFAULT = float(os.getenv("LOG_SAMPLE_DEFAULT", "1"))
+# Las requests más lentas que esto (y los errores 5xx) se loguean siempre, como WARNING
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+log_sampler = RouteSampler(lambda scope: route_template(scope), LOG_SAMPLE_RATES, LOG_SAMPLE_DEFAULT)
+log_handler = setup_logging(
+    logging.INFO,
+    json_format=LOG_FORMAT != "text",
+    queue_size=LOG_QUEUE_SIZE,
+    sampler=log_sampler
 )
 logger = logging.getLogger(__name__)
+# Los logs de acceso de uvicorn llevan la URL completa, con el ?ticket= del feed SSE
+logging.getLogger("uvicorn.access").addFilter(RedactQueryFilter())
 
 # Configuración JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "tu-clave-secreta-super-segura-cambiala-en-produccion")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+# Claim `scope` de los tickets del feed SSE; los tokens de sesión no lo llevan
+STREAM_TICKET_SCOPE = "change-feed"
 
 # Security
 security = HTTPBearer()
+stream_security = HTTPBearer(auto_error=False)
 
 # Base de datos en memoria para estimaciones y usuarios
-estimates_memory_db: Dict[str, dict] = {}
+estimates_memory_db = ColumnarEstimateStore()
 admin_users = {
     "admin": {
         "username": "admin",
@@ -41,29 +86,119 @@ admin_users = {
     }
 }
 
+# Agregados incrementales para el resumen de estadísticas
+stats_aggregator = EstimatesStatsAggregator()
+
+# Versión de los datos (sube en cada alta o baja) para las ETags de las lecturas
+data_version = DataVersion()
+
+# Feed de cambios (SSE) del panel de administración
+CHANGE_FEED_BUFFER = int(os.getenv("CHANGE_FEED_BUFFER", "256"))
+CHANGE_FEED_MAX_CLIENTS = int(os.getenv("CHANGE_FEED_MAX_CLIENTS", "100"))
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "5"))
+# Vigencia de los tickets con los que EventSource abre el feed (solo cuenta al conectar)
+CHANGE_FEED_TICKET_SECONDS = int(os.getenv("CHANGE_FEED_TICKET_SECONDS", "30"))
+change_hub = ChangeFeedHub(lambda: data_version.value, max_buffer=CHANGE_FEED_BUFFER, max_clients=CHANGE_FEED_MAX_CLIENTS)
+change_watcher: Optional[MongoChangeWatcher] = None
+
+# Tabla de cotizaciones precalculada (se construye al arrancar)
+quote_table: Optional[QuoteTable] = None
+
 # Configuración de MongoDB
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "clean_database")
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "3000"))
+
+# Circuit breaker de MongoDB
+MONGO_BREAKER_FAILURE_THRESHOLD = int(os.getenv("MONGO_BREAKER_FAILURE_THRESHOLD", "3"))
+MONGO_BREAKER_RESET_SECONDS = float(os.getenv("MONGO_BREAKER_RESET_SECONDS", "15"))
+MONGO_BREAKER_PROBE_SECONDS = float(os.getenv("MONGO_BREAKER_PROBE_SECONDS", "5"))
+
+# Intervalo del probe de salud en segundo plano
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "10"))
+
+# Write-behind: agrupar los inserts de create_estimate en insert_many
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_MODE = os.getenv("WRITE_BEHIND_MODE", "group")  # "group" (durable) o "async" (menor latencia)
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "100"))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "50"))
+write_buffer: Optional[WriteBehindBuffer] = None
+
+# Persistencia local del store en memoria (deshabilitada si no hay ruta)
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH", "")
+MEMORY_DB_FSYNC = os.getenv("MEMORY_DB_FSYNC", "false").lower() == "true"
+MEMORY_DB_SNAPSHOT_EVERY = int(os.getenv("MEMORY_DB_SNAPSHOT_EVERY", "50000"))
+persistence: Optional[MemoryPersistence] = None
+
+# Cache de estimaciones ya serializadas a JSON para los endpoints de lectura
+RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "64"))
+
+# Cache de GET /estimates/{id} sobre MongoDB; el TTL acota lo que puede durar un borrado hecho por otra instancia
+DETAIL_CACHE_MAX_MB = int(os.getenv("DETAIL_CACHE_MAX_MB", "16"))
+DETAIL_CACHE_TTL_SECONDS = float(os.getenv("DETAIL_CACHE_TTL_SECONDS", "5"))
+DETAIL_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("DETAIL_CACHE_NEGATIVE_TTL_SECONDS", "1"))
+detail_cache = DetailCache(
+    DETAIL_CACHE_MAX_MB * 1024 * 1024,
+    ttl=DETAIL_CACHE_TTL_SECONDS,
+    negative_ttl=DETAIL_CACHE_NEGATIVE_TTL_SECONDS
+)
+
+# Vigencia de las ETags sobre MongoDB: otras instancias escriben sin pasar por data_version
+DATA_VERSION_MAX_AGE_SECONDS = float(os.getenv("DATA_VERSION_MAX_AGE_SECONDS", "5"))
+
+# Métricas en formato Prometheus en /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+metrics = MetricsRegistry()
+request_latency = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ("route", "method", "status")
+)
+mongo_command_metrics = MongoCommandMetrics(metrics.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command duration by command name and outcome",
+    ("command", "outcome")
+))
+metrics.on_collect(mongo_command_metrics.drain)
+mongo_fallbacks = metrics.counter(
+    "mongodb_fallbacks_total",
+    "Operations served from memory after a MongoDB error",
+    ("operation",)
+)
+event_loop_lag = EventLoopLagMonitor(
+    metrics.histogram("event_loop_lag_seconds", "Delay of the event loop over a timed sleep", buckets=LAG_BUCKETS),
+    interval=EVENT_LOOP_LAG_INTERVAL_SECONDS,
+    on_tick=mongo_command_metrics.drain
+)
+
+# Perfilado bajo demanda: cabecera X-Profile-Request (con token de admin) o una fracción de las requests
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", "20"))
+MAX_PROFILE_ROWS = 500
+request_profiler = RequestProfiler(PROFILE_RING_SIZE, sample_rate=PROFILE_SAMPLE_RATE)
 
 # Variables globales para MongoDB
 client = None
 db = None
-use_memory_db = True
 
 # Intentar conectar a MongoDB
 try:
     if MONGO_URL and MONGO_URL != "mongodb://localhost:27017":
-        client = AsyncIOMotorClient(MONGO_URL)
+        client = AsyncIOMotorClient(
+            MONGO_URL,
+            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            event_listeners=[mongo_command_metrics] if METRICS_ENABLED else []
+        )
         db = client[DB_NAME]
         logger.info("MongoDB client configured")
     else:
         logger.info("No MongoDB URL provided, using memory database")
-        use_memory_db = True
 except Exception as e:
     logger.warning(f"MongoDB client configuration failed: {e}")
     client = None
     db = None
-    use_memory_db = True
 
 # Crear la aplicación FastAPI
 app = FastAPI(
@@ -98,6 +233,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
     allow_origin_regex=r"https://.*\.vercel\.app$",
 )
 
@@ -130,6 +266,39 @@ class ProjectEstimateCreate(BaseModel):
     estimated_cost: float
     breakdown: Dict[str, int]
 
+class ProjectEstimateImport(ProjectEstimateCreate):
+    # Permite conservar la fecha original al importar estimaciones históricas
+    timestamp: Optional[datetime] = None
+
+class EstimateFilter(BaseModel):
+    project_type: Optional[str] = None
+    complexity: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    features: Optional[List[str]] = None
+    min_cost: Optional[float] = None
+    max_cost: Optional[float] = None
+    min_hours: Optional[int] = None
+    max_hours: Optional[int] = None
+
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[List[str]] = None
+    filter: Optional[EstimateFilter] = None
+
+class QuoteRequest(BaseModel):
+    project_type: str
+    complexity: str
+    features: Dict[str, bool]
+    team: Dict[str, int]
+    hourly_rate: float
+
+class EstimateSweepRequest(BaseModel):
+    project_types: List[str]
+    complexities: List[str]
+    feature_sets: List[Dict[str, bool]]
+    teams: List[Dict[str, int]]
+    hourly_rates: List[float]
+
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -144,8 +313,18 @@ class HealthCheck(BaseModel):
     version: str = "2.0.0"
     database_connected: bool = False
     database_type: str = "memory"
+    circuit_breaker: str = CLOSED
+    checked_at: Optional[datetime] = None
+    check_age_seconds: Optional[float] = None
+    db_latency_ms: Optional[float] = None
     cors_origins: List[str] = []
 
+def encode_estimate(estimate: dict) -> bytes:
+    """JSON de una estimación, el mismo que produce response_model=ProjectEstimate"""
+    return ProjectEstimate.model_validate(estimate).model_dump_json().encode()
+
+response_cache = EncodedEstimateCache(encode_estimate, RESPONSE_CACHE_MAX_MB * 1024 * 1024)
+
 # ========================================
 # FUNCIONES DE UTILIDAD
 # ========================================
@@ -171,10 +350,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verificar token JWT"""
+    return decode_token(credentials.credentials)
+
+def create_stream_ticket(username: str) -> str:
+    """Ticket JWT de vida corta que solo sirve para abrir el feed de cambios"""
+    return create_access_token(
+        {"sub": username, "scope": STREAM_TICKET_SCOPE}, timedelta(seconds=CHANGE_FEED_TICKET_SECONDS)
+    )
+
+def verify_stream_token(
+    ticket: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(stream_security)
+):
+    """Como verify_token, pero acepta también ?ticket= (EventSource no puede enviar cabeceras).
+
+    En la URL nunca va el token de sesión: termina en logs de acceso y proxies.
+    """
+    if credentials is not None:
+        return decode_token(credentials.credentials)
+    if not ticket:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+    return decode_token(ticket, scope=STREAM_TICKET_SCOPE)
+
+def decode_token(token: str, scope: Optional[str] = None) -> str:
+    """Usuario de un token JWT válido para `scope` (None: token de sesión); 401 si no lo es"""
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("scope") != scope:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token inválido"
@@ -186,22 +389,317 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             detail="Token inválido"
         )
 
+def profile_authorized(authorization: Optional[str]) -> bool:
+    """Indicar si una cabecera Authorization trae un token de admin válido"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        decode_token(token)
+        return True
+    except HTTPException:
+        return False
+
+async def ping_mongodb():
+    """Ping al cluster (lanza excepción si no responde)
+
+    Lo usan el health monitor y el probe del circuit breaker: mientras los
+    índices no estén creados, cada ping exitoso vuelve a intentarlo.
+    """
+    await client.admin.command('ping')
+    schedule_ensure_indexes()
+
+mongo_breaker = CircuitBreaker(
+    "mongodb",
+    failure_threshold=MONGO_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=MONGO_BREAKER_RESET_SECONDS,
+    probe=ping_mongodb,
+    probe_interval=MONGO_BREAKER_PROBE_SECONDS
+)
+
 async def test_mongodb_connection():
     """Función para probar la conexión a MongoDB de forma segura"""
-    global use_memory_db
-    
     if client is None or db is None:
         return False
     
     try:
-        await client.admin.command('ping', serverSelectionTimeoutMS=3000)
-        use_memory_db = False
+        await ping_mongodb()
+        mongo_breaker.record_success()
         return True
     except Exception as e:
         logger.warning(f"MongoDB connection failed: {str(e)[:100]}...")
-        use_memory_db = True
+        mongo_breaker.last_error = str(e)[:200]
+        mongo_breaker.trip()
         return False
 
+health_monitor = HealthMonitor(test_mongodb_connection, interval=HEALTH_CHECK_INTERVAL_SECONDS)
+
+async def get_health_status(deep: bool = False) -> HealthCheck:
+    """Estado de salud desde la caché del monitor (o con un probe síncrono si `deep`)"""
+    if deep or health_monitor.checked_at is None:
+        await health_monitor.check()
+    db_connected = health_monitor.connected
+    
+    return HealthCheck(
+        database_connected=db_connected,
+        database_type="mongodb" if db_connected else "memory",
+        circuit_breaker=mongo_breaker.state,
+        checked_at=health_monitor.checked_at,
+        check_age_seconds=health_monitor.age_seconds,
+        db_latency_ms=health_monitor.latency_ms,
+        cors_origins=origins[:5]
+    )
+
+def mongo_available() -> bool:
+    """Indicar si la operación actual debe intentarse contra MongoDB"""
+    return client is not None and db is not None and mongo_breaker.allow_request()
+
+def current_source() -> str:
+    """Backend que atiende las lecturas en este momento"""
+    if client is not None and db is not None and mongo_breaker.state == CLOSED:
+        return "mongodb"
+    return "memory"
+
+def on_estimate_created(estimate: dict, source: str):
+    """Actualizar los agregados y el cache de respuestas tras crear una estimación"""
+    if stats_aggregator.source == source and not stats_aggregator.stale:
+        stats_aggregator.add(estimate)
+    else:
+        stats_aggregator.stale = True
+    if source == "mongodb":
+        # Cachear el JSON que devolverá MongoDB, que guarda el timestamp en milisegundos
+        fragment = response_cache.put({**estimate, "timestamp": to_bson_precision(parse_timestamp(estimate["timestamp"]))})
+    else:
+        fragment = response_cache.put(estimate)
+    data_version.bump()
+    if source == "mongodb":
+        detail_cache.put(estimate["id"], fragment)
+        if change_watcher is not None:
+            change_watcher.note_local_create(estimate)
+    publish_change("created", b'"estimate":' + fragment)
+    if source == "memory" and persistence is not None:
+        persistence.log_create(estimate)
+        schedule_snapshot()
+
+def on_estimate_deleted(estimate: dict, source: str):
+    """Actualizar los agregados y el cache de respuestas tras eliminar una estimación"""
+    if stats_aggregator.source == source and not stats_aggregator.stale:
+        stats_aggregator.remove(estimate)
+    else:
+        stats_aggregator.stale = True
+    response_cache.discard(estimate["id"])
+    data_version.bump()
+    if source == "mongodb":
+        detail_cache.put_missing(estimate["id"])
+        if change_watcher is not None:
+            change_watcher.note_local_delete(estimate)
+    publish_change("deleted", b'"id":' + pydantic_core.to_json(estimate["id"]))
+    if source == "memory" and persistence is not None:
+        persistence.log_delete(estimate["id"])
+        schedule_snapshot()
+
+def publish_change(event: str, fields: bytes):
+    """Publicar un delta en el feed de cambios junto con el resumen actualizado
+    
+    `fields` son los campos JSON propios del evento; el resumen va en null
+    cuando los agregados están desactualizados (el cliente lo pide aparte).
+    """
+    if not change_hub.active:
+        return
+    summary = None if stats_aggregator.stale else stats_aggregator.summary()
+    change_hub.publish(event, b"{" + fields + b',"summary":' + pydantic_core.to_json(summary) +
+                       b',"version":' + str(data_version.value).encode() + b"}")
+
+def on_remote_estimate_created(estimate: dict):
+    """Alta hecha en MongoDB por otra instancia"""
+    on_estimate_created(estimate, "mongodb")
+
+def on_remote_estimate_deleted(estimate_id: str):
+    """Baja hecha en MongoDB por otra instancia: solo se conoce el id"""
+    if stats_aggregator.source == "mongodb":
+        stats_aggregator.stale = True
+    response_cache.discard(estimate_id)
+    detail_cache.put_missing(estimate_id)
+    data_version.bump()
+    publish_change("deleted", b'"id":' + pydantic_core.to_json(estimate_id))
+
+def on_remote_changes_lost():
+    """Cambios de otras instancias que no se pueden expresar como deltas"""
+    if stats_aggregator.source == "mongodb":
+        stats_aggregator.stale = True
+    detail_cache.clear()
+    data_version.bump()
+    change_hub.resync()
+
+def data_etag(source: str, *scope: str, version: Optional[int] = None) -> str:
+    """ETag de una lectura servida desde `source`; sobre MongoDB vence cada DATA_VERSION_MAX_AGE_SECONDS"""
+    max_age = DATA_VERSION_MAX_AGE_SECONDS if source == "mongodb" else None
+    return data_version.etag(source, *scope, version=version, max_age=max_age)
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Cabeceras de una respuesta con ETag (el navegador revalida siempre con If-None-Match)"""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+def current_month() -> str:
+    """Alcance de las ETags de estadísticas que dependen del mes en curso"""
+    return datetime.utcnow().strftime("%Y-%m")
+
+def schedule_snapshot():
+    """Lanzar un snapshot en segundo plano cuando el log creció lo suficiente"""
+    if persistence.snapshot_due:
+        # La copia se toma junto con la rotación del log; las estimaciones se arman y escriben por lotes en otro hilo
+        persistence.snapshot_async(estimates_memory_db.detached_oldest())
+
+def write_behind_fallback(documents: List[dict]):
+    """Guardar en memoria los documentos que el write-behind no pudo escribir"""
+    mongo_fallbacks.inc("write_behind")
+    for document in documents:
+        on_estimate_deleted(document, "mongodb")
+        document.pop("_id", None)
+        estimates_memory_db[document["id"]] = document
+        on_estimate_created(document, "memory")
+
+async def flush_pending_writes():
+    """Escribir lo pendiente del write-behind antes de leer la colección completa"""
+    if write_buffer is not None:
+        await write_buffer.flush()
+
+def merge_pending(pending: List[dict], documents: List[dict], limit: int) -> List[dict]:
+    """Anteponer los documentos pendientes a una página leída de MongoDB"""
+    if not pending:
+        return documents
+    seen = set()
+    merged = []
+    # Un documento pudo escribirse entre la foto del overlay y la consulta
+    for estimate in pending + documents:
+        if estimate["id"] not in seen:
+            seen.add(estimate["id"])
+            merged.append(estimate)
+    return merged[:limit]
+
+# Los listados de MongoDB leen solo la clave de orden; el JSON sale de response_cache
+LISTING_PROJECTION = {"_id": 0, "id": 1, "timestamp": 1}
+
+def encode_memory_page(estimate_ids: List[str]) -> List[bytes]:
+    """Fragmentos JSON de una página del store en memoria; solo se arman los dicts que faltan en el cache"""
+    fragments = [response_cache.get(estimate_id) for estimate_id in estimate_ids]
+    missing = [estimate_id for estimate_id, fragment in zip(estimate_ids, fragments) if fragment is None]
+    if missing:
+        loaded = iter(estimates_memory_db.get_many(missing))
+        fragments = [fragment if fragment is not None else response_cache.put(next(loaded)) for fragment in fragments]
+    return fragments
+
+async def encode_mongo_page(estimates: List[dict]) -> List[bytes]:
+    """Fragmentos JSON de una página leída de MongoDB con LISTING_PROJECTION
+    
+    Los documentos completos (pendientes del write-behind) se codifican
+    directamente; los que faltan en el cache se traen con una sola consulta
+    y los borrados entre ambas lecturas se omiten.
+    """
+    fragments = [
+        response_cache.encode(estimate) if "project_name" in estimate else response_cache.get(estimate["id"])
+        for estimate in estimates
+    ]
+    missing = [estimate["id"] for estimate, fragment in zip(estimates, fragments) if fragment is None]
+    if missing:
+        documents = await db.project_estimates.find({"id": {"$in": missing}}, {"_id": 0}).to_list(length=len(missing))
+        loaded = {document["id"]: response_cache.put(document) for document in documents}
+        fragments = [
+            fragment if fragment is not None else loaded.get(estimate["id"])
+            for estimate, fragment in zip(estimates, fragments)
+        ]
+    return [fragment for fragment in fragments if fragment is not None]
+
+async def rebuild_stats():
+    """Recalcular los agregados desde el backend activo"""
+    if mongo_available():
+        try:
+            await flush_pending_writes()
+            cursor = db.project_estimates.find(
+                {}, {"_id": 0, "estimated_cost": 1, "estimated_hours": 1, "project_type": 1, "complexity": 1, "timestamp": 1}
+            )
+            estimates = await cursor.to_list(length=None)
+            mongo_breaker.record_success()
+            stats_aggregator.rebuild(estimates, "mongodb")
+            logger.info(f"Stats rebuilt from MongoDB: {stats_aggregator.count} estimates")
+            return
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            mongo_fallbacks.inc("stats_rebuild")
+            logger.warning(f"MongoDB stats rebuild failed, using memory: {str(e)[:50]}...")
+
+    stats_aggregator.rebuild(estimates_memory_db.values(), "memory")
+    logger.info(f"Stats rebuilt from memory: {stats_aggregator.count} estimates")
+
+async def search_estimates(terms: List[str], criteria: dict, skip: int, limit: int) -> List[dict]:
+    """Búsqueda por project_name ordenada por relevancia en el backend activo"""
+    if limit <= 0:
+        return []
+    if mongo_available():
+        try:
+            # El índice de texto no ve lo que sigue en el write-behind
+            await flush_pending_writes()
+            query = mongo_query(**criteria)
+            query["$text"] = {"$search": mongo_text_search(terms)}
+            cursor = db.project_estimates.find(query, {"score": {"$meta": "textScore"}})
+            cursor = cursor.sort([("score", {"$meta": "textScore"})] + SORT_ORDER).skip(skip).limit(limit)
+            estimates = await cursor.to_list(length=limit)
+            mongo_breaker.record_success()
+            return estimates
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            mongo_fallbacks.inc("text_search")
+            logger.warning(f"MongoDB text search failed, using memory: {str(e)[:50]}...")
+    
+    return estimates_memory_db.search(terms, criteria, skip, limit)
+
+async def ensure_stats_fresh():
+    """Recalcular los agregados solo si cambió el backend activo o quedaron desactualizados"""
+    if stats_aggregator.stale or stats_aggregator.source != current_source():
+        await rebuild_stats()
+
+# Índices de MongoDB: se crean la primera vez que MongoDB responde y se
+# reintentan hasta lograrlo (el servidor puede arrancar con MongoDB caído)
+indexes_ready = False
+index_task: Optional[asyncio.Task] = None
+
+def schedule_ensure_indexes() -> Optional[asyncio.Task]:
+    """Lanzar ensure_indexes en segundo plano si los índices siguen pendientes"""
+    global index_task
+    if indexes_ready:
+        return None
+    if index_task is None or index_task.done():
+        index_task = asyncio.create_task(ensure_indexes())
+    return index_task
+
+async def ensure_indexes() -> bool:
+    """Crear los índices de MongoDB que usan las consultas de estimaciones"""
+    global indexes_ready
+    try:
+        await db.project_estimates.create_index("id", unique=True, name="id_unique")
+        await db.project_estimates.create_index(SORT_ORDER, name="timestamp_id")
+        # Filtros de GET /estimates: igualdad primero y luego el orden del listado
+        await db.project_estimates.create_index(
+            [("project_type", 1), ("complexity", 1)] + SORT_ORDER, name="type_complexity_timestamp_id"
+        )
+        await db.project_estimates.create_index([("complexity", 1)] + SORT_ORDER, name="complexity_timestamp_id")
+        await db.project_estimates.create_index([("estimated_cost", 1)], name="estimated_cost")
+        await db.project_estimates.create_index([("estimated_hours", 1)], name="estimated_hours")
+        # Predicados features.<nombre>: true del filtro ?features=
+        await db.project_estimates.create_index([("features.$**", 1)], name="features_wildcard")
+        # Búsqueda ?q=: sin stemming ni stop words, son nombres propios
+        await db.project_estimates.create_index(
+            [("project_name", "text")], name="project_name_text", default_language="none"
+        )
+        indexes_ready = True
+        logger.info("MongoDB indexes ensured")
+    except Exception as e:
+        logger.warning(f"MongoDB index creation failed, will retry: {str(e)[:100]}...")
+    return indexes_ready
+
 # Router de API
 api_router = APIRouter(prefix="/api/v1")
 
@@ -241,30 +739,18 @@ async def verify_admin_token(current_user: str = Depends(verify_token)):
 # ENDPOINTS EXISTENTES
 # ========================================
 @api_router.get("/", response_model=HealthCheck)
-async def root():
+async def root(deep: bool = False):
     """Endpoint raíz con información de salud de la API"""
-    db_connected = await test_mongodb_connection()
-    db_type = "mongodb" if db_connected else "memory"
-    
-    return HealthCheck(
-        database_connected=db_connected,
-        database_type=db_type,
-        cors_origins=origins[:5]
-    )
+    return await get_health_status(deep)
 
 @api_router.get("/health", response_model=HealthCheck)
-async def health_check():
-    """Endpoint de verificación de salud"""
-    db_connected = await test_mongodb_connection()
-    db_type = "mongodb" if db_connected else "memory"
+async def health_check(deep: bool = False):
+    """Endpoint de verificación de salud (`?deep=true` fuerza un ping a la base)"""
+    health = await get_health_status(deep)
     
-    logger.info(f"Health check - DB connected: {db_connected}, Type: {db_type}")
+    logger.info(f"Health check - DB connected: {health.database_connected}, Type: {health.database_type}")
     
-    return HealthCheck(
-        database_connected=db_connected,
-        database_type=db_type,
-        cors_origins=origins[:5]
-    )
+    return health
 
 # ========================================
 # ENDPOINTS DE ESTIMACIONES
@@ -275,18 +761,36 @@ async def create_estimate(estimate_data: ProjectEstimateCreate):
     try:
         estimate = ProjectEstimate(**estimate_data.dict())
         
+        if write_buffer is not None:
+            # Los agregados se actualizan antes de encolar; si el lote falla (o el
+            # circuito está abierto), write_behind_fallback los mueve a memoria.
+            # El breaker se consulta una sola vez, al escribir el lote.
+            estimate_doc = estimate.dict()
+            on_estimate_created(estimate_doc, "mongodb")
+            if not await write_buffer.add(estimate_doc):
+                raise RuntimeError("the write-behind batch could not be stored")
+            logger.info(f"Queued estimate for MongoDB: {estimate.project_name}")
+            return estimate
+        
         # Intentar MongoDB primero si está disponible
-        if not use_memory_db and client is not None and db is not None:
+        if mongo_available():
             try:
-                result = await db.project_estimates.insert_one(estimate.dict())
+                estimate_doc = estimate.dict()
+                result = await db.project_estimates.insert_one(estimate_doc)
+                mongo_breaker.record_success()
                 if result.inserted_id:
+                    on_estimate_created(estimate_doc, "mongodb")
                     logger.info(f"Created estimate in MongoDB: {estimate.project_name}")
                     return estimate
             except Exception as e:
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("insert")
                 logger.warning(f"MongoDB insert failed, using memory: {str(e)[:50]}...")
         
         # Usar base de datos en memoria
-        estimates_memory_db[estimate.id] = estimate.dict()
+        estimate_doc = estimate.dict()
+        estimates_memory_db[estimate.id] = estimate_doc
+        on_estimate_created(estimate_doc, "memory")
         logger.info(f"Created estimate in memory: {estimate.project_name}")
         return estimate
             
@@ -294,46 +798,189 @@ async def create_estimate(estimate_data: ProjectEstimateCreate):
         logger.error(f"Error creating estimate: {e}")
         raise HTTPException(status_code=500, detail=f"Error creating estimate: {str(e)}")
 
-@api_router.get("/estimates", response_model=List[ProjectEstimate])
-async def get_estimates(limit: int = 100, skip: int = 0):
-    """Obtener lista de estimaciones"""
+MAX_PAGE_LIMIT = 1000
+
+@api_router.get("/estimates", response_model=List[ProjectEstimate], response_class=FastJSONResponse)
+async def get_estimates(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_LIMIT),
+    skip: int = Query(0, ge=0),
+    after: Optional[str] = None,
+    project_type: Optional[str] = None,
+    complexity: Optional[str] = None,
+    features: Optional[List[str]] = Query(None),
+    min_cost: Optional[float] = None,
+    max_cost: Optional[float] = None,
+    min_hours: Optional[int] = None,
+    max_hours: Optional[int] = None,
+    q: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Obtener lista de estimaciones
+    
+    Con `after` (cursor de la cabecera X-Next-Cursor) se pagina por keyset sobre
+    (timestamp, id); sin él se mantiene la paginación clásica con `skip`. Las
+    dos no se combinan: `skip` junto a `after` es un 400 en ambos backends.
+    
+    Filtros opcionales: tipo, complejidad, features requeridas (repetidas o
+    separadas por coma) y rangos inclusivos de costo y horas. En memoria los
+    resuelven los índices secundarios del store; en MongoDB, los índices
+    compuestos creados en `ensure_indexes`.
+    
+    Con `q` se busca por project_name (índice de trigramas en memoria, índice
+    de texto en MongoDB) y los resultados vienen por relevancia, paginados
+    con `skip`.
+    
+    La respuesta se arma concatenando el JSON de cada estimación guardado en
+    `response_cache`; MongoDB solo devuelve id y timestamp de la página. La
+    ETag sale de `data_version`: con If-None-Match vigente se responde 304
+    sin leer el store.
+    """
     try:
+        position = None
+        if after:
+            try:
+                position = decode_cursor(after)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            if skip:
+                raise HTTPException(status_code=400, detail="Cursor pages are paginated with after, not skip")
+        
+        required_features = [name for value in features or [] for name in value.split(",") if name]
+        unknown = [name for name in required_features if name not in FEATURE_BITS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown features: {', '.join(unknown)}")
+        criteria = active_criteria({
+            "project_type": project_type,
+            "complexity": complexity,
+            "features": required_features,
+            "min_cost": min_cost,
+            "max_cost": max_cost,
+            "min_hours": min_hours,
+            "max_hours": max_hours
+        })
+        
+        version = data_version.value
+        etag = data_etag(current_source(), version=version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        
+        if q is not None:
+            if position is not None:
+                raise HTTPException(status_code=400, detail="Search results are paginated with skip, not after")
+            try:
+                terms = search_terms(q)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            estimates = await search_estimates(terms, criteria, skip, limit)
+            return FastJSONResponse.from_fragments(
+                response_cache.encode_many(estimates),
+                headers=etag_headers(data_etag(current_source(), version=version))
+            )
+        
+        fragments = None
+        last_key = None
+        source = "mongodb"
+        
         # Intentar MongoDB primero si está disponible
-        if not use_memory_db and client is not None and db is not None:
+        if mongo_available():
             try:
-                estimates = await db.project_estimates.find().sort("timestamp", -1).skip(skip).limit(limit).to_list(length=limit)
-                return [ProjectEstimate(**estimate) for estimate in estimates]
+                query = mongo_query(**criteria)
+                # Documentos aún en el write-behind (siempre los más recientes)
+                pending = write_buffer.pending_newest() if write_buffer is not None else []
+                pending = [estimate for estimate in pending if matches(estimate, **criteria)]
+                if position is not None:
+                    pending = [estimate for estimate in pending if order_key(estimate) < position][:limit]
+                    after_filter = mongo_after_filter(*position)
+                    cursor = db.project_estimates.find(
+                        {"$and": [query, after_filter]} if query else after_filter, LISTING_PROJECTION
+                    ).sort(SORT_ORDER)
+                else:
+                    skipped_pending = min(skip, len(pending))
+                    pending = pending[skip:skip + limit]
+                    cursor = db.project_estimates.find(query, LISTING_PROJECTION).sort(SORT_ORDER).skip(skip - skipped_pending)
+                estimates = await cursor.limit(limit).to_list(length=limit) if limit > 0 else []
+                estimates = merge_pending(pending, estimates, limit)
+                fragments = await encode_mongo_page(estimates)
+                mongo_breaker.record_success()
+                if estimates and len(estimates) >= limit:
+                    last_key = order_key(estimates[-1])
             except Exception as e:
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("read")
                 logger.warning(f"MongoDB read failed, using memory: {str(e)[:50]}...")
         
-        # Usar base de datos en memoria
-        estimates_list = list(estimates_memory_db.values())
-        estimates_list.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Usar base de datos en memoria (el índice ya está ordenado por timestamp)
+        if fragments is None:
+            source = "memory"
+            if criteria:
+                estimate_ids = estimates_memory_db.filtered_page_ids(criteria, skip, limit, after=position)
+            elif position is not None:
+                estimate_ids = estimates_memory_db.page_ids_after(position, limit)
+            else:
+                estimate_ids = estimates_memory_db.page_ids(skip, limit)
+            fragments = encode_memory_page(estimate_ids)
+            if estimate_ids and len(estimate_ids) >= limit:
+                last_key = estimates_memory_db.key_of(estimate_ids[-1])
         
-        # Aplicar paginación
-        paginated = estimates_list[skip:skip+limit]
-        return [ProjectEstimate(**estimate) for estimate in paginated]
+        headers = etag_headers(data_etag(source, version=version))
+        if last_key is not None:
+            timestamp, last_id = last_key
+            headers["X-Next-Cursor"] = encode_cursor({"timestamp": timestamp, "id": last_id})
+        return FastJSONResponse.from_fragments(fragments, headers=headers)
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching estimates: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching estimates: {str(e)}")
 
-@api_router.get("/estimates/{estimate_id}", response_model=ProjectEstimate)
-async def get_estimate_by_id(estimate_id: str):
-    """Obtener una estimación específica"""
+@api_router.get("/estimates/{estimate_id}", response_model=ProjectEstimate, response_class=FastJSONResponse)
+async def get_estimate_by_id(estimate_id: str, if_none_match: Optional[str] = Header(None)):
+    """Obtener una estimación específica
+    
+    Sobre MongoDB pasa por `detail_cache`: el JSON (o la ausencia del id) se
+    recuerda unos segundos y mientras tanto no se consulta la colección.
+    """
     try:
+        version = data_version.value
+        etag = data_etag(current_source(), version=version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        
         # Intentar MongoDB primero si está disponible
-        if not use_memory_db and client is not None and db is not None:
+        if mongo_available():
             try:
-                estimate = await db.project_estimates.find_one({"id": estimate_id})
-                if estimate:
-                    return ProjectEstimate(**estimate)
+                headers = etag_headers(data_etag("mongodb", version=version))
+                estimate = write_buffer.get(estimate_id) if write_buffer is not None else None
+                if estimate is not None:
+                    return FastJSONResponse(response_cache.encode(estimate), headers=headers)
+                cached = detail_cache.get(estimate_id)
+                if cached is MISS:
+                    fragment = response_cache.get(estimate_id)
+                    # Con el JSON en cache solo hace falta confirmar que sigue existiendo
+                    projection = {"_id": 1} if fragment is not None else None
+                    estimate = await db.project_estimates.find_one({"id": estimate_id}, projection)
+                    mongo_breaker.record_success()
+                    if estimate:
+                        cached = fragment if fragment is not None else response_cache.put(estimate)
+                        detail_cache.put(estimate_id, cached)
+                    else:
+                        cached = None
+                        detail_cache.put_missing(estimate_id)
+                # None: no está en MongoDB (puede estar en memoria si se creó durante una caída)
+                if cached is not None:
+                    return FastJSONResponse(cached, headers=headers)
             except Exception as e:
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("read")
                 logger.warning(f"MongoDB read failed, using memory: {str(e)[:50]}...")
         
         # Usar base de datos en memoria
         if estimate_id in estimates_memory_db:
-            return ProjectEstimate(**estimates_memory_db[estimate_id])
+            return FastJSONResponse(
+                encode_memory_page([estimate_id])[0],
+                headers=etag_headers(data_etag("memory", version=version))
+            )
         
         raise HTTPException(status_code=404, detail="Estimate not found")
         
@@ -348,18 +995,24 @@ async def delete_estimate(estimate_id: str, current_user: str = Depends(verify_t
     """Eliminar una estimación (requiere autenticación de admin)"""
     try:
         # Intentar MongoDB primero si está disponible
-        if not use_memory_db and client is not None and db is not None:
+        if mongo_available():
             try:
-                result = await db.project_estimates.delete_one({"id": estimate_id})
-                if result.deleted_count > 0:
+                deleted = await write_buffer.discard(estimate_id) if write_buffer is not None else None
+                if deleted is None:
+                    deleted = await db.project_estimates.find_one_and_delete({"id": estimate_id})
+                    mongo_breaker.record_success()
+                if deleted:
+                    on_estimate_deleted(deleted, "mongodb")
                     logger.info(f"Admin {current_user} deleted estimate {estimate_id}")
                     return {"message": "Estimate deleted successfully"}
             except Exception as e:
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("delete")
                 logger.warning(f"MongoDB delete failed, using memory: {str(e)[:50]}...")
         
         # Usar base de datos en memoria
         if estimate_id in estimates_memory_db:
-            del estimates_memory_db[estimate_id]
+            on_estimate_deleted(estimates_memory_db.pop(estimate_id), "memory")
             logger.info(f"Admin {current_user} deleted estimate {estimate_id} from memory")
             return {"message": "Estimate deleted successfully"}
         
@@ -372,214 +1025,612 @@ async def delete_estimate(estimate_id: str, current_user: str = Depends(verify_t
         raise HTTPException(status_code=500, detail=f"Error deleting estimate: {str(e)}")
 
 @api_router.get("/estimates-stats/summary")
-async def get_estimates_stats():
+async def get_estimates_stats(response: Response, if_none_match: Optional[str] = Header(None)):
     """Obtener estadísticas de las estimaciones"""
     try:
-        # Intentar MongoDB primero si está disponible
-        if not use_memory_db and client is not None and db is not None:
+        version = data_version.value
+        etag = data_etag(current_source(), current_month(), version=version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        
+        await ensure_stats_fresh()
+        response.headers.update(etag_headers(data_etag(stats_aggregator.source, current_month(), version=version)))
+        return stats_aggregator.summary()
+        
+    except Exception as e:
+        logger.error(f"Error getting stats: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
+
+# ========================================
+# OPERACIONES EN LOTE
+# ========================================
+MAX_BULK_ITEMS = 1000
+
+@api_router.post("/estimates:bulk")
+async def bulk_create_estimates(items: List[Dict[str, Any]], current_user: str = Depends(verify_token)):
+    """Crear estimaciones en lote (solo para admin), con resultado por elemento"""
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Too many items (max {MAX_BULK_ITEMS})")
+    
+    try:
+        results = []
+        documents = []
+        for index, item in enumerate(items):
             try:
-                estimates = await db.project_estimates.find().to_list(length=None)
+                data = ProjectEstimateImport(**item).dict()
+            except ValidationError as e:
+                results.append({"index": index, "status": "invalid", "errors": e.errors(include_url=False)})
+                continue
+            if data["timestamp"] is None:
+                data.pop("timestamp")
+            document = ProjectEstimate(**data).dict()
+            documents.append(document)
+            results.append({"index": index, "status": "created", "id": document["id"]})
+        
+        stored_in_memory = documents
+        if documents and mongo_available():
+            stored_in_memory = []
+            try:
+                await db.project_estimates.insert_many(documents, ordered=False)
+                mongo_breaker.record_success()
+            except BulkWriteError as e:
+                mongo_breaker.record_success()
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                stored_in_memory = [documents[i] for i in sorted(failed)]
+                mongo_fallbacks.inc("insert_many")
+                logger.warning(f"MongoDB insert_many partially failed, using memory for {len(failed)} items")
             except Exception as e:
-                estimates = list(estimates_memory_db.values())
-        else:
-            estimates = list(estimates_memory_db.values())
-        
-        if not estimates:
-            return {
-                "total_estimates": 0,
-                "total_projects_cost": 0,
-                "avg_project_hours": 0,
-                "most_common_type": "N/A",
-                "total_hours": 0,
-                "estimates_this_month": 0,
-                "avg_cost_per_project": 0
-            }
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("insert_many")
+                stored_in_memory = documents
+                logger.warning(f"MongoDB insert_many failed, using memory: {str(e)[:50]}...")
+            
+            in_memory_ids = {document["id"] for document in stored_in_memory}
+            for document in documents:
+                if document["id"] not in in_memory_ids:
+                    on_estimate_created(document, "mongodb")
         
-        total_cost = sum(est['estimated_cost'] for est in estimates)
-        total_hours = sum(est['estimated_hours'] for est in estimates)
-        avg_hours = total_hours / len(estimates) if estimates else 0
-        avg_cost = total_cost / len(estimates) if estimates else 0
+        for document in stored_in_memory:
+            document.pop("_id", None)
+            estimates_memory_db[document["id"]] = document
+            on_estimate_created(document, "memory")
         
-        # Tipo más común
-        types_count = {}
-        for est in estimates:
-            project_type = est['project_type']
-            types_count[project_type] = types_count.get(project_type, 0) + 1
+        created = len(documents)
+        logger.info(f"Admin {current_user} bulk created {created} estimates ({len(items) - created} invalid)")
+        return {
+            "created": created,
+            "invalid": len(items) - created,
+            "results": results
+        }
         
-        most_common_type = max(types_count.items(), key=lambda x: x[1])[0] if types_count else "N/A"
+    except Exception as e:
+        logger.error(f"Error bulk creating estimates: {e}")
+        raise HTTPException(status_code=500, detail=f"Error bulk creating estimates: {str(e)}")
+
+@api_router.delete("/estimates")
+async def bulk_delete_estimates(delete_request: BulkDeleteRequest, current_user: str = Depends(verify_token)):
+    """Eliminar estimaciones por lista de ids o por filtro (solo para admin)"""
+    if delete_request.ids is None and delete_request.filter is None:
+        raise HTTPException(status_code=400, detail="Provide ids or filter")
+    
+    try:
+        criteria = delete_request.filter.dict() if delete_request.filter is not None else {}
+        deleted = None
+        
+        if mongo_available():
+            try:
+                await flush_pending_writes()
+                query = mongo_query(**criteria)
+                if delete_request.ids is not None:
+                    query["id"] = {"$in": delete_request.ids}
+                # Leer antes de borrar para poder descontar los agregados; el _id
+                # le permite al change watcher reconocer estos borrados como propios
+                projection = {"_id": 1, "id": 1, **{field: 1 for field in REMOVE_FIELDS}}
+                matched = await db.project_estimates.find(query, projection).to_list(length=None)
+                if matched:
+                    await db.project_estimates.delete_many({"id": {"$in": [estimate["id"] for estimate in matched]}})
+                mongo_breaker.record_success()
+                for estimate in matched:
+                    on_estimate_deleted(estimate, "mongodb")
+                deleted = [estimate["id"] for estimate in matched]
+            except Exception as e:
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("delete_many")
+                logger.warning(f"MongoDB delete_many failed, using memory: {str(e)[:50]}...")
         
-        # Estimaciones este mes
-        current_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        this_month_estimates = sum(1 for est in estimates 
-                                 if datetime.fromisoformat(est['timestamp'].replace('Z', '+00:00')) >= current_month)
+        if deleted is None:
+            if delete_request.ids is not None:
+                candidates = [estimate_id for estimate_id in delete_request.ids if estimate_id in estimates_memory_db]
+                deleted = [
+                    estimate_id for estimate_id in candidates
+                    if matches(estimates_memory_db[estimate_id], **criteria)
+                ]
+            else:
+                deleted = estimates_memory_db.filtered_ids(criteria)
+            for estimate_id in deleted:
+                on_estimate_deleted(estimates_memory_db.pop(estimate_id), "memory")
         
+        logger.info(f"Admin {current_user} bulk deleted {len(deleted)} estimates")
         return {
-            "total_estimates": len(estimates),
-            "total_projects_cost": round(total_cost, 2),
-            "avg_project_hours": round(avg_hours, 1),
-            "most_common_type": most_common_type,
-            "total_hours": total_hours,
-            "estimates_this_month": this_month_estimates,
-            "avg_cost_per_project": round(avg_cost, 2)
+            "message": "Estimates deleted successfully",
+            "deleted_count": len(deleted),
+            "ids": deleted
         }
         
     except Exception as e:
-        logger.error(f"Error getting stats: {e}")
-        raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
+        logger.error(f"Error bulk deleting estimates: {e}")
+        raise HTTPException(status_code=500, detail=f"Error bulk deleting estimates: {str(e)}")
+
+# ========================================
+# MOTOR DE ESTIMACIÓN
+# ========================================
+@api_router.post("/estimates/quote")
+async def quote_estimate(quote_request: QuoteRequest):
+    """Cotizar un proyecto usando la tabla precalculada"""
+    global quote_table
+    try:
+        if quote_table is None:
+            quote_table = QuoteTable()
+        return quote_table.quote(
+            quote_request.project_type,
+            quote_request.complexity,
+            quote_request.features,
+            quote_request.team,
+            quote_request.hourly_rate
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error quoting estimate: {e}")
+        raise HTTPException(status_code=500, detail=f"Error quoting estimate: {str(e)}")
+
+@api_router.post("/estimator/sweep")
+async def estimate_sweep_endpoint(sweep: EstimateSweepRequest):
+    """Calcular en lote la grilla de escenarios (análisis what-if / sensibilidad)"""
+    try:
+        result = estimate_sweep(
+            sweep.project_types,
+            sweep.complexities,
+            sweep.feature_sets,
+            sweep.teams,
+            sweep.hourly_rates
+        )
+        # Resultado ya compuesto de tipos JSON nativos: evitar jsonable_encoder
+        return JSONResponse(content=result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running estimate sweep: {e}")
+        raise HTTPException(status_code=500, detail=f"Error running estimate sweep: {str(e)}")
 
 # ========================================
 # ENDPOINTS ADMINISTRATIVOS
 # ========================================
-@api_router.get("/admin/estimates", response_model=List[ProjectEstimate])
-async def get_all_estimates_admin(current_user: str = Depends(verify_token)):
-    """Obtener todas las estimaciones (solo para admin)"""
+@api_router.get("/admin/estimates", response_model=List[ProjectEstimate], response_class=FastJSONResponse)
+async def get_all_estimates_admin(
+    export_format: str = Query("json", alias="format"),
+    fields: Optional[str] = None,
+    current_user: str = Depends(verify_token)
+):
+    """Obtener todas las estimaciones (solo para admin)
+    
+    Con `format=ndjson` o `format=csv` la respuesta se emite en streaming por
+    lotes, con proyección opcional de campos (`fields=id,project_name,...`).
+    """
     try:
+        if export_format != "json":
+            return await export_estimates(export_format, fields)
+        
         # Intentar MongoDB primero si está disponible
-        if not use_memory_db and client is not None and db is not None:
+        if mongo_available():
             try:
-                estimates = await db.project_estimates.find().sort("timestamp", -1).to_list(length=None)
-                return [ProjectEstimate(**estimate) for estimate in estimates]
+                await flush_pending_writes()
+                estimates = await db.project_estimates.find().sort(SORT_ORDER).to_list(length=None)
+                mongo_breaker.record_success()
+                return FastJSONResponse.from_fragments(response_cache.encode_many(estimates))
             except Exception as e:
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("read")
                 logger.warning(f"MongoDB read failed, using memory: {str(e)[:50]}...")
         
         # Usar base de datos en memoria
-        estimates_list = list(estimates_memory_db.values())
-        estimates_list.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        return [ProjectEstimate(**estimate) for estimate in estimates_list]
+        return FastJSONResponse.from_fragments(response_cache.encode_many(estimates_memory_db.iter_newest()))
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching all estimates: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching estimates: {str(e)}")
 
+async def iter_mongo_export(fields: List[str]) -> AsyncIterator[List[dict]]:
+    """Lotes de la exportación desde MongoDB, registrando el resultado en el breaker
+
+    Si MongoDB falla antes del primer lote se exporta desde memoria; si falla
+    después, el error llega al stream, que lo marca al final de la descarga.
+    """
+    started = False
+    try:
+        # El export lee la colección completa: incluir lo pendiente del write-behind
+        await flush_pending_writes()
+        async for batch in iter_mongo_batches(db.project_estimates, fields):
+            started = True
+            yield batch
+    except Exception as e:
+        mongo_breaker.record_failure(e)
+        if started:
+            raise
+        mongo_fallbacks.inc("export")
+        logger.warning(f"MongoDB export failed, using memory: {str(e)[:50]}...")
+        async for batch in iter_memory_batches(estimates_memory_db):
+            yield batch
+        return
+    mongo_breaker.record_success()
+
+async def export_estimates(export_format: str, fields: Optional[str]) -> StreamingResponse:
+    """Construir la respuesta en streaming de la exportación"""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {export_format}")
+    try:
+        selected_fields = parse_fields(fields, ProjectEstimate.model_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if mongo_available():
+        batches = iter_mongo_export(selected_fields)
+    else:
+        batches = iter_memory_batches(estimates_memory_db)
+    
+    stream = stream_csv if export_format == "csv" else stream_ndjson
+    filename = f"estimates-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        stream(batches, selected_fields),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @api_router.get("/admin/stats/detailed")
-async def get_detailed_stats(current_user: str = Depends(verify_token)):
-    """Obtener estadísticas detalladas para admin"""
+async def get_detailed_stats(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: str = Depends(verify_token)
+):
+    """Obtener estadísticas detalladas para admin
+    
+    En MongoDB todas las secciones se calculan con un único $facet y solo viaja
+    el resultado; en memoria se calculan en una sola pasada con el mismo formato.
+    La sección mensual sale de los rollups mantenidos en cada escritura. Con
+    If-None-Match vigente se responde 304 sin calcular nada.
+    """
     try:
-        # Obtener estimaciones
-        if not use_memory_db and client is not None and db is not None:
-            try:
-                estimates = await db.project_estimates.find().to_list(length=None)
-            except Exception as e:
-                estimates = list(estimates_memory_db.values())
-        else:
-            estimates = list(estimates_memory_db.values())
-        
-        if not estimates:
-            return {
-                "basic_stats": {
-                    "total_estimates": 0,
-                    "total_cost": 0,
-                    "total_hours": 0
-                },
-                "project_types": {},
-                "complexity_distribution": {},
-                "monthly_stats": {},
-                "team_composition": {},
-                "most_used_features": {}
-            }
-        
-        # Estadísticas básicas
-        total_cost = sum(est['estimated_cost'] for est in estimates)
-        total_hours = sum(est['estimated_hours'] for est in estimates)
+        version = data_version.value
+        etag = data_etag(current_source(), current_month(), version=version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
         
-        # Distribución por tipo
-        project_types = {}
-        complexity_dist = {}
-        team_totals = {'frontend': 0, 'backend': 0, 'designer': 0, 'qa': 0}
-        feature_count = {}
+        await ensure_stats_fresh()
+        monthly = monthly_stats(stats_aggregator.rollups)
         
-        for est in estimates:
-            # Tipos de proyecto
-            p_type = est['project_type']
-            project_types[p_type] = project_types.get(p_type, 0) + 1
-            
-            # Complejidad
-            complexity = est['complexity']
-            complexity_dist[complexity] = complexity_dist.get(complexity, 0) + 1
-            
-            # Equipo
-            for role, count in est.get('team', {}).items():
-                if role in team_totals:
-                    team_totals[role] += count
-            
-            # Features
-            for feature, enabled in est.get('features', {}).items():
-                if enabled:
-                    feature_count[feature] = feature_count.get(feature, 0) + 1
-        
-        # Estadísticas mensuales (últimos 6 meses)
-        monthly_stats = {}
-        for i in range(6):
-            month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30*i)
-            month_end = month_start + timedelta(days=32)
-            month_end = month_end.replace(day=1) - timedelta(days=1)
-            
-            month_estimates = [
-                est for est in estimates
-                if month_start <= datetime.fromisoformat(est['timestamp'].replace('Z', '+00:00')) <= month_end
-            ]
-            
-            month_key = month_start.strftime('%Y-%m')
-            monthly_stats[month_key] = {
-                "count": len(month_estimates),
-                "total_cost": sum(est['estimated_cost'] for est in month_estimates),
-                "total_hours": sum(est['estimated_hours'] for est in month_estimates)
-            }
+        if mongo_available():
+            try:
+                await flush_pending_writes()
+                results = await db.project_estimates.aggregate(detailed_stats_pipeline()).to_list(length=1)
+                mongo_breaker.record_success()
+                response.headers.update(etag_headers(data_etag("mongodb", current_month(), version=version)))
+                return finalize_facet(results[0] if results else {}, monthly)
+            except Exception as e:
+                mongo_breaker.record_failure(e)
+                mongo_fallbacks.inc("aggregate")
+                logger.warning(f"MongoDB aggregate failed, using memory: {str(e)[:50]}...")
         
-        return {
-            "basic_stats": {
-                "total_estimates": len(estimates),
-                "total_cost": round(total_cost, 2),
-                "total_hours": total_hours,
-                "avg_cost": round(total_cost / len(estimates), 2),
-                "avg_hours": round(total_hours / len(estimates), 1)
-            },
-            "project_types": project_types,
-            "complexity_distribution": complexity_dist,
-            "monthly_stats": monthly_stats,
-            "team_composition": team_totals,
-            "most_used_features": dict(sorted(feature_count.items(), key=lambda x: x[1], reverse=True)[:10])
-        }
+        response.headers.update(etag_headers(data_etag("memory", current_month(), version=version)))
+        return compute_detailed_stats(estimates_memory_db.values(), monthly)
         
     except Exception as e:
         logger.error(f"Error getting detailed stats: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting detailed stats: {str(e)}")
 
+MAX_TIMESERIES_BUCKETS = 1000
+
+BUCKET_DAYS = {"day": 1, "week": 7, "month": 28}
+
+DEFAULT_TIMESERIES_SPAN = {
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=12),
+    "month": timedelta(days=365)
+}
+
+@api_router.get("/admin/stats/timeseries")
+async def get_stats_timeseries(
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    granularity: str = "day",
+    current_user: str = Depends(verify_token)
+):
+    """Serie temporal de count/costo/horas por día, semana o mes (solo para admin)"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported granularity: {granularity}")
+    
+    try:
+        end = parse_timestamp(end) if end is not None else datetime.utcnow()
+        start = parse_timestamp(start) if start is not None else end - DEFAULT_TIMESERIES_SPAN[granularity]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="'from' and 'to' must be ISO dates or datetimes")
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if (end - start).days // BUCKET_DAYS[granularity] > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range too large (max {MAX_TIMESERIES_BUCKETS} buckets)")
+    
+    try:
+        await ensure_stats_fresh()
+        return {
+            "from": start,
+            "to": end,
+            "granularity": granularity,
+            "series": stats_aggregator.rollups.series(start, end, granularity)
+        }
+    except Exception as e:
+        logger.error(f"Error getting stats timeseries: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting stats timeseries: {str(e)}")
+
+MAX_HISTOGRAM_BINS = 100
+
+@api_router.get("/admin/stats/distribution")
+async def get_stats_distribution(
+    metric: str = "cost",
+    group_by: Optional[str] = "project_type",
+    bins: int = Query(10, ge=1, le=MAX_HISTOGRAM_BINS),
+    current_user: str = Depends(verify_token)
+):
+    """Percentiles (p50/p90/p99) e histograma de costo u horas (solo para admin)
+    
+    Sale de sketches KLL mantenidos en cada escritura: no recorre el store. Los
+    valores tienen el error de rango indicado en `rank_error` (p. ej. un p90 es
+    en realidad algún percentil entre p88.7 y p91.3).
+    """
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Unsupported metric: {metric}")
+    if group_by == "none":
+        group_by = None
+    if group_by is not None and group_by not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported group_by: {group_by}")
+    
+    try:
+        await ensure_stats_fresh()
+        # Los sketches no admiten borrados: si se acumularon demasiados, se reconstruyen
+        if stats_aggregator.distributions.drifted:
+            await rebuild_stats()
+        return stats_aggregator.distributions.describe(metric, group_by, bins=bins)
+    except Exception as e:
+        logger.error(f"Error getting stats distribution: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting stats distribution: {str(e)}")
+
+@api_router.get("/admin/db/breaker")
+async def get_breaker_state(current_user: str = Depends(verify_token)):
+    """Estado del circuit breaker de MongoDB (solo para admin)"""
+    return {
+        "mongodb_configured": client is not None and db is not None,
+        "active_source": current_source(),
+        **mongo_breaker.snapshot()
+    }
+
+@api_router.get("/admin/cache")
+async def get_cache_stats(current_user: str = Depends(verify_token)):
+    """Contadores de los caches de lectura de estimaciones (solo para admin)"""
+    return {
+        "responses": response_cache.snapshot(),
+        "detail": detail_cache.snapshot()
+    }
+
+@api_router.get("/admin/profiles")
+async def list_request_profiles(current_user: str = Depends(verify_token)):
+    """Perfiles de requests guardados, del más reciente al más viejo (solo para admin)"""
+    return {
+        "enabled": PROFILING_ENABLED,
+        **request_profiler.snapshot(),
+        "profiles": request_profiler.summaries()
+    }
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    sort: str = Query("cumulative"),
+    limit: int = Query(50, ge=1, le=MAX_PROFILE_ROWS),
+    output_format: str = Query("json", alias="format"),
+    current_user: str = Depends(verify_token)
+):
+    """Funciones de un perfil ordenadas por `sort`; `format=text` devuelve la salida de pstats (solo para admin)"""
+    if sort not in PROFILE_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort: {sort}")
+    if output_format not in ("json", "text"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {output_format}")
+    entry = request_profiler.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if output_format == "text":
+        return PlainTextResponse(report_text(entry, sort, limit))
+    summary = {key: value for key, value in entry.items() if key != "stats"}
+    return {**summary, "rows": report_rows(entry, sort, limit)}
+
+@api_router.post("/admin/events/ticket")
+async def create_change_feed_ticket(current_user: str = Depends(verify_token)):
+    """Ticket para abrir /admin/events con ?ticket=: vence en CHANGE_FEED_TICKET_SECONDS y no sirve como token de sesión"""
+    return {"ticket": create_stream_ticket(current_user), "expires_in": CHANGE_FEED_TICKET_SECONDS}
+
+@api_router.get("/admin/events")
+async def admin_change_feed(current_user: str = Depends(verify_stream_token)):
+    """Feed de cambios en vivo (server-sent events) para el panel de administración
+    
+    Eventos: `ready` al conectar, `created` (estimación completa), `deleted`
+    (id) y `resync` cuando el cliente debe recargar. Los deltas llevan el
+    resumen de estadísticas actualizado y la versión de los datos. Cada
+    cliente tiene un buffer acotado: si no consume a tiempo, pierde lo
+    pendiente y recibe un `resync`.
+    """
+    if change_hub.full:
+        raise HTTPException(status_code=503, detail="Too many change feed clients")
+    
+    def ready_frame() -> bytes:
+        summary = None if stats_aggregator.stale else stats_aggregator.summary()
+        payload = {"summary": summary, "version": data_version.value, "source": current_source()}
+        return sse_frame("ready", pydantic_core.to_json(payload), data_version.value)
+    
+    logger.info(f"Admin {current_user} subscribed to the change feed")
+    frames = change_hub.stream(ready_frame)
+    return StreamingResponse(
+        frames,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Al desconectarse el cliente el generador queda suspendido: cerrarlo libera la suscripción
+        background=BackgroundTask(frames.aclose)
+    )
+
+@api_router.get("/admin/events/status")
+async def get_change_feed_status(current_user: str = Depends(verify_token)):
+    """Clientes conectados al feed de cambios y origen de los cambios de MongoDB"""
+    return {
+        "clients": len(change_hub),
+        "published": change_hub.published,
+        "dropped": sum(subscription.dropped for subscription in change_hub.subscribers),
+        "evicted": change_hub.evicted,
+        "mongodb_watcher": change_watcher.mode if change_watcher is not None else None
+    }
+
+@api_router.post("/admin/stats/rebuild")
+async def rebuild_stats_admin(current_user: str = Depends(verify_token)):
+    """Recalcular los agregados de estadísticas desde el store (solo para admin)"""
+    try:
+        await rebuild_stats()
+        logger.info(f"Admin {current_user} rebuilt stats from {stats_aggregator.source}")
+        return {
+            "message": "Stats rebuilt successfully",
+            "source": stats_aggregator.source,
+            "total_estimates": stats_aggregator.count
+        }
+    except Exception as e:
+        logger.error(f"Error rebuilding stats: {e}")
+        raise HTTPException(status_code=500, detail=f"Error rebuilding stats: {str(e)}")
+
 # Incluir el router principal
 app.include_router(api_router)
 
+# ========================================
+# MÉTRICAS
+# ========================================
+metrics.callback("estimates_memory_store_size", "Estimates held in the in-memory store", lambda: len(estimates_memory_db))
+metrics.callback("write_behind_pending", "Estimates waiting to be written to MongoDB", lambda: len(write_buffer) if write_buffer is not None else None)
+metrics.callback(
+    "cache_entries", "Entries in the estimate read caches",
+    lambda: {("responses",): len(response_cache), ("detail",): len(detail_cache)}, labelnames=("cache",)
+)
+metrics.callback(
+    "cache_bytes", "Bytes held by the estimate read caches",
+    lambda: {("responses",): response_cache.nbytes, ("detail",): detail_cache.nbytes}, labelnames=("cache",)
+)
+metrics.callback(
+    "cache_lookups_total", "Estimate read cache lookups by result",
+    lambda: {
+        ("responses", "hit"): response_cache.hits,
+        ("responses", "miss"): response_cache.misses,
+        ("detail", "hit"): detail_cache.hits,
+        ("detail", "negative_hit"): detail_cache.negative_hits,
+        ("detail", "miss"): detail_cache.misses
+    },
+    kind="counter", labelnames=("cache", "result")
+)
+metrics.callback("change_feed_clients", "Connected change feed (SSE) clients", lambda: len(change_hub))
+metrics.callback("mongodb_breaker_open", "1 while the MongoDB circuit breaker is not closed", lambda: int(mongo_breaker.state != CLOSED))
+metrics.callback(
+    "mongodb_breaker_rejected_total", "Operations sent to memory because the circuit breaker was open",
+    lambda: mongo_breaker.rejected, kind="counter"
+)
+
+route_paths: Dict[Any, str] = {}
+
+def route_template(scope) -> str:
+    """Ruta que atendió la request como plantilla (/api/v1/estimates/{estimate_id}), para acotar las series"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if not route_paths:
+        route_paths.update((route.endpoint, route.path) for route in app.routes if hasattr(route, "endpoint"))
+    return route_paths.get(endpoint, "unmatched")
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+metrics.callback("log_records_dropped_total", "Log records dropped because the log queue was full", lambda: log_handler.dropped, kind="counter")
+metrics.callback("log_records_sampled_out_total", "INFO log records skipped by per-route sampling", lambda: log_sampler.sampled_out, kind="counter")
+
 # Middleware de logging
 @app.middleware("http")
 async def log_requests(request, call_next):
-    start_time = datetime.utcnow()
-    
-    origin = request.headers.get("origin")
-    if origin:
-        logger.info(f"Request from origin: {origin}")
-    
-    response = await call_next(request)
-    process_time = (datetime.utcnow() - start_time).total_seconds()
-    
-    logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.3f}s"
-    )
-    
-    return response
+    start_time = time.perf_counter()
+    # Los logs INFO de la request (incluida esta línea) se muestrean juntos según la ruta
+    log_context = RequestLogContext(request.scope)
+    context_token = request_log_context.set(log_context)
+    try:
+        try:
+            response = await call_next(request)
+        except Exception:
+            if METRICS_ENABLED:
+                request_latency.observe(time.perf_counter() - start_time, route_template(request.scope), request.method, "500")
+            raise
+        process_time = time.perf_counter() - start_time
+        route = route_template(request.scope)
+        if METRICS_ENABLED:
+            request_latency.observe(process_time, route, request.method, str(response.status_code))
+        
+        slow_or_failed = response.status_code >= 500 or process_time * 1000 >= SLOW_REQUEST_MS
+        # Decidir antes de armar el registro: lo descartado no cuesta ni el formateo
+        if not slow_or_failed and not log_sampler.admit(log_context):
+            return response
+        fields = {
+            "method": request.method,
+            "path": request.url.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(process_time * 1000, 2)
+        }
+        origin = request.headers.get("origin")
+        if origin:
+            fields["origin"] = origin
+        message = f"{request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s"
+        if slow_or_failed:
+            logger.warning(message, extra=fields)
+        else:
+            logger.info(message, extra=fields)
+        
+        return response
+    finally:
+        request_log_context.reset(context_token)
+
+# Perfilado de requests: deshabilitado, el middleware ni siquiera se instala
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler, authorize=profile_authorized)
 
 # Eventos de startup y shutdown
 @app.on_event("startup")
 async def startup_db_client():
+    global quote_table
     logger.info("🚀 Starting up Clean Project API with Admin Panel")
     logger.info(f"🌐 CORS origins configured: {len(origins)} origins")
     
+    quote_table = QuoteTable()
+    logger.info(f"🧮 Quote table built ({quote_table.nbytes // 1024} KiB)")
+    
     if client is not None and db is not None:
-        logger.info("📡 MongoDB client configured, will test on first request")
+        logger.info("📡 MongoDB client configured, testing connection")
     else:
         logger.info("💾 Using in-memory database")
     
+    # Recuperar el store en memoria desde disco si la persistencia está configurada
+    if MEMORY_DB_PATH:
+        start_persistence()
+    
     # Agregar algunas estimaciones de ejemplo si la DB está vacía
     if len(estimates_memory_db) == 0:
         sample_estimates = [
@@ -631,12 +1682,86 @@ async def startup_db_client():
         
         for estimate in sample_estimates:
             estimates_memory_db[estimate["id"]] = estimate
+            on_estimate_created(estimate, "memory")
         
         logger.info("📊 Sample estimates added for demonstration")
+    
+    # Construir los agregados de estadísticas
+    if client is not None and db is not None:
+        # Si MongoDB responde, el ping ya lanzó la creación de índices: esperarla
+        if await health_monitor.check() and index_task is not None:
+            await index_task
+        start_write_behind()
+        start_change_watcher()
+        mongo_breaker.start()
+        health_monitor.start()
+    if METRICS_ENABLED:
+        event_loop_lag.start()
+    await rebuild_stats()
+
+def start_persistence():
+    """Abrir la persistencia local y reconstruir el store desde snapshot + log"""
+    global persistence
+    if persistence is not None:
+        return
+    start_time = datetime.utcnow()
+    persistence = MemoryPersistence(MEMORY_DB_PATH, fsync=MEMORY_DB_FSYNC, snapshot_every=MEMORY_DB_SNAPSHOT_EVERY)
+    recovered = persistence.recover(estimates_memory_db)
+    elapsed = (datetime.utcnow() - start_time).total_seconds()
+    logger.info(f"💽 Recovered {recovered} estimates from {MEMORY_DB_PATH} in {elapsed:.2f}s")
+
+def start_write_behind():
+    """Arrancar el buffer write-behind si está habilitado"""
+    global write_buffer
+    if not WRITE_BEHIND_ENABLED or write_buffer is not None:
+        return
+    write_buffer = WriteBehindBuffer(
+        db.project_estimates,
+        on_failure=write_behind_fallback,
+        max_batch=WRITE_BEHIND_MAX_BATCH,
+        flush_interval=WRITE_BEHIND_FLUSH_MS / 1000,
+        mode=WRITE_BEHIND_MODE,
+        breaker=mongo_breaker
+    )
+    write_buffer.start()
+    logger.info(f"✍️ Write-behind enabled ({WRITE_BEHIND_MODE}, batch {WRITE_BEHIND_MAX_BATCH}, {WRITE_BEHIND_FLUSH_MS}ms)")
+
+def start_change_watcher():
+    """Seguir en MongoDB los cambios de otras instancias para el feed de cambios"""
+    global change_watcher
+    if change_watcher is not None:
+        return
+    change_watcher = MongoChangeWatcher(
+        db.project_estimates,
+        on_created=on_remote_estimate_created,
+        on_deleted=on_remote_estimate_deleted,
+        on_resync=on_remote_changes_lost,
+        poll_interval=CHANGE_FEED_POLL_SECONDS
+    )
+    change_watcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    global write_buffer, persistence, change_watcher
     logger.info("👋 Shutting down Clean Project API")
+    await health_monitor.stop()
+    if index_task is not None and not index_task.done():
+        index_task.cancel()
+    await event_loop_lag.stop()
+    if change_watcher is not None:
+        await change_watcher.stop()
+        change_watcher = None
+    await mongo_breaker.stop()
+    if write_buffer is not None:
+        await write_buffer.close()
+        logger.info(f"Write-behind flushed on shutdown ({write_buffer.flushed} written, {write_buffer.failed} moved to memory)")
+        write_buffer = None
+    if persistence is not None:
+        await persistence.wait_snapshot()
+        if persistence.ops_since_snapshot:
+            persistence.snapshot(estimates_memory_db.iter_oldest())
+        persistence.close()
+        persistence = None
     if client is not None:
         client.close()
 
@@ -0,0 +1,95 @@
+# backend/stats_aggregator.py - Agregados incrementales para /estimates-stats/summary
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from quantile_sketch import DIMENSIONS, EstimateDistributions
+from rollups import TimeBucketRollups
+
+# Campos que `remove` lee de una estimación: lo mínimo a proyectar al leer
+# documentos antes de borrarlos
+REMOVE_FIELDS = tuple(dict.fromkeys(("timestamp", "estimated_cost", "estimated_hours", "project_type", *DIMENSIONS)))
+
+
+class EstimatesStatsAggregator:
+    """Mantiene totales, contadores por tipo, rollups por día/semana/mes y sketches
+    de percentiles de las estimaciones.
+
+    Se actualiza en cada create/delete para que el resumen se responda en O(1)
+    respecto al número de estimaciones. `rebuild` recalcula todo desde el store
+    (al arrancar o para corregir desvíos).
+    """
+
+    def __init__(self):
+        self.source: Optional[str] = None
+        self.stale = True
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        # Decimal evita que sumas y restas repetidas acumulen error de float
+        self.total_cost = Decimal(0)
+        self.total_hours = 0
+        self.type_counts: Dict[str, int] = {}
+        self.rollups = TimeBucketRollups()
+        self.distributions = EstimateDistributions()
+
+    def add(self, estimate: dict):
+        """Registrar una estimación nueva"""
+        self.count += 1
+        self.total_cost += Decimal(str(estimate['estimated_cost']))
+        self.total_hours += estimate['estimated_hours']
+        _increment(self.type_counts, estimate['project_type'], 1)
+        self.rollups.add(estimate)
+        self.distributions.add(estimate)
+
+    def remove(self, estimate: dict):
+        """Descontar una estimación eliminada"""
+        self.count -= 1
+        self.total_cost -= Decimal(str(estimate['estimated_cost']))
+        self.total_hours -= estimate['estimated_hours']
+        _increment(self.type_counts, estimate['project_type'], -1)
+        self.rollups.remove(estimate)
+        self.distributions.remove(estimate)
+
+    def rebuild(self, estimates: Iterable[dict], source: str):
+        """Recalcular todos los agregados a partir de las estimaciones del store"""
+        self.reset()
+        for estimate in estimates:
+            self.add(estimate)
+        self.source = source
+        self.stale = False
+
+    def summary(self, now: Optional[datetime] = None) -> dict:
+        """Resumen con el mismo formato que devolvía el cálculo completo"""
+        if self.count <= 0:
+            return {
+                "total_estimates": 0,
+                "total_projects_cost": 0,
+                "avg_project_hours": 0,
+                "most_common_type": "N/A",
+                "total_hours": 0,
+                "estimates_this_month": 0,
+                "avg_cost_per_project": 0
+            }
+
+        total_cost = float(self.total_cost)
+        most_common_type = max(self.type_counts.items(), key=lambda x: x[1])[0] if self.type_counts else "N/A"
+
+        return {
+            "total_estimates": self.count,
+            "total_projects_cost": round(total_cost, 2),
+            "avg_project_hours": round(self.total_hours / self.count, 1),
+            "most_common_type": most_common_type,
+            "total_hours": self.total_hours,
+            "estimates_this_month": self.rollups.count_in(now or datetime.utcnow(), "month"),
+            "avg_cost_per_project": round(total_cost / self.count, 2)
+        }
+
+
+def _increment(counter: Dict[str, int], key: str, delta: int):
+    value = counter.get(key, 0) + delta
+    if value > 0:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
@@ -0,0 +1,164 @@
+# backend/structured_logging.py - Logging JSON fuera del event loop, con muestreo por ruta
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Parámetros de query con credenciales (?ticket= del feed SSE, ?token= de clientes viejos)
+_SECRET_QUERY_PARAMS = re.compile(r"((?:^|[?&])(?:ticket|token)=)[^&\s\"]*")
+
+# Atributos propios de LogRecord: el resto llegó por `extra` y va como campo del JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Un objeto JSON por línea: ts, level, logger, message y los campos pasados con `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que nunca bloquea: con la cola llena descarta el registro y lo cuenta.
+
+    El formateo y la escritura ocurren en el hilo del QueueListener; acá solo
+    se resuelven los argumentos del mensaje para no depender de objetos que
+    cambien antes de que el hilo los lea.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogContext:
+    """Estado de logging de una request: la decisión de muestreo se toma una vez, al primer registro"""
+
+    __slots__ = ("scope", "sampled")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.sampled: Optional[bool] = None
+
+
+request_log_context: contextvars.ContextVar[Optional[RequestLogContext]] = contextvars.ContextVar(
+    "request_log_context", default=None
+)
+
+
+class RouteSampler(logging.Filter):
+    """Muestreo de los registros INFO/DEBUG emitidos durante una request, por ruta.
+
+    La ruta sale de `resolve_route(scope)` (la plantilla, no el path con ids)
+    y su tasa de `rates`, o `default_rate`. Todos los registros de una misma
+    request corren la misma suerte. WARNING o más siempre pasa, igual que lo
+    que se loguea fuera de una request.
+    """
+
+    def __init__(self, resolve_route: Callable[[dict], str], rates: Optional[Dict[str, float]] = None,
+                 default_rate: float = 1.0):
+        super().__init__()
+        self.resolve_route = resolve_route
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self.sampled_out = 0
+
+    def admit(self, context: RequestLogContext) -> bool:
+        """Indicar si los registros INFO de la request se escriben (cuenta los descartados)"""
+        if context.sampled is None:
+            rate = self.rates.get(self.resolve_route(context.scope), self.default_rate)
+            context.sampled = rate >= 1 or random.random() < rate
+        if not context.sampled:
+            self.sampled_out += 1
+        return context.sampled
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        context = request_log_context.get()
+        return context is None or self.admit(context)
+
+
+def redact_query(text: str) -> str:
+    """Reemplazar por [redacted] los valores de ?ticket= y ?token= en una URL o query string"""
+    return _SECRET_QUERY_PARAMS.sub(r"\1[redacted]", text)
+
+
+class RedactQueryFilter(logging.Filter):
+    """Aplicar `redact_query` al mensaje y a los argumentos de texto de cada registro.
+
+    Pensado para los logs de acceso de uvicorn, que incluyen la URL completa.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, tuple):
+            record.args = tuple(redact_query(arg) if isinstance(arg, str) else arg for arg in record.args)
+        if isinstance(record.msg, str):
+            record.msg = redact_query(record.msg)
+        return True
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"/api/v1/health=0.01,/api/v1/estimates/{estimate_id}=0.1" -> {ruta: tasa}"""
+    rates = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        route, _, rate = item.rpartition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(level: int = logging.INFO, json_format: bool = True, queue_size: int = 10_000,
+                  sampler: Optional[logging.Filter] = None) -> DroppingQueueHandler:
+    """Reemplazar los handlers del root logger por una cola atendida por un hilo que escribe en stderr"""
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JSONFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    if sampler is not None:
+        queue_handler.addFilter(sampler)
+    listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    listener.start()
+    # Escribir lo que quede en la cola al salir del proceso
+    atexit.register(listener.stop)
+    return queue_handler
@@ -0,0 +1,60 @@
+# backend/tests/conftest.py - Los tests importan los módulos del backend directamente
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# La app de los tests corre en memoria (o contra mongomock) y sin persistencia
+os.environ.pop("MONGO_URL", None)
+os.environ.pop("MEMORY_DB_PATH", None)
+
+ADMIN_CREDENTIALS = {"username": "admin", "password": "admin123"}
+
+ESTIMATE_PAYLOAD = {
+    "project_name": "Demo Shop",
+    "project_type": "e-commerce",
+    "complexity": "medium",
+    "features": {"authentication": True, "payments": True, "maps": False},
+    "team": {"frontend": 1, "backend": 1, "designer": 0, "qa": 0},
+    "hourly_rate": 50.0,
+    "estimated_hours": 300,
+    "estimated_weeks": 4,
+    "estimated_cost": 15000.0,
+    "breakdown": {"frontend": 120, "backend": 120, "design": 30, "qa": 30}
+}
+
+
+@pytest.fixture
+def run_api():
+    """Ejecutar `scenario(http, headers, server)` contra la app en proceso.
+
+    Con `mongo=True` la app usa una base mongomock nueva; si no, el store en
+    memoria (vaciado antes de arrancar). `headers` trae el token de admin.
+    """
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+
+    def run(scenario, mongo: bool = False):
+        async def main():
+            server.client = AsyncMongoMockClient() if mongo else None
+            server.db = server.client["estimates_test"] if mongo else None
+            server.estimates_memory_db.clear()
+            await server.startup_db_client()
+            try:
+                transport = httpx.ASGITransport(app=server.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                    login = await http.post("/api/v1/auth/login", json=ADMIN_CREDENTIALS)
+                    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+                    return await scenario(http, headers, server)
+            finally:
+                await server.shutdown_db_client()
+                server.client = server.db = None
+
+        return asyncio.run(main())
+
+    return run
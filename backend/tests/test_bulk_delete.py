@@ -0,0 +1,39 @@
+# backend/tests/test_bulk_delete.py - Borrado masivo: agregados, caches y conteos en ambos backends
+import pytest
+
+from conftest import ESTIMATE_PAYLOAD
+
+
+async def bulk_delete_two_of_three(http, headers, server):
+    ids = []
+    for name in ("Alpha", "Beta", "Gamma"):
+        response = await http.post("/api/v1/estimates", json={**ESTIMATE_PAYLOAD, "project_name": name})
+        ids.append(response.json()["id"])
+    before = (await http.get("/api/v1/estimates-stats/summary")).json()["total_estimates"]
+    # Leer antes de borrar deja las estimaciones en los caches de lectura
+    for estimate_id in ids:
+        assert (await http.get(f"/api/v1/estimates/{estimate_id}")).status_code == 200
+
+    response = await http.request("DELETE", "/api/v1/estimates", json={"ids": ids[:2]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["deleted_count"] == 2
+    assert sorted(response.json()["ids"]) == sorted(ids[:2])
+
+    for estimate_id in ids[:2]:
+        assert (await http.get(f"/api/v1/estimates/{estimate_id}")).status_code == 404
+    assert (await http.get(f"/api/v1/estimates/{ids[2]}")).status_code == 200
+    summary = (await http.get("/api/v1/estimates-stats/summary")).json()
+    assert summary["total_estimates"] == before - 2
+    distribution = (await http.get("/api/v1/admin/stats/distribution?group_by=complexity", headers=headers)).json()
+    assert distribution["overall"]["count"] == before - 2
+    return server.mongo_breaker.consecutive_failures, (
+        await server.db.project_estimates.count_documents({}) if server.db is not None else None
+    )
+
+
+@pytest.mark.parametrize("mongo", [False, True], ids=["memory", "mongodb"])
+def test_bulk_delete_updates_aggregates_and_caches(run_api, mongo):
+    failures, remaining = run_api(bulk_delete_two_of_three, mongo=mongo)
+    assert failures == 0
+    if mongo:
+        assert remaining == 1
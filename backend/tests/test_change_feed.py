@@ -0,0 +1,47 @@
+# backend/tests/test_change_feed.py - Tickets del feed SSE y credenciales fuera de los logs
+import logging
+
+import pytest
+from fastapi import HTTPException
+
+from structured_logging import RedactQueryFilter
+
+
+async def ticket_scenario(http, headers, server):
+    response = await http.post("/api/v1/admin/events/ticket", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["expires_in"] == server.CHANGE_FEED_TICKET_SECONDS
+    ticket = response.json()["ticket"]
+    session_token = headers["Authorization"].split()[1]
+
+    # El ticket no sirve como token de sesión en el resto de la API
+    as_session = await http.get("/api/v1/admin/events/status", headers={"Authorization": f"Bearer {ticket}"})
+    without_session = await http.post("/api/v1/admin/events/ticket")
+
+    results = {"ticket": server.verify_stream_token(ticket=ticket, credentials=None)}
+    # Ni el token de sesión sirve como ticket
+    for label, value in (("session_as_ticket", session_token), ("missing", None)):
+        try:
+            server.verify_stream_token(ticket=value, credentials=None)
+        except HTTPException as e:
+            results[label] = e.status_code
+    return results, as_session.status_code, without_session.status_code
+
+
+def test_change_feed_ticket_is_single_purpose(run_api):
+    results, as_session, without_session = run_api(ticket_scenario)
+    assert results == {"ticket": "admin", "session_as_ticket": 401, "missing": 403}
+    assert as_session == 401
+    assert without_session == 403
+
+
+@pytest.mark.parametrize("query", ["ticket=eyJhbGciOi.abc.def", "x=1&token=eyJhbGciOi.abc.def"])
+def test_access_log_redacts_credentials_in_the_query(query):
+    record = logging.LogRecord(
+        "uvicorn.access", logging.INFO, __file__, 0, '%s - "%s %s HTTP/%s" %d',
+        ("127.0.0.1:5000", "GET", f"/api/v1/admin/events?{query}", "1.1", 200), None
+    )
+    assert RedactQueryFilter().filter(record)
+    message = record.getMessage()
+    assert "eyJhbGciOi" not in message
+    assert "=[redacted]" in message
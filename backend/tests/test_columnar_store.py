@@ -0,0 +1,96 @@
+# backend/tests/test_columnar_store.py - Store columnar: altas, bajas y reutilización de filas frente a los índices
+import random
+from datetime import datetime, timedelta
+
+from columnar_store import ColumnarEstimateStore
+from filters import matches
+from search_index import normalize
+
+START = datetime(2024, 1, 1)
+
+CRITERIA = (
+    {"project_type": "landing"},
+    {"complexity": "complex"},
+    {"features": ["payments"]},
+    {"features": ["payments", "maps"]},
+    {"min_cost": 5000.0, "max_cost": 20000.0},
+    {"min_hours": 300},
+    {"project_type": "e-commerce", "complexity": "simple", "max_hours": 400}
+)
+
+
+def make_estimate(number: int, rng: random.Random) -> dict:
+    return {
+        "id": f"estimate-{number:05d}",
+        "project_name": f"{rng.choice(['Alpha', 'Beta', 'Gamma'])} {rng.choice(['Shop', 'Portal', 'App'])} {number}",
+        "project_type": rng.choice(["landing", "web-app", "e-commerce"]),
+        "complexity": rng.choice(["simple", "medium", "complex"]),
+        "features": {"authentication": True, "payments": rng.random() < 0.5, "maps": rng.random() < 0.3},
+        "team": {"frontend": 1, "backend": 1},
+        "hourly_rate": 50.0,
+        "estimated_hours": rng.randint(40, 800),
+        "estimated_weeks": rng.randint(1, 20),
+        "estimated_cost": float(rng.randint(2000, 40000)),
+        "breakdown": {"frontend": 50, "backend": 50},
+        "timestamp": START + timedelta(minutes=rng.randint(0, 1000))
+    }
+
+
+def assert_indexes_match(store: ColumnarEstimateStore, reference: dict):
+    newest = sorted(reference.values(), key=lambda estimate: (estimate["timestamp"], estimate["id"]), reverse=True)
+    assert len(store) == len(reference)
+    assert store.page_ids(0, len(reference) + 1) == [estimate["id"] for estimate in newest]
+    for criteria in CRITERIA:
+        expected = [estimate["id"] for estimate in newest if matches(estimate, **criteria)]
+        assert sorted(store.filtered_ids(criteria)) == sorted(expected)
+        assert store.filtered_page_ids(criteria, 0, 5) == expected[:5]
+    for term in ("alpha shop", "portal", "gamma app"):
+        terms = term.split()
+        expected = {estimate["id"] for estimate in reference.values()
+                    if all(word in normalize(estimate["project_name"]) for word in terms)}
+        assert {estimate["id"] for estimate in store.search(terms, {}, 0, len(reference) + 1)} == expected
+
+
+def test_reused_row_carries_only_the_new_estimate():
+    rng = random.Random(1)
+    store = ColumnarEstimateStore()
+    first, second = make_estimate(1, rng), make_estimate(2, rng)
+    first.update(project_name="Alpha Shop", project_type="landing", complexity="complex",
+                 features={"authentication": True, "payments": True, "maps": True})
+    second.update(project_name="Beta Portal", project_type="web-app", complexity="simple",
+                  features={"authentication": True, "payments": False, "maps": False})
+    store[first["id"]] = first
+    row = store._rows[first["id"]]
+    del store[first["id"]]
+    store[second["id"]] = second
+
+    # La fila liberada se reutiliza y no quedan rastros de la estimación anterior
+    assert store._rows[second["id"]] == row
+    assert store[second["id"]] == second
+    assert first["id"] not in store
+    assert store.filtered_ids({"project_type": "landing"}) == []
+    assert store.filtered_ids({"complexity": "complex"}) == []
+    assert store.filtered_ids({"features": ["payments"]}) == []
+    assert store.search(["alpha"], {}) == []
+    assert [estimate["id"] for estimate in store.search(["portal"], {})] == [second["id"]]
+
+
+def test_indexes_follow_adds_removals_and_row_reuse():
+    rng = random.Random(7)
+    store = ColumnarEstimateStore(capacity=16)
+    reference = {}
+    number = 0
+    for step in range(600):
+        if reference and rng.random() < 0.45:
+            estimate_id = rng.choice(sorted(reference))
+            del store[estimate_id]
+            del reference[estimate_id]
+        else:
+            estimate = make_estimate(number, rng)
+            number += 1
+            store[estimate["id"]] = estimate
+            reference[estimate["id"]] = estimate
+        if step % 60 == 0:
+            assert_indexes_match(store, reference)
+    assert_indexes_match(store, reference)
+    assert all(store[estimate_id] == estimate for estimate_id, estimate in reference.items())
@@ -0,0 +1,57 @@
+# backend/tests/test_detailed_stats.py - Paridad entre el pipeline $facet y el cálculo en memoria
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from detailed_stats import TOP_FEATURES, compute_detailed_stats, detailed_stats_pipeline, empty_detailed_stats, finalize_facet
+
+NOW = datetime(2025, 6, 15, 12, 0, 0)
+MONTHLY = {"2025-06": {"count": 1, "total_cost": 10.0, "total_hours": 2}}
+
+# Más features que TOP_FEATURES para que el recorte y el desempate por nombre cuenten
+FEATURES = [f"feature_{i:02d}" for i in range(TOP_FEATURES + 5)]
+
+
+def make_estimates(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    estimates = []
+    for _ in range(count):
+        team = {role: rng.randint(0, 3) for role in ("frontend", "backend", "designer", "qa") if rng.random() < 0.8}
+        estimates.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "project_name": f"Project {rng.randint(1, 10**6)}",
+            "project_type": rng.choice(["landing", "web-app", "e-commerce", "enterprise"]),
+            "complexity": rng.choice(["simple", "medium", "complex"]),
+            # Incluye features en False, que no deben contarse
+            "features": {name: rng.random() < 0.4 for name in rng.sample(FEATURES, rng.randint(0, 6))},
+            "team": team,
+            "hourly_rate": 50.0,
+            "estimated_hours": rng.randint(40, 2000),
+            "estimated_weeks": rng.randint(1, 40),
+            "estimated_cost": round(rng.uniform(2000, 100000), 2),
+            "timestamp": NOW - timedelta(days=rng.randint(0, 400))
+        })
+    return estimates
+
+
+async def facet_stats(estimates: list) -> dict:
+    collection = AsyncMongoMockClient()["estimates_test"]["project_estimates"]
+    if estimates:
+        await collection.insert_many([dict(estimate) for estimate in estimates])
+    results = await collection.aggregate(detailed_stats_pipeline()).to_list(length=1)
+    return finalize_facet(results[0] if results else {}, MONTHLY)
+
+
+def test_facet_matches_memory_computation():
+    estimates = make_estimates(500)
+    facet = asyncio.run(facet_stats(estimates))
+    assert facet == compute_detailed_stats(estimates, MONTHLY)
+    assert len(facet["most_used_features"]) == TOP_FEATURES
+
+
+def test_facet_matches_memory_computation_on_empty_collection():
+    facet = asyncio.run(facet_stats([]))
+    assert facet == compute_detailed_stats([], MONTHLY) == empty_detailed_stats()
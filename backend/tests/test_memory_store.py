@@ -0,0 +1,29 @@
+# backend/tests/test_memory_store.py - Índice ordenado por bloques: recorridos descendentes con skip
+import random
+
+from memory_store import SortedKeyList
+
+
+def test_iter_desc_skip_matches_a_sorted_list_across_splits_and_removals():
+    rng = random.Random(3)
+    index = SortedKeyList(load=4)
+    keys = []
+    for step in range(2000):
+        if keys and rng.random() < 0.4:
+            key = keys.pop(rng.randrange(len(keys)))
+            index.remove(key)
+        else:
+            key = rng.random()
+            keys.append(key)
+            index.add(key)
+        if step % 25 == 0:
+            descending = sorted(keys, reverse=True)
+            for skip in (0, 1, len(keys) // 2, len(keys) - 1, len(keys), len(keys) + 5):
+                assert list(index.iter_desc(skip)) == descending[skip:]
+
+
+def test_iter_desc_skip_on_a_bulk_loaded_list():
+    keys = list(range(1000))
+    index = SortedKeyList.from_sorted(keys, load=16)
+    for skip in (0, 15, 16, 17, 500, 999, 1000):
+        assert list(index.iter_desc(skip)) == keys[::-1][skip:]
@@ -0,0 +1,67 @@
+# backend/tests/test_pagination.py - Paginación de GET /estimates: skip y cursores keyset
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import ESTIMATE_PAYLOAD
+
+
+async def skip_with_cursor(http, headers, server):
+    for number in range(3):
+        await http.post("/api/v1/estimates", json={**ESTIMATE_PAYLOAD, "project_name": f"Project {number}"})
+    statuses = []
+    for params in ({}, {"complexity": "medium"}):
+        first = await http.get("/api/v1/estimates", params={**params, "limit": 1})
+        cursor = first.headers["X-Next-Cursor"]
+        statuses.append((await http.get("/api/v1/estimates", params={**params, "after": cursor, "skip": 1})).status_code)
+        statuses.append((await http.get("/api/v1/estimates", params={**params, "after": cursor, "skip": 0})).status_code)
+    return statuses
+
+
+@pytest.mark.parametrize("mongo", [False, True], ids=["memory", "mongodb"])
+def test_skip_is_rejected_with_a_cursor(run_api, mongo):
+    # Filtrado y sin filtrar: el mismo rechazo en los tres caminos
+    assert run_api(skip_with_cursor, mongo=mongo) == [400, 200, 400, 200]
+
+
+async def walk_tied_pages(http, headers, server):
+    # Cuatro estimaciones por timestamp: los cortes de página caen dentro de los empates
+    base = datetime(2024, 3, 1, 12, 0, 0)
+    estimates = [
+        {**ESTIMATE_PAYLOAD, "id": f"estimate-{number:02d}", "project_name": f"Project {number}",
+         "complexity": "medium" if number % 3 else "simple", "timestamp": base + timedelta(minutes=number // 4)}
+        for number in range(14)
+    ]
+    if server.db is not None:
+        await server.db.project_estimates.insert_many([dict(estimate) for estimate in estimates])
+    else:
+        # Sin las estimaciones de ejemplo que se cargan al arrancar en memoria
+        server.estimates_memory_db.clear()
+        for estimate in estimates:
+            server.estimates_memory_db[estimate["id"]] = estimate
+
+    walks = {}
+    for label, params in (("all", {}), ("filtered", {"complexity": "medium"})):
+        seen = []
+        page = {**params, "limit": 3}
+        while True:
+            response = await http.get("/api/v1/estimates", params=page)
+            assert response.status_code == 200
+            seen.extend(estimate["id"] for estimate in response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            page["after"] = response.headers["X-Next-Cursor"]
+        complexity = params.get("complexity")
+        expected = sorted(
+            (estimate for estimate in estimates if complexity in (None, estimate["complexity"])),
+            key=lambda estimate: (estimate["timestamp"], estimate["id"]), reverse=True
+        )
+        walks[label] = (seen, [estimate["id"] for estimate in expected])
+    return walks
+
+
+@pytest.mark.parametrize("mongo", [False, True], ids=["memory", "mongodb"])
+def test_cursor_pages_have_no_overlap_or_gaps_with_tied_timestamps(run_api, mongo):
+    for seen, expected in run_api(walk_tied_pages, mongo=mongo).values():
+        assert len(seen) == len(set(seen))
+        assert seen == expected
@@ -0,0 +1,148 @@
+# backend/tests/test_persistence.py - Log + snapshots del store en memoria: recuperación y casos de caída
+import asyncio
+import os
+import pickle
+from datetime import datetime, timedelta
+
+from columnar_store import ColumnarEstimateStore
+from persistence import LOG_FILE, ROTATED_LOG_FILE, SNAPSHOT_BATCH, SNAPSHOT_FILE, SNAPSHOT_MAGIC_V1, MemoryPersistence
+
+START = datetime(2024, 1, 1)
+
+
+def make_estimate(number: int) -> dict:
+    return {
+        "id": f"estimate-{number:05d}",
+        "project_name": f"Project {number}",
+        "project_type": ["landing", "web-app", "e-commerce"][number % 3],
+        "complexity": ["simple", "medium", "complex"][number % 3],
+        "features": {"authentication": True, "api": number % 2 == 0},
+        "team": {"frontend": 1, "backend": 1},
+        "hourly_rate": 50.0,
+        "estimated_hours": 100 + number,
+        "estimated_weeks": 1 + number % 10,
+        "estimated_cost": 5000.0 + number,
+        "breakdown": {"frontend": 50, "backend": 50},
+        "timestamp": START + timedelta(minutes=number)
+    }
+
+
+def recover(directory: str):
+    persistence = MemoryPersistence(directory)
+    store = ColumnarEstimateStore()
+    loaded = persistence.recover(store)
+    return persistence, store, loaded
+
+
+def ids_of(store: ColumnarEstimateStore) -> list:
+    return [estimate["id"] for estimate in store.iter_oldest()]
+
+
+def test_snapshot_in_batches_plus_log_replay(tmp_path):
+    directory = str(tmp_path)
+    count = 2 * SNAPSHOT_BATCH + 5
+    persistence, _, _ = recover(directory)
+    assert persistence.snapshot(make_estimate(number) for number in range(count)) == count
+    # Después del snapshot: un borrado, una re-creación modificada y una nueva
+    persistence.log_delete(make_estimate(3)["id"])
+    persistence.log_create({**make_estimate(7), "project_name": "Renamed"})
+    persistence.log_create(make_estimate(count))
+    persistence.close()
+
+    persistence, store, loaded = recover(directory)
+    persistence.close()
+    expected = [make_estimate(number)["id"] for number in range(count + 1) if number != 3]
+    assert loaded == len(expected)
+    assert ids_of(store) == expected
+    assert store[make_estimate(7)["id"]]["project_name"] == "Renamed"
+    assert store[make_estimate(0)["id"]] == make_estimate(0)
+    assert persistence.ops_since_snapshot == 3
+
+
+def test_torn_log_record_is_truncated(tmp_path):
+    directory = str(tmp_path)
+    persistence, _, _ = recover(directory)
+    persistence.log_create(make_estimate(1))
+    persistence.log_create(make_estimate(2))
+    persistence.close()
+    log_path = os.path.join(directory, LOG_FILE)
+    valid_size = os.path.getsize(log_path)
+    # Caída a mitad de un registro: cabecera completa y payload cortado
+    with open(log_path, "ab") as log:
+        log.write(b"\x01\xff\x00\x00\x00\x00\x00\x00\x00partial")
+
+    persistence, store, loaded = recover(directory)
+    assert loaded == 2
+    assert os.path.getsize(log_path) == valid_size
+    # Lo escrito después del truncado se recupera normalmente
+    persistence.log_create(make_estimate(3))
+    persistence.close()
+    persistence, store, _ = recover(directory)
+    persistence.close()
+    assert ids_of(store) == [make_estimate(number)["id"] for number in (1, 2, 3)]
+
+
+def test_leftover_rotated_log_is_replayed_and_merged(tmp_path):
+    directory = str(tmp_path)
+    persistence, _, _ = recover(directory)
+    persistence.snapshot([make_estimate(0)])
+    persistence.log_create(make_estimate(1))
+    persistence.log_delete(make_estimate(0)["id"])
+    persistence.close()
+    # Simular un snapshot que rotó el log pero no llegó a escribirse
+    os.replace(os.path.join(directory, LOG_FILE), os.path.join(directory, ROTATED_LOG_FILE))
+
+    persistence, store, _ = recover(directory)
+    assert ids_of(store) == [make_estimate(1)["id"]]
+    persistence.log_create(make_estimate(2))
+    # La siguiente rotación conserva el log rotado pendiente en lugar de pisarlo
+    persistence._rotate_log()
+    persistence.close()
+    assert os.path.getsize(os.path.join(directory, LOG_FILE)) == 0
+    persistence, store, _ = recover(directory)
+    assert ids_of(store) == [make_estimate(number)["id"] for number in (1, 2)]
+
+    persistence.snapshot(store.iter_oldest())
+    persistence.close()
+    assert not os.path.exists(os.path.join(directory, ROTATED_LOG_FILE))
+    persistence, store, _ = recover(directory)
+    persistence.close()
+    assert ids_of(store) == [make_estimate(number)["id"] for number in (1, 2)]
+
+
+def test_single_list_snapshot_is_still_readable(tmp_path):
+    directory = str(tmp_path)
+    with open(os.path.join(directory, SNAPSHOT_FILE), "wb") as snapshot:
+        snapshot.write(SNAPSHOT_MAGIC_V1)
+        pickle.dump([make_estimate(number) for number in range(3)], snapshot)
+
+    persistence, store, loaded = recover(directory)
+    persistence.close()
+    assert loaded == 3
+    assert ids_of(store) == [make_estimate(number)["id"] for number in range(3)]
+
+
+def test_async_snapshot_keeps_writes_made_while_it_runs(tmp_path):
+    directory = str(tmp_path)
+
+    async def scenario():
+        persistence, store, _ = recover(directory)
+        for number in range(SNAPSHOT_BATCH + 10):
+            store[make_estimate(number)["id"]] = make_estimate(number)
+            persistence.log_create(make_estimate(number))
+        task = persistence.snapshot_async(store.detached_oldest())
+        # Escrituras concurrentes: van al log nuevo y no al snapshot
+        late = make_estimate(SNAPSHOT_BATCH + 10)
+        store[late["id"]] = late
+        persistence.log_create(late)
+        del store[make_estimate(0)["id"]]
+        persistence.log_delete(make_estimate(0)["id"])
+        await task
+        persistence.close()
+        return ids_of(store)
+
+    live_ids = asyncio.run(scenario())
+    persistence, store, _ = recover(directory)
+    persistence.close()
+    assert ids_of(store) == live_ids
+    assert not os.path.exists(os.path.join(directory, ROTATED_LOG_FILE))
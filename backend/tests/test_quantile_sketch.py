@@ -0,0 +1,67 @@
+# backend/tests/test_quantile_sketch.py - Sketches KLL: error de rango dentro de las cotas publicadas
+import random
+from bisect import bisect_left, bisect_right
+
+import pytest
+
+from quantile_sketch import DEFAULT_K, KLLSketch, histogram_error, rank_error
+
+COUNT = 50_000
+FRACTIONS = [i / 100 for i in range(1, 100)]
+
+
+def stream(kind: str, seed: int) -> list:
+    rng = random.Random(seed)
+    if kind == "uniform":
+        return [rng.uniform(0, 1000) for _ in range(COUNT)]
+    if kind == "lognormal":
+        return [rng.lognormvariate(9, 1.2) for _ in range(COUNT)]
+    # Costos redondeados y ordenados: muchos empates y el peor orden de llegada
+    return sorted(float(rng.randint(20, 400) * 50) for _ in range(COUNT))
+
+
+def assert_quantiles_within(sketch: KLLSketch, values: list, error: float):
+    ordered = sorted(values)
+    for fraction, estimate in zip(FRACTIONS, sketch.quantiles(FRACTIONS)):
+        # Con empates el valor ocupa un intervalo de rangos: basta con que el buscado quede cerca
+        low = bisect_left(ordered, estimate) / len(ordered)
+        high = bisect_right(ordered, estimate) / len(ordered)
+        assert low - error <= fraction <= high + error, (fraction, low, high)
+
+
+@pytest.mark.parametrize("kind", ["uniform", "lognormal", "sorted_ties"])
+def test_quantile_rank_error_stays_within_the_bound(kind):
+    values = stream(kind, seed=3)
+    sketch = KLLSketch(seed=0)
+    for value in values:
+        sketch.update(value)
+    assert sketch.n == COUNT
+    assert (sketch.min, sketch.max) == (min(values), max(values))
+    # Memoria acotada: ~3k valores más unos pocos por nivel, no n
+    assert sketch.retained <= 3 * DEFAULT_K + 2 * len(sketch._levels)
+    assert_quantiles_within(sketch, values, rank_error())
+
+
+def test_merged_sketches_keep_the_bound():
+    values = stream("lognormal", seed=5)
+    parts = [KLLSketch(seed=part) for part in range(4)]
+    for i, value in enumerate(values):
+        parts[i % 4].update(value)
+    merged = KLLSketch.merged(parts)
+    assert merged.n == COUNT
+    assert_quantiles_within(merged, values, rank_error())
+
+
+def test_histogram_counts_stay_within_the_bound():
+    values = stream("uniform", seed=7)
+    sketch = KLLSketch(seed=0)
+    for value in values:
+        sketch.update(value)
+    ordered = sorted(values)
+    histogram = sketch.histogram(10)
+    assert sum(bucket["count"] for bucket in histogram) == COUNT
+    for i, bucket in enumerate(histogram):
+        upper = bisect_right if i == len(histogram) - 1 else bisect_left
+        exact = upper(ordered, bucket["upper"]) - bisect_left(ordered, bucket["lower"])
+        # Cada conteo es la diferencia de dos rangos, cada uno con error histogram_error
+        assert abs(bucket["count"] - exact) <= 2 * histogram_error() * COUNT
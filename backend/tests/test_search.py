@@ -0,0 +1,86 @@
+# backend/tests/test_search.py - Búsqueda ?q=: mismos resultados en memoria y en MongoDB
+import re
+
+import pytest
+
+from conftest import ESTIMATE_PAYLOAD
+
+NAMES = ("Alpha Beta Shop", "Alpha Gamma", "Beta Delta", "Omega")
+
+
+class TextSearchCursor:
+    """Cursor mongomock que ignora el orden por textScore"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, keys):
+        self.cursor = self.cursor.sort([(field, order) for field, order in keys if not isinstance(order, dict)])
+        return self
+
+    def skip(self, count):
+        self.cursor = self.cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        return await self.cursor.to_list(length=length)
+
+
+class TextSearchCollection:
+    """Colección mongomock que resuelve `$text` como MongoDB sobre project_name.
+
+    mongomock no implementa `$text`: las frases entre comillas son todas
+    obligatorias y, si quedan palabras sueltas, basta con una de ellas.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def find(self, query=None, projection=None, *args, **kwargs):
+        query = dict(query or {})
+        text = query.pop("$text", None)
+        if text is None:
+            return self.collection.find(query, projection, *args, **kwargs)
+        search = text["$search"]
+        phrases = re.findall(r'"([^"]*)"', search)
+        words = re.sub(r'"[^"]*"', " ", search).split()
+        conditions = [{"project_name": {"$regex": re.escape(phrase), "$options": "i"}} for phrase in phrases]
+        if words:
+            conditions.append({"$or": [{"project_name": {"$regex": re.escape(word), "$options": "i"}} for word in words]})
+        return TextSearchCursor(self.collection.find({"$and": [query, *conditions]}))
+
+
+class TextSearchDatabase:
+    def __init__(self, db):
+        self.db = db
+
+    def __getattr__(self, name):
+        attribute = getattr(self.db, name)
+        return TextSearchCollection(attribute) if name == "project_estimates" else attribute
+
+
+async def search_multi_word(http, headers, server):
+    fallbacks = server.mongo_fallbacks.value("text_search")
+    if server.db is not None:
+        server.db = TextSearchDatabase(server.db)
+    for name in NAMES:
+        response = await http.post("/api/v1/estimates", json={**ESTIMATE_PAYLOAD, "project_name": name})
+        assert response.status_code == 200
+    response = await http.get("/api/v1/estimates", params={"q": "alpha beta"})
+    assert response.status_code == 200
+    return sorted(estimate["project_name"] for estimate in response.json()), server.mongo_fallbacks.value("text_search") - fallbacks
+
+
+@pytest.mark.parametrize("mongo", [False, True], ids=["memory", "mongodb"])
+def test_multi_word_search_requires_every_term(run_api, mongo):
+    names, fallbacks = run_api(search_multi_word, mongo=mongo)
+    assert names == ["Alpha Beta Shop"]
+    # En modo MongoDB la búsqueda tiene que haberla resuelto $text, no el store en memoria
+    assert fallbacks == 0
@@ -0,0 +1,71 @@
+# backend/tests/test_stats_aggregator.py - Agregados incrementales frente a un recálculo completo
+import random
+from datetime import datetime, timedelta
+
+from stats_aggregator import EstimatesStatsAggregator
+
+START = datetime(2024, 1, 1)
+NOW = datetime(2024, 6, 15)
+
+
+def make_estimate(number: int, rng: random.Random) -> dict:
+    return {
+        "id": f"estimate-{number:05d}",
+        "project_type": rng.choice(["landing", "web-app", "e-commerce", "mobile-app"]),
+        "complexity": rng.choice(["simple", "medium", "complex"]),
+        "estimated_hours": rng.randint(40, 2000),
+        "estimated_cost": round(rng.uniform(1000, 90000), 2),
+        "timestamp": START + timedelta(seconds=rng.randint(0, 200 * 86400))
+    }
+
+
+def assert_same_aggregates(incremental: EstimatesStatsAggregator, estimates: list):
+    recomputed = EstimatesStatsAggregator()
+    recomputed.rebuild(estimates, "memory")
+    summary, expected = incremental.summary(NOW), recomputed.summary(NOW)
+    # Con empates, el tipo más común puede ser cualquiera de los empatados
+    most_common = summary.pop("most_common_type")
+    expected.pop("most_common_type")
+    assert summary == expected
+    assert incremental.type_counts == recomputed.type_counts
+    if estimates:
+        assert incremental.type_counts[most_common] == max(recomputed.type_counts.values())
+    for granularity in ("day", "week", "month"):
+        assert (incremental.rollups.series(START, NOW, granularity)
+                == recomputed.rollups.series(START, NOW, granularity))
+
+    # Y el recálculo coincide con sumar a mano
+    assert summary["total_estimates"] == len(estimates)
+    assert summary["total_hours"] == sum(estimate["estimated_hours"] for estimate in estimates)
+    assert summary["total_projects_cost"] == round(sum(estimate["estimated_cost"] for estimate in estimates), 2)
+
+
+def test_add_and_remove_match_a_full_recompute():
+    rng = random.Random(11)
+    aggregator = EstimatesStatsAggregator()
+    aggregator.rebuild([], "memory")
+    live = {}
+    for number in range(1500):
+        if live and rng.random() < 0.4:
+            estimate = live.pop(rng.choice(sorted(live)))
+            aggregator.remove(estimate)
+        else:
+            estimate = make_estimate(number, rng)
+            live[estimate["id"]] = estimate
+            aggregator.add(estimate)
+        if number % 150 == 0:
+            assert_same_aggregates(aggregator, list(live.values()))
+    assert_same_aggregates(aggregator, list(live.values()))
+
+
+def test_removing_everything_returns_to_the_empty_summary():
+    rng = random.Random(5)
+    aggregator = EstimatesStatsAggregator()
+    estimates = [make_estimate(number, rng) for number in range(50)]
+    for estimate in estimates:
+        aggregator.add(estimate)
+    for estimate in estimates:
+        aggregator.remove(estimate)
+    assert_same_aggregates(aggregator, [])
+    assert aggregator.type_counts == {}
+    assert aggregator.summary(NOW)["total_projects_cost"] == 0
@@ -0,0 +1,126 @@
+# backend/tests/test_write_behind.py - Buffer write-behind: cierre, cancelación, borrados en vuelo y breaker
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from conftest import ESTIMATE_PAYLOAD
+from circuit_breaker import CLOSED, CircuitBreaker
+from write_behind import WriteBehindBuffer
+
+
+class SlowCollection:
+    """Colección mongomock cuyo insert_many tarda `delay` segundos"""
+
+    def __init__(self, delay: float = 0.05):
+        self.collection = AsyncMongoMockClient()["write_behind_test"]["estimates"]
+        self.delay = delay
+        self.started = asyncio.Event()
+
+    async def insert_many(self, documents, ordered=False):
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        return await self.collection.insert_many(documents, ordered=ordered)
+
+    async def count(self) -> int:
+        return await self.collection.count_documents({})
+
+
+def document(estimate_id: str) -> dict:
+    return {"id": estimate_id, "timestamp": 1}
+
+
+def test_close_waits_for_the_batch_being_written():
+    async def scenario():
+        collection = SlowCollection()
+        moved = []
+        buffer = WriteBehindBuffer(collection, on_failure=moved.extend, mode="group", flush_interval=0.01)
+        buffer.start()
+        request = asyncio.create_task(buffer.add(document("a")))
+        await collection.started.wait()
+        await buffer.close()
+        return await request, await collection.count(), moved
+
+    stored, count, moved = asyncio.run(scenario())
+    assert stored is True
+    assert count == 1
+    assert moved == []
+
+
+def test_cancelled_insert_hands_the_batch_to_on_failure():
+    async def scenario():
+        collection = SlowCollection(delay=10)
+        moved = []
+        buffer = WriteBehindBuffer(collection, on_failure=moved.extend, mode="group", flush_interval=0.01)
+        buffer.start()
+        request = asyncio.create_task(buffer.add(document("a")))
+        await collection.started.wait()
+        buffer._task.cancel()
+        return await request, [estimate["id"] for estimate in moved], len(buffer)
+
+    stored, moved, pending = asyncio.run(scenario())
+    assert stored is True
+    assert moved == ["a"]
+    assert pending == 0
+
+
+def test_lost_batch_is_reported_and_does_not_hang():
+    class DownCollection:
+        async def insert_many(self, documents, ordered=False):
+            raise RuntimeError("connection refused")
+
+    def broken_fallback(documents):
+        raise ValueError("memory store unavailable")
+
+    async def scenario():
+        buffer = WriteBehindBuffer(DownCollection(), on_failure=broken_fallback, mode="group", flush_interval=0.01)
+        buffer.start()
+        stored = await asyncio.wait_for(buffer.add(document("a")), 2)
+        await buffer.close()
+        return stored, buffer.lost
+
+    assert asyncio.run(scenario()) == (False, 1)
+
+
+def test_discard_of_an_in_flight_document_waits_for_the_insert():
+    async def scenario():
+        collection = SlowCollection()
+        buffer = WriteBehindBuffer(collection, on_failure=lambda documents: None, mode="async")
+        await buffer.add(document("a"))
+        flush = asyncio.create_task(buffer.flush())
+        await collection.started.wait()
+        discarded = await buffer.discard("a")
+        # Quien borra lo encuentra donde quedó escrito
+        found = await collection.collection.find_one_and_delete({"id": "a"})
+        await flush
+        return discarded, found is not None, await collection.count()
+
+    assert asyncio.run(scenario()) == (None, True, 0)
+
+
+def test_half_open_breaker_lets_the_batch_through_and_closes():
+    async def scenario():
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure(RuntimeError("down"))
+        collection = SlowCollection(delay=0)
+        moved = []
+        buffer = WriteBehindBuffer(collection, on_failure=moved.extend, mode="group", breaker=breaker)
+        await asyncio.gather(buffer.add(document("a")), buffer.flush())
+        return breaker.state, await collection.count(), moved
+
+    assert asyncio.run(scenario()) == (CLOSED, 1, [])
+
+
+def test_create_uses_the_half_open_trial_for_the_batch(run_api, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "WRITE_BEHIND_ENABLED", True)
+    monkeypatch.setattr(server.mongo_breaker, "reset_timeout", 0)
+
+    async def scenario(http, headers, server):
+        server.mongo_breaker.trip()
+        response = await http.post("/api/v1/estimates", json=ESTIMATE_PAYLOAD)
+        assert response.status_code == 200
+        found = await server.db.project_estimates.find_one({"id": response.json()["id"]})
+        return server.mongo_breaker.state, found is not None, response.json()["id"] in server.estimates_memory_db
+
+    assert run_api(scenario, mongo=True) == (CLOSED, True, False)
@@ -0,0 +1,17 @@
+# backend/timeutils.py - Utilidades para normalizar timestamps de estimaciones
+from datetime import datetime, timezone
+from typing import Union
+
+
+def parse_timestamp(value: Union[str, datetime]) -> datetime:
+    """Convertir un timestamp (datetime o ISO string) a datetime UTC sin tzinfo"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def to_bson_precision(value: datetime) -> datetime:
+    """Truncar a milisegundos, la precisión con que MongoDB guarda los datetimes"""
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
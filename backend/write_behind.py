@@ -0,0 +1,201 @@
+# backend/write_behind.py - Buffer write-behind con group commit para MongoDB
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from circuit_breaker import CircuitBreaker
+from memory_store import order_key
+
+logger = logging.getLogger(__name__)
+
+# Modos de confirmación:
+#   "group": la request espera al insert_many de su lote (durable, +latencia de la ventana)
+#   "async": la request responde al encolar (mínima latencia, se pierde lo pendiente si el proceso muere)
+WRITE_BEHIND_MODES = ("group", "async")
+
+
+class WriteBehindBuffer:
+    """Cola en proceso que agrupa los inserts y los escribe con insert_many.
+
+    El lote se vacía al llegar a `max_batch` documentos o tras `flush_interval`
+    segundos. Mientras un documento está pendiente se puede leer desde el
+    overlay (`get`, `pending_newest`), así se mantiene read-your-writes.
+    Con `breaker`, cada insert_many registra su resultado en el circuit
+    breaker y, con el circuito abierto, el lote va directo a `on_failure`.
+    """
+
+    def __init__(self, collection, on_failure: Callable[[List[dict]], None],
+                 max_batch: int = 100, flush_interval: float = 0.05, mode: str = "group",
+                 max_pending: int = 10_000, breaker: Optional[CircuitBreaker] = None):
+        if mode not in WRITE_BEHIND_MODES:
+            raise ValueError(f"Unknown write-behind mode: {mode}")
+        self.collection = collection
+        self.on_failure = on_failure
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.mode = mode
+        self.max_pending = max_pending
+        self.breaker = breaker
+        self._pending: Dict[str, dict] = {}
+        self._queue: List[Tuple[dict, Optional[asyncio.Future]]] = []
+        # Documentos cuyo lote se está escribiendo -> evento que se marca al terminar
+        self._in_flight: Dict[str, asyncio.Event] = {}
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self.flushed = 0
+        self.failed = 0
+        self.lost = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def add(self, document: dict) -> bool:
+        """Encolar un documento; en modo "group" espera a que quede guardado.
+
+        Devuelve False si el documento se perdió: el insert no llegó a
+        confirmarse y `on_failure` tampoco pudo guardarlo.
+        """
+        while len(self._pending) >= self.max_pending:
+            # Backpressure: no dejar crecer la cola sin límite
+            self._wakeup.set()
+            await self._drained.wait()
+
+        future = asyncio.get_running_loop().create_future() if self.mode == "group" else None
+        self._pending[document['id']] = document
+        self._queue.append((document, future))
+        self._drained.clear()
+        if len(self._queue) >= self.max_batch:
+            self._wakeup.set()
+        if future is not None:
+            return await future
+        return True
+
+    def get(self, estimate_id: str) -> Optional[dict]:
+        return self._pending.get(estimate_id)
+
+    async def discard(self, estimate_id: str) -> Optional[dict]:
+        """Quitar un documento que todavía no se escribió (p. ej. al borrarlo).
+
+        Si su lote ya se está escribiendo no se puede retirar: se espera a que
+        el insert termine y se devuelve None, así quien borra lo busca donde
+        quedó (en MongoDB, o en memoria si el lote falló).
+        """
+        written = self._in_flight.get(estimate_id)
+        if written is not None:
+            await written.wait()
+            return None
+        document = self._pending.pop(estimate_id, None)
+        if document is not None:
+            for i, (queued, future) in enumerate(self._queue):
+                if queued is document:
+                    del self._queue[i]
+                    # El alta se aceptó y se borró antes de escribirse: queda resuelta
+                    if future is not None and not future.done():
+                        future.set_result(True)
+                    break
+        return document
+
+    def pending_newest(self) -> List[dict]:
+        """Documentos pendientes, del más reciente al más antiguo"""
+        return sorted(self._pending.values(), key=order_key, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def flush(self):
+        """Escribir todo lo pendiente"""
+        async with self._flush_lock:
+            while self._queue:
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                await self._write(batch)
+            self._drained.set()
+
+    async def close(self):
+        """Detener el flusher y escribir lo que quede pendiente.
+
+        No se cancela el flusher: se le pide que termine y se espera el lote
+        que esté escribiendo, para no cortar un insert_many a mitad de camino.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._queue:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Write-behind flush failed: {e}")
+
+    async def _write(self, batch: List[Tuple[dict, Optional[asyncio.Future]]]):
+        documents = [document for document, _ in batch]
+        written = asyncio.Event()
+        for document in documents:
+            self._in_flight[document['id']] = written
+        stored = False
+        try:
+            try:
+                failed_indexes = await self._insert(documents)
+            except asyncio.CancelledError:
+                # Cortado a mitad del insert: no hay confirmación, el lote pasa a memoria
+                self.failed += len(documents)
+                self.on_failure(documents)
+                stored = True
+                raise
+            failed = [documents[i] for i in sorted(failed_indexes)]
+            self.flushed += len(documents) - len(failed)
+            self.failed += len(failed)
+            if failed:
+                self.on_failure(failed)
+            stored = True
+        finally:
+            # Liberar a las requests aunque on_failure falle; solo True si quedó guardado
+            if not stored:
+                self.lost += len(documents)
+                logger.error(f"Write-behind lost a batch of {len(documents)} estimates")
+            for document, future in batch:
+                self._pending.pop(document['id'], None)
+                self._in_flight.pop(document['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(stored)
+            written.set()
+
+    async def _insert(self, documents: List[dict]) -> Set[int]:
+        """insert_many del lote; devuelve los índices de los documentos que no se escribieron"""
+        if self.breaker is not None and not self.breaker.allow_request():
+            logger.warning(f"MongoDB circuit open, moving {len(documents)} queued estimates to memory")
+            return set(range(len(documents)))
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # MongoDB respondió: los errores son por documento, no de conexión
+            if self.breaker is not None:
+                self.breaker.record_success()
+            failed_indexes = {error['index'] for error in e.details.get('writeErrors', [])}
+            logger.warning(f"MongoDB insert_many partially failed: {len(failed_indexes)} of {len(documents)}")
+            return failed_indexes
+        except Exception as e:
+            if self.breaker is not None:
+                self.breaker.record_failure(e)
+            logger.warning(f"MongoDB insert_many failed, using memory: {str(e)[:50]}...")
+            return set(range(len(documents)))
+        if self.breaker is not None:
+            self.breaker.record_success()
+        return set()
@@ -1,11 +1,20 @@
 // frontend/src/components/AdminDashboard.js - Actualizado con NotificationModal
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import axios from 'axios';
 import NotificationModal from './NotificationModal';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api/v1';
 
+// Mismos tipos que el estimador; el filtro por tipo se resuelve en el backend
+const PROJECT_TYPES = ['landing', 'web-app', 'location-app', 'e-commerce', 'enterprise', 'mobile-app'];
+
+// El backend busca por trigramas: necesita al menos una palabra de 3 letras
+const isServerSearch = (term) => term.split(/\s+/).some(word => word.length >= 3);
+
+// Espera antes de pedir otro ticket y reconectar el feed de cambios
+const FEED_RETRY_MS = 3000;
+
 const AdminDashboard = ({ onLogout }) => {
   const [estimates, setEstimates] = useState([]);
   const [stats, setStats] = useState({});
@@ -14,6 +23,7 @@ const AdminDashboard = ({ onLogout }) => {
   const [filter, setFilter] = useState('all');
   const [sortBy, setSortBy] = useState('timestamp');
   const [searchTerm, setSearchTerm] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
   
   // Estado para el modal de notificación
   const [notification, setNotification] = useState({
@@ -23,15 +33,101 @@ const AdminDashboard = ({ onLogout }) => {
     message: ''
   });
 
+  // Conectado al feed de cambios: las altas y bajas llegan solas, sin recargar
+  const [liveUpdates, setLiveUpdates] = useState(false);
+  const latest = useRef({});
+
   useEffect(() => {
-    fetchEstimates();
     fetchStats();
   }, []);
 
+  useEffect(() => {
+    const session = JSON.parse(localStorage.getItem('adminSession') || '{}');
+    if (!session.token || typeof EventSource === 'undefined') return undefined;
+
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+    let connectedBefore = false;
+    const applySummary = (summary) => (summary ? setStats(summary) : latest.current.fetchStats());
+    const reload = () => {
+      latest.current.fetchEstimates();
+      latest.current.fetchStats();
+    };
+    const retry = () => {
+      setLiveUpdates(false);
+      if (!closed) retryTimer = setTimeout(connect, FEED_RETRY_MS);
+    };
+
+    // El JWT no viaja en la URL: se canjea por un ticket corto que solo sirve para abrir el feed
+    const connect = async () => {
+      let ticket;
+      try {
+        const response = await axios.post(`${API_BASE_URL}/admin/events/ticket`, null, {
+          headers: { Authorization: `Bearer ${session.token}` }
+        });
+        ticket = response.data.ticket;
+      } catch (error) {
+        retry();
+        return;
+      }
+      if (closed) return;
+      source = new EventSource(`${API_BASE_URL}/admin/events?ticket=${encodeURIComponent(ticket)}`);
+
+      source.addEventListener('ready', () => {
+        // Tras una reconexión se pudieron perder eventos
+        if (connectedBefore) reload();
+        connectedBefore = true;
+        setLiveUpdates(true);
+      });
+      source.addEventListener('created', (event) => {
+        const { estimate, summary } = JSON.parse(event.data);
+        const { filter: currentFilter, searchQuery: currentQuery } = latest.current;
+        applySummary(summary);
+        // Con búsqueda activa el orden es por relevancia: no se inserta a mano
+        if (isServerSearch(currentQuery)) return;
+        if (currentFilter !== 'all' && estimate.project_type !== currentFilter) return;
+        setEstimates(prev => (
+          prev.some(item => item.id === estimate.id) ? prev : [estimate, ...prev].slice(0, 100)
+        ));
+      });
+      source.addEventListener('deleted', (event) => {
+        const { id, summary } = JSON.parse(event.data);
+        applySummary(summary);
+        setEstimates(prev => prev.filter(item => item.id !== id));
+      });
+      source.addEventListener('resync', reload);
+      // El ticket ya venció: en lugar del reintento propio de EventSource se pide uno nuevo
+      source.onerror = () => {
+        source.close();
+        retry();
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, []);
+
+  useEffect(() => {
+    const timer = setTimeout(() => setSearchQuery(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  useEffect(() => {
+    fetchEstimates();
+  }, [filter, searchQuery]);
+
   const fetchEstimates = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_BASE_URL}/estimates?limit=100`);
+      const params = { limit: 100 };
+      if (filter !== 'all') params.project_type = filter;
+      if (isServerSearch(searchQuery)) params.q = searchQuery;
+      const response = await axios.get(`${API_BASE_URL}/estimates`, { params });
       setEstimates(response.data || []);
     } catch (error) {
       console.error('Error fetching estimates:', error);
@@ -56,6 +152,8 @@ const AdminDashboard = ({ onLogout }) => {
     }
   };
 
+  latest.current = { filter, searchQuery, fetchEstimates, fetchStats };
+
   // Función para mostrar notificaciones
   const showNotification = (type, title, message) => {
     setNotification({
@@ -95,8 +193,10 @@ const AdminDashboard = ({ onLogout }) => {
 
     try {
       await axios.delete(`${API_BASE_URL}/estimates/${deleteConfirmation.estimate.id}`);
-      await fetchEstimates();
-      await fetchStats();
+      if (!liveUpdates) {
+        await fetchEstimates();
+        await fetchStats();
+      }
       setSelectedEstimate(null);
       hideDeleteConfirmation();
       
@@ -119,8 +219,8 @@ const AdminDashboard = ({ onLogout }) => {
   // Filtrar y ordenar estimaciones
   const filteredEstimates = estimates
     .filter(est => {
-      if (filter !== 'all' && est.project_type !== filter) return false;
-      if (searchTerm && !est.project_name.toLowerCase().includes(searchTerm.toLowerCase())) return false;
+      const term = searchTerm.trim();
+      if (term && !isServerSearch(term) && !est.project_name.toLowerCase().includes(term.toLowerCase())) return false;
       return true;
     })
     .sort((a, b) => {
@@ -137,7 +237,7 @@ const AdminDashboard = ({ onLogout }) => {
       }
     });
 
-  const projectTypes = [...new Set(estimates.map(e => e.project_type))];
+  const projectTypes = PROJECT_TYPES;
 
   return (
     <div className="min-h-screen bg-gray-50">
@@ -1,5 +1,8 @@
 import React, { useState } from 'react';
 import { motion } from 'framer-motion';
+import axios from 'axios';
+
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api/v1';
 
 const AdminLogin = ({ onLogin, onGoBack }) => {
   const [credentials, setCredentials] = useState({
@@ -21,14 +24,24 @@ const AdminLogin = ({ onLogin, onGoBack }) => {
     setError('');
 
     // Simular delay de autenticación
-    setTimeout(() => {
+    setTimeout(async () => {
       if (
         credentials.username === ADMIN_CREDENTIALS.username &&
         credentials.password === ADMIN_CREDENTIALS.password
       ) {
+        // Token JWT del backend para el feed de cambios del panel (opcional)
+        let token = null;
+        try {
+          const response = await axios.post(`${API_BASE_URL}/auth/login`, credentials);
+          token = response.data.access_token;
+        } catch (error) {
+          console.error('Error obtaining admin token:', error);
+        }
+
         // Guardar sesión en localStorage
         localStorage.setItem('adminSession', JSON.stringify({
           username: credentials.username,
+          token,
           timestamp: Date.now()
         }));
         onLogin(true);